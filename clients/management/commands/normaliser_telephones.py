@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from clients.models import Client
+from clients.telephones import normaliser_e164, cache_clients
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculer le numéro de téléphone canonique (E.164) des clients "
+        "(rempli à la migration 0005, puis à chaque enregistrement)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=1000, help="Taille des lots de mise à jour")
+        parser.add_argument(
+            '--tous',
+            action='store_true',
+            help="Recalculer aussi les clients dont le numéro canonique est déjà rempli"
+        )
+
+    def handle(self, *args, **options):
+        taille_lot = options['lot']
+        clients = Client.objects.only('id', 'telephone', 'telephone_e164').order_by('pk')
+        if not options['tous']:
+            clients = clients.filter(telephone_e164__isnull=True)
+
+        # Numéros déjà attribués, pour détecter les doublons avant d'écrire
+        attribues = dict(
+            Client.objects.filter(telephone_e164__isnull=False).values_list('telephone_e164', 'id')
+        )
+
+        mis_a_jour = 0
+        conflits = []
+        lot = []
+        for client in clients.iterator(chunk_size=taille_lot):
+            numero = normaliser_e164(client.telephone)
+            if numero == client.telephone_e164:
+                continue
+            proprietaire = attribues.get(numero)
+            if numero is not None and proprietaire is not None and proprietaire != client.id:
+                conflits.append((client, numero, proprietaire))
+                continue
+            if client.telephone_e164:
+                attribues.pop(client.telephone_e164, None)
+            if numero is not None:
+                attribues[numero] = client.id
+            client.telephone_e164 = numero
+            lot.append(client)
+            if len(lot) >= taille_lot:
+                mis_a_jour += self._enregistrer(lot)
+                lot = []
+        if lot:
+            mis_a_jour += self._enregistrer(lot)
+
+        cache_clients.vider()
+
+        for client, numero, proprietaire in conflits:
+            self.stdout.write(self.style.WARNING(
+                f"Doublon ignoré: client {client.id} ({client.telephone}) -> {numero} "
+                f"déjà attribué au client {proprietaire}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"{mis_a_jour} clients mis à jour, {len(conflits)} doublon(s) à corriger manuellement"
+        ))
+
+    def _enregistrer(self, lot):
+        Client.objects.bulk_update(lot, ['telephone_e164'])
+        return len(lot)
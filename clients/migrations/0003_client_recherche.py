@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:20
+
+from django.db import migrations, models
+
+
+def remplir_colonnes_recherche(apps, schema_editor):
+    """Calculer les colonnes de recherche des clients existants"""
+    from clients.recherche import chiffres, normaliser_texte
+
+    Client = apps.get_model('clients', 'Client')
+    lot = []
+    for client in Client.objects.only('id', 'prenom', 'nom', 'telephone').iterator(chunk_size=2000):
+        client.recherche = normaliser_texte(f"{client.prenom} {client.nom} {chiffres(client.telephone)}")[:255]
+        client.telephone_chiffres = chiffres(client.telephone)[:20]
+        lot.append(client)
+        if len(lot) >= 2000:
+            Client.objects.bulk_update(lot, ['recherche', 'telephone_chiffres'])
+            lot = []
+    if lot:
+        Client.objects.bulk_update(lot, ['recherche', 'telephone_chiffres'])
+
+
+def creer_index_fulltext(apps, schema_editor):
+    """Index FULLTEXT avec parseur ngram (MySQL uniquement)"""
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        "CREATE FULLTEXT INDEX clients_recherche_ft ON clients (recherche) WITH PARSER ngram"
+    )
+
+
+def supprimer_index_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute("DROP INDEX clients_recherche_ft ON clients")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_clientfeedback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='recherche',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Prénom, nom et chiffres du téléphone normalisés (sans accents)', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='telephone_chiffres',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Chiffres du numéro de téléphone, pour la recherche par préfixe', max_length=20),
+        ),
+        migrations.RunPython(remplir_colonnes_recherche, migrations.RunPython.noop),
+        migrations.RunPython(creer_index_fulltext, supprimer_index_fulltext),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_client_recherche'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='telephone_e164',
+            field=models.CharField(blank=True, editable=False, help_text='Numéro de téléphone canonique au format E.164 (+225...)', max_length=20, null=True, unique=True),
+        ),
+    ]
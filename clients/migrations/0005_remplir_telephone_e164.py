@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:30
+
+from django.db import migrations
+
+
+def remplir_telephone_e164(apps, schema_editor):
+    """
+    Calculer le numéro canonique des clients existants. En cas de doublon (même
+    numéro saisi sous deux formes), le client le plus ancien garde le numéro;
+    les autres restent sans numéro canonique, à fusionner manuellement.
+    """
+    from clients.telephones import normaliser_e164
+
+    Client = apps.get_model('clients', 'Client')
+    attribues = set(
+        Client.objects.filter(telephone_e164__isnull=False).values_list('telephone_e164', flat=True)
+    )
+    clients = Client.objects.filter(telephone_e164__isnull=True).only('id', 'telephone', 'telephone_e164')
+    lot = []
+    for client in clients.order_by('date_creation', 'pk').iterator(chunk_size=2000):
+        numero = normaliser_e164(client.telephone)
+        if numero is None or numero in attribues:
+            continue
+        attribues.add(numero)
+        client.telephone_e164 = numero
+        lot.append(client)
+        if len(lot) >= 2000:
+            Client.objects.bulk_update(lot, ['telephone_e164'])
+            lot = []
+    if lot:
+        Client.objects.bulk_update(lot, ['telephone_e164'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_client_telephone_e164'),
+    ]
+
+    operations = [
+        migrations.RunPython(remplir_telephone_e164, migrations.RunPython.noop),
+    ]
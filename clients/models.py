@@ -28,6 +28,31 @@ class Client(models.Model):
     date_modification = models.DateTimeField(auto_now=True)
     actif = models.BooleanField(default=True)
     
+    # Colonnes dérivées pour la recherche (voir clients.recherche)
+    recherche = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Prénom, nom et chiffres du téléphone normalisés (sans accents)"
+    )
+    telephone_e164 = models.CharField(
+        max_length=20,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Numéro de téléphone canonique au format E.164 (+225...)"
+    )
+    telephone_chiffres = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text="Chiffres du numéro de téléphone, pour la recherche par préfixe"
+    )
+    
     class Meta:
         db_table = 'clients'
         verbose_name = 'Client'
@@ -37,6 +62,30 @@ class Client(models.Model):
     def __str__(self):
         return f"{self.prenom} {self.nom} - {self.telephone}"
     
+    def save(self, *args, **kwargs):
+        # Tenir à jour le numéro canonique et les colonnes de recherche
+        from .recherche import texte_recherche, chiffres
+        from .telephones import normaliser_e164, cache_clients
+        numero = normaliser_e164(self.telephone)
+        if numero and Client.objects.filter(telephone_e164=numero).exclude(pk=self.pk).exists():
+            # Doublon antérieur à la normalisation: le numéro reste au client qui l'a déjà
+            numero = None
+        self.telephone_e164 = numero
+        self.recherche = texte_recherche(self)
+        self.telephone_chiffres = chiffres(self.telephone)[:20]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'telephone_e164', 'recherche', 'telephone_chiffres'}
+        super().save(*args, **kwargs)
+        cache_clients.invalider(self.pk)
+    
+    def delete(self, *args, **kwargs):
+        from .telephones import cache_clients
+        pk = self.pk
+        resultat = super().delete(*args, **kwargs)
+        cache_clients.invalider(pk)
+        return resultat
+    
     @property
     def nom_complet(self):
         return f"{self.prenom} {self.nom}"
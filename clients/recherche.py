@@ -0,0 +1,113 @@
+"""
+Recherche de clients sur une colonne normalisée (nom sans accents + chiffres du téléphone)
+
+Sur MySQL, la colonne `recherche` porte un index FULLTEXT avec le parseur ngram
+et `telephone_chiffres` un index B-tree utilisé pour les recherches par préfixe.
+Les vues clients, paiements et QR codes passent toutes par ce module.
+"""
+import re
+import unicodedata
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Func, Q, Value, FloatField
+
+# Taille des n-grammes de l'index FULLTEXT (ngram_token_size par défaut de MySQL)
+TAILLE_NGRAM = 2
+
+
+class CorrespondanceTexte(Func):
+    """
+    MATCH (colonne) AGAINST (requête IN BOOLEAN MODE) de MySQL. La colonne est une
+    expression de l'ORM: son alias de table reste juste quand la requête est
+    utilisée comme sous-requête (filtre_recherche_client), contrairement à du SQL brut.
+    """
+    template = 'MATCH (%(expressions)s) AGAINST (%%s IN BOOLEAN MODE)'
+    output_field = FloatField()
+
+    def __init__(self, colonne, requete):
+        super().__init__(colonne)
+        self.requete = requete
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return sql, [*params, self.requete]
+
+
+def normaliser_texte(valeur):
+    """Minuscules, sans accents, ponctuation remplacée par des espaces"""
+    if not valeur:
+        return ''
+    decompose = unicodedata.normalize('NFKD', str(valeur))
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', sans_accents.lower()).split())
+
+
+def chiffres(valeur):
+    """Ne conserver que les chiffres d'un numéro de téléphone"""
+    return re.sub(r'\D', '', valeur or '')
+
+
+def texte_recherche(client):
+    """Construire la valeur de la colonne de recherche d'un client"""
+    return normaliser_texte(f"{client.prenom} {client.nom} {chiffres(client.telephone)}")[:255]
+
+
+def rechercher_clients(terme, queryset=None):
+    """
+    Filtrer les clients correspondant au terme saisi, annotés d'un score `pertinence`.
+
+    Les mots du terme sont cherchés dans le nom normalisé et la suite de chiffres
+    éventuelle est cherchée comme préfixe du téléphone (avec ou sans indicatif pays).
+    """
+    from .models import Client
+
+    if queryset is None:
+        queryset = Client.objects.all()
+
+    jetons = normaliser_texte(terme).split()
+    if not jetons:
+        # Terme sans lettre ni chiffre (ex. "--"): aucun résultat plutôt que tous les clients
+        return queryset.none().annotate(pertinence=Value(1.0, output_field=FloatField()))
+    mots = [jeton for jeton in jetons if not jeton.isdigit()]
+    numero = ''.join(jeton for jeton in jetons if jeton.isdigit())
+
+    if numero:
+        queryset = queryset.filter(filtre_telephone(numero))
+
+    if not mots:
+        return queryset.annotate(pertinence=Value(1.0, output_field=FloatField()))
+
+    if connection.vendor == 'mysql' and all(len(mot) >= TAILLE_NGRAM for mot in mots):
+        # Chaque mot est une phrase obligatoire: avec le parseur ngram, elle
+        # correspond à toute sous-chaîne du nom normalisé
+        requete = ' '.join(f'+"{mot}"' for mot in mots)
+        pertinence = CorrespondanceTexte(F('recherche'), requete)
+        return queryset.annotate(pertinence=pertinence).filter(pertinence__gt=0)
+
+    for mot in mots:
+        queryset = queryset.filter(recherche__contains=mot)
+    return queryset.annotate(pertinence=Value(1.0, output_field=FloatField()))
+
+
+def filtre_telephone(numero):
+    """
+    Préfixe sur les chiffres du téléphone, avec ou sans l'indicatif pays, dans
+    le numéro cherché comme dans le numéro enregistré (le plus souvent local)
+    """
+    indicatif = settings.TELEPHONE_INDICATIF_PAYS
+    filtre = Q(telephone_chiffres__startswith=numero)
+    if not numero.startswith(indicatif):
+        filtre |= Q(telephone_chiffres__startswith=indicatif + numero)
+    elif len(numero) > len(indicatif):
+        filtre |= Q(telephone_chiffres__startswith=numero[len(indicatif):])
+    return filtre
+
+
+def filtre_recherche_client(terme, champ='client'):
+    """
+    Condition à appliquer sur un modèle lié à Client (paiements, QR codes):
+    le client doit figurer parmi les résultats de la recherche
+    """
+    if not normaliser_texte(terme):
+        return Q(pk__in=[])
+    return Q(**{f'{champ}__in': rechercher_clients(terme).values('pk')})
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from django.db.models import Q
 from .models import Client, ClientFeedback
+from .telephones import normaliser_e164
 
 
 class ClientSerializer(serializers.ModelSerializer):
@@ -18,6 +20,10 @@ class ClientSerializer(serializers.ModelSerializer):
         """Valider le format du numéro de téléphone"""
         # Vérifier si le téléphone est déjà utilisé par un autre client
         queryset = Client.objects.filter(telephone=value)
+        numero = normaliser_e164(value)
+        if numero:
+            # Le même numéro saisi sous une autre forme (+225..., 00225...) est aussi un doublon
+            queryset = Client.objects.filter(Q(telephone=value) | Q(telephone_e164=numero))
         # Exclure l'instance actuelle lors de la mise à jour
         if self.instance:
             queryset = queryset.exclude(id=self.instance.id)
@@ -0,0 +1,103 @@
+"""
+Normalisation E.164 des numéros de téléphone et résolution client par téléphone
+
+Le numéro canonique est stocké dans `Client.telephone_e164` (unique, indexé).
+Le cache partagé (Redis) évite de refaire la requête pour les clients récemment
+identifiés; l'entrée d'un client est retirée, pour tous les workers, à chaque
+save()/delete() validé.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from salon_paiement import cache as cache_versionne
+from .recherche import chiffres
+
+ESPACE_CACHE = 'clients_telephone'
+
+# Longueur d'un numéro national (Côte d'Ivoire: 10 chiffres depuis 2021)
+LONGUEUR_NATIONALE = 10
+
+
+def normaliser_e164(telephone):
+    """
+    Convertir un numéro saisi ("+225 07 01...", "00225...", "0701...") au format E.164.
+    Retourne None si le numéro ne contient aucun chiffre.
+    """
+    numero = chiffres(telephone)
+    if not numero:
+        return None
+    brut = str(telephone).strip()
+    if brut.startswith('+'):
+        return '+' + numero
+    if numero.startswith('00'):
+        return '+' + numero[2:]
+    indicatif = settings.TELEPHONE_INDICATIF_PAYS
+    if numero.startswith(indicatif) and len(numero) > LONGUEUR_NATIONALE:
+        return '+' + numero
+    return '+' + indicatif + numero
+
+
+class CacheClientsTelephone:
+    """
+    Cache partagé (tous les workers): numéro E.164 -> valeurs des champs du client.
+    Une seconde entrée par client (pk -> numéro) permet d'invalider le numéro
+    mis en cache même après un changement de téléphone.
+    """
+
+    def __init__(self, duree):
+        self.duree = duree
+
+    def _cle_numero(self, numero):
+        return cache_versionne.cle(ESPACE_CACHE, 'numero', numero)
+
+    def _cle_client(self, pk):
+        return cache_versionne.cle(ESPACE_CACHE, 'client', pk)
+
+    def obtenir(self, numero):
+        return cache.get(self._cle_numero(numero))
+
+    def ajouter(self, numero, pk, valeurs):
+        cache.set_many({
+            self._cle_numero(numero): valeurs,
+            self._cle_client(pk): numero,
+        }, self.duree)
+
+    def invalider(self, pk):
+        """Retirer le client du cache, après validation de la transaction en cours"""
+        def retirer():
+            numero = cache.get(self._cle_client(pk))
+            cles = [self._cle_client(pk)]
+            if numero is not None:
+                cles.append(self._cle_numero(numero))
+            cache.delete_many(cles)
+        transaction.on_commit(retirer)
+
+    def vider(self):
+        cache_versionne.invalider(ESPACE_CACHE)
+
+
+cache_clients = CacheClientsTelephone(duree=getattr(settings, 'CLIENTS_CACHE_TELEPHONE_DUREE', 300))
+
+
+def resoudre_client(telephone):
+    """
+    Retrouver un client à partir d'un numéro saisi sous n'importe quelle forme.
+    Une seule requête indexée sur telephone_e164, ou aucune si le client est en cache.
+    Retourne None si aucun client ne correspond.
+    """
+    from .models import Client
+
+    numero = normaliser_e164(telephone)
+    if numero is None:
+        return None
+
+    champs = [champ.attname for champ in Client._meta.concrete_fields]
+    valeurs = cache_clients.obtenir(numero)
+    if valeurs is not None:
+        # Reconstruire une instance neuve pour ne pas partager d'objet entre requêtes
+        return Client.from_db('default', champs, valeurs)
+
+    client = Client.objects.filter(telephone_e164=numero).first()
+    if client is not None:
+        cache_clients.ajouter(numero, client.pk, tuple(getattr(client, champ) for champ in champs))
+    return client
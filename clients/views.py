@@ -2,16 +2,20 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from salon_paiement.conditionnel import GetConditionnelMixin
 from salon_paiement.permissions import CanManageClients, IsOwnerOrAdmin, IsVendeurOrAdmin
 from django.db.models import Q, ProtectedError, Avg
 from django.utils.translation import gettext_lazy as _
 from .models import Client, ClientFeedback
+from .recherche import rechercher_clients
+from .telephones import resoudre_client
 from .serializers import ClientSerializer, ClientListSerializer, ClientDetailSerializer, ClientFeedbackSerializer
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(GetConditionnelMixin, viewsets.ModelViewSet):
     """
     API endpoint pour la gestion des clients
+    (liste avec ETag: 304 si rien n'a changé depuis le dernier appel)
     """
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
@@ -29,20 +33,16 @@ class ClientViewSet(viewsets.ModelViewSet):
         """Filtrer les clients selon les paramètres de recherche"""
         queryset = Client.objects.all()
         
-        # Recherche par nom, prénom ou téléphone
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(nom__icontains=search) |
-                Q(prenom__icontains=search) |
-                Q(telephone__icontains=search)
-            )
-        
         # Filtrer par statut actif/inactif
         actif = self.request.query_params.get('actif', None)
         if actif is not None:
             queryset = queryset.filter(actif=actif.lower() == 'true')
         
+        # Recherche par nom, prénom ou téléphone, classée par pertinence
+        search = self.request.query_params.get('search', None)
+        if search:
+            return rechercher_clients(search, queryset).order_by('-pertinence', '-date_creation')
+        
         return queryset.order_by('-date_creation')
     
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
@@ -57,15 +57,14 @@ class ClientViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            client = Client.objects.get(telephone=telephone)
-            serializer = ClientDetailSerializer(client)
-            return Response(serializer.data)
-        except Client.DoesNotExist:
+        client = resoudre_client(telephone)
+        if client is None:
             return Response(
                 {'error': 'Client non trouvé'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        serializer = ClientDetailSerializer(client)
+        return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def desactiver(self, request, pk=None):
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ConfigSiteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'config_site'
+    
+    def ready(self):
+        # Invalidation des paramètres en cache à chaque enregistrement
+        from . import signals  # noqa: F401
@@ -0,0 +1,177 @@
+"""
+Variantes optimisées du logo et du favicon
+
+À chaque nouvel envoi, l'image d'origine est déclinée en tailles standard
+(WebP, PNG, et AVIF si Pillow sait l'écrire), plus un favicon ICO multi-tailles
+et des icônes PNG (apple-touch, manifeste). Les noms de fichiers contiennent
+l'empreinte de l'image d'origine:
+
+    site/<champ>/<empreinte>-<largeur>.<format>
+
+Un fichier ne change donc jamais de contenu: nginx et les navigateurs peuvent
+le garder indéfiniment. Les chemins sont rangés dans SiteSettings.variantes_images.
+"""
+import hashlib
+import logging
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+LARGEURS_LOGO = (64, 128, 256, 512)
+TAILLES_ICO = (16, 32, 48)
+TAILLES_ICONES = (180, 192, 512)
+
+OPTIONS_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 82, 'method': 6},
+    'avif': {'format': 'AVIF', 'quality': 60},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+
+
+def configuration():
+    return getattr(settings, 'SITE_IMAGES', {})
+
+
+def formats_disponibles():
+    """Formats de sortie que Pillow sait écrire ici (AVIF: Pillow 11.2+ ou pillow-avif-plugin)"""
+    from PIL import Image
+
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+    Image.init()
+    formats = [format_image for format_image in ('avif', 'webp', 'png') if format_image.upper() in Image.SAVE]
+    return [format_image for format_image in formats if format_image in configuration().get('FORMATS', formats)]
+
+
+class ImagesSiteService:
+    """Production des variantes du logo et du favicon"""
+
+    def ouvrir(self, fichier):
+        """Image Pillow et empreinte du contenu d'un FieldFile (ou None pour un SVG)"""
+        from PIL import Image, ImageOps
+
+        if fichier.name.lower().endswith('.svg'):
+            # Image vectorielle: déjà légère, servie telle quelle
+            return None, None
+        with fichier.open('rb') as source:
+            contenu = source.read()
+        empreinte = hashlib.sha256(contenu).hexdigest()[:16]
+        image = Image.open(BytesIO(contenu))
+        image.load()
+        # Appliquer l'orientation EXIF (photos de téléphone), perdue à l'encodage des variantes
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        return image, empreinte
+
+    def ecrire(self, nom, image, format_image, **options):
+        """Encoder et enregistrer une variante, sauf si ce fichier (même empreinte) existe déjà"""
+        if not default_storage.exists(nom):
+            tampon = BytesIO()
+            image.save(tampon, **dict(OPTIONS_FORMATS.get(format_image, {}), **options))
+            default_storage.save(nom, ContentFile(tampon.getvalue()))
+        return nom
+
+    def redimensionner(self, image, largeur):
+        """Réduire à `largeur` pixels en gardant les proportions (jamais agrandir)"""
+        from PIL import Image
+
+        if image.width <= largeur:
+            return image
+        hauteur = max(1, round(image.height * largeur / image.width))
+        return image.resize((largeur, hauteur), Image.LANCZOS)
+
+    def carre(self, image, cote):
+        """Image centrée sur un carré transparent de `cote` pixels (icônes)"""
+        from PIL import Image
+
+        copie = image.convert('RGBA')
+        copie.thumbnail((cote, cote), Image.LANCZOS)
+        fond = Image.new('RGBA', (cote, cote), (0, 0, 0, 0))
+        fond.paste(copie, ((cote - copie.width) // 2, (cote - copie.height) // 2))
+        return fond
+
+    def variantes_logo(self, fichier):
+        """{'source', 'empreinte', 'largeurs', '<format>': {'<largeur>': chemin}}"""
+        image, empreinte = self.ouvrir(fichier)
+        if image is None:
+            return {'source': fichier.name}
+        variantes = {'source': fichier.name, 'empreinte': empreinte, 'largeurs': {}}
+        for largeur in configuration().get('LARGEURS_LOGO', LARGEURS_LOGO):
+            reduite = self.redimensionner(image, largeur)
+            if str(reduite.width) in variantes['largeurs']:
+                continue  # Image d'origine plus petite que les tailles suivantes
+            variantes['largeurs'][str(reduite.width)] = reduite.height
+            for format_image in formats_disponibles():
+                nom = f'site/logo/{empreinte}-{reduite.width}.{format_image}'
+                variantes.setdefault(format_image, {})[str(reduite.width)] = self.ecrire(
+                    nom, reduite, format_image
+                )
+        return variantes
+
+    def variantes_favicon(self, fichier):
+        """{'source', 'empreinte', 'ico': chemin, 'png': {'<cote>': chemin}}"""
+        image, empreinte = self.ouvrir(fichier)
+        if image is None:
+            return {'source': fichier.name}
+        icone = self.carre(image, max(TAILLES_ICO))
+        variantes = {
+            'source': fichier.name,
+            'empreinte': empreinte,
+            'ico': self.ecrire(
+                f'site/favicon/{empreinte}.ico', icone, 'ico',
+                format='ICO', sizes=[(cote, cote) for cote in TAILLES_ICO]
+            ),
+            'png': {},
+        }
+        for cote in TAILLES_ICONES:
+            variantes['png'][str(cote)] = self.ecrire(
+                f'site/favicon/{empreinte}-{cote}.png', self.carre(image, cote), 'png'
+            )
+        return variantes
+
+    def mettre_a_jour(self, parametres):
+        """
+        Recalculer les variantes des images remplacées depuis le dernier calcul
+        (fichiers déjà enregistrés). Retourne (modifié, chemins des anciennes
+        variantes qui ne servent plus).
+        """
+        from PIL import Image
+
+        anciennes = parametres.variantes_images or {}
+        nouvelles = dict(anciennes)
+        for champ, produire in (('logo', self.variantes_logo), ('favicon', self.variantes_favicon)):
+            fichier = getattr(parametres, champ)
+            if not fichier:
+                nouvelles.pop(champ, None)
+            elif (anciennes.get(champ) or {}).get('source') != fichier.name:
+                try:
+                    nouvelles[champ] = produire(fichier)
+                except (OSError, ValueError, Image.DecompressionBombError) as e:
+                    # Image illisible: servie telle quelle, sans variantes
+                    logger.warning(f"Variantes de {champ} impossibles: {e}")
+                    nouvelles[champ] = {'source': fichier.name}
+        if nouvelles == anciennes:
+            return False, set()
+        parametres.variantes_images = nouvelles
+        return True, chemins(anciennes) - chemins(nouvelles)
+
+
+def chemins(variantes):
+    """Tous les chemins de fichiers d'un dictionnaire de variantes"""
+    resultat = set()
+    for cle, valeur in (variantes or {}).items():
+        if isinstance(valeur, dict):
+            resultat |= chemins(valeur)
+        elif isinstance(valeur, str) and cle not in ('source', 'empreinte') and valeur.startswith('site/'):
+            resultat.add(valeur)
+    return resultat
+
+
+# Instance unique du service
+images_site_service = ImagesSiteService()
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('config_site', '0002_sitesettings_font_size_sitesettings_theme'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitesettings',
+            name='variantes_images',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Chemins des versions redimensionnées (WebP, AVIF, PNG, ICO) du logo et du favicon', verbose_name='Variantes des images'),
+        ),
+    ]
@@ -1,5 +1,12 @@
-from django.db import models
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
 from django.core.validators import FileExtensionValidator
+from salon_paiement import cache as cache_versionne
+
+ESPACE_CACHE = 'site_settings'
+memo_parametres = cache_versionne.MemoLocal(getattr(settings, 'SITE_SETTINGS_MEMO_TTL', 30))
+
 
 class SiteSettings(models.Model):
     """Modèle pour stocker les paramètres personnalisés du site"""
@@ -105,6 +112,15 @@ class SiteSettings(models.Model):
         help_text="Description pour les moteurs de recherche"
     )
     
+    # Variantes optimisées du logo et du favicon (voir config_site/images.py)
+    variantes_images = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes des images",
+        help_text="Chemins des versions redimensionnées (WebP, AVIF, PNG, ICO) du logo et du favicon"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
@@ -121,7 +137,38 @@ class SiteSettings(models.Model):
         if not self.pk and SiteSettings.objects.exists():
             # Si c'est une nouvelle création et qu'il existe déjà une instance
             raise ValueError("Il ne peut y avoir qu'une seule instance de SiteSettings")
-        return super().save(*args, **kwargs)
+        resultat = super().save(*args, **kwargs)
+        self.generer_variantes_images()
+        return resultat
+    
+    def generer_variantes_images(self):
+        """Décliner le logo et le favicon nouvellement envoyés (fichiers déjà enregistrés)"""
+        from .images import images_site_service
+        
+        modifie, obsoletes = images_site_service.mettre_a_jour(self)
+        if not modifie:
+            return
+        SiteSettings.objects.filter(pk=self.pk).update(variantes_images=self.variantes_images)
+        self.invalider_cache()
+        if obsoletes:
+            def supprimer_obsoletes():
+                for nom in obsoletes:
+                    default_storage.delete(nom)
+            transaction.on_commit(supprimer_obsoletes)
+    
+    @staticmethod
+    def invalider_cache():
+        """
+        Rendre obsolète l'instance en cache (appelé par les signaux post_save / post_delete).
+        La copie du processus est oubliée tout de suite; la version partagée est
+        incrémentée après validation, pour tous les workers.
+        """
+        memo_parametres.vider()
+        
+        def apres_validation():
+            cache_versionne.invalider(ESPACE_CACHE)
+            memo_parametres.vider()
+        transaction.on_commit(apres_validation)
     
     @classmethod
     def get_settings(cls):
@@ -131,6 +178,16 @@ class SiteSettings(models.Model):
         except cls.DoesNotExist:
             return cls.objects.create()
     
+    @classmethod
+    def get_settings_cache(cls):
+        """
+        Paramètres actuels sans requête en base: copie en mémoire du processus
+        (SITE_SETTINGS_MEMO_TTL secondes), sinon cache partagé (clé versionnée).
+        """
+        return memo_parametres.obtenir(
+            lambda: cache_versionne.obtenir(ESPACE_CACHE, 'instance', calculer=cls.get_settings)
+        )
+    
     def get_logo_url(self):
         """Retourne l'URL du logo ou une valeur par défaut"""
         if self.logo and hasattr(self.logo, 'url'):
@@ -1,3 +1,4 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import SiteSettings
 
@@ -7,6 +8,9 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
     
     logo_url = serializers.SerializerMethodField()
     favicon_url = serializers.SerializerMethodField()
+    logo_src = serializers.SerializerMethodField()
+    logo_srcset = serializers.SerializerMethodField()
+    favicon_variantes = serializers.SerializerMethodField()
     
     class Meta:
         model = SiteSettings
@@ -19,6 +23,9 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
             'logo_url',
             'favicon',
             'favicon_url',
+            'logo_src',
+            'logo_srcset',
+            'favicon_variantes',
             'theme',
             'font_size',
             'primary_color',
@@ -40,6 +47,40 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
             return obj.logo.url
         return None
     
+    def _url_variante(self, chemin):
+        """URL complète d'une variante d'image (noms versionnés: cache immuable)"""
+        url = default_storage.url(chemin)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_logo_src(self, obj):
+        """Logo PNG optimisé de largeur moyenne, pour l'attribut src (navigateurs sans srcset)"""
+        variantes = (obj.variantes_images or {}).get('logo', {}).get('png')
+        if not variantes:
+            return self.get_logo_url(obj)
+        largeur = min(variantes, key=lambda valeur: abs(int(valeur) - 256))
+        return self._url_variante(variantes[largeur])
+    
+    def get_logo_srcset(self, obj):
+        """srcset du logo par format ('avif', 'webp', 'png'), à utiliser dans <picture>"""
+        logo = (obj.variantes_images or {}).get('logo', {})
+        return {
+            format_image: ', '.join(
+                f'{self._url_variante(chemin)} {largeur}w'
+                for largeur, chemin in sorted(logo[format_image].items(), key=lambda element: int(element[0]))
+            )
+            for format_image in ('avif', 'webp', 'png')
+            if logo.get(format_image)
+        }
+    
+    def get_favicon_variantes(self, obj):
+        """Favicon ICO multi-tailles et icônes PNG carrées ('180' pour apple-touch-icon)"""
+        favicon = (obj.variantes_images or {}).get('favicon', {})
+        variantes = {cote: self._url_variante(chemin) for cote, chemin in favicon.get('png', {}).items()}
+        if favicon.get('ico'):
+            variantes['ico'] = self._url_variante(favicon['ico'])
+        return variantes
+    
     def get_favicon_url(self, obj):
         """Retourne l'URL complète du favicon"""
         if obj.favicon and hasattr(obj.favicon, 'url'):
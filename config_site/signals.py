@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import SiteSettings
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def invalider_parametres(sender, **kwargs):
+    """Les paramètres en cache (processus et cache partagé) deviennent obsolètes"""
+    SiteSettings.invalider_cache()
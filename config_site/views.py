@@ -1,11 +1,11 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
-from .models import SiteSettings
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from salon_paiement import cache as cache_versionne
+from .models import SiteSettings, ESPACE_CACHE
 from .serializers import SiteSettingsSerializer, SiteSettingsUpdateSerializer
 
 
@@ -16,18 +16,14 @@ class SiteSettingsViewSet(viewsets.ModelViewSet):
     serializer_class = SiteSettingsSerializer
     permission_classes = [IsAuthenticated]
     
-    def get_queryset(self):
-        """S'assurer qu'il y a toujours une instance de paramètres"""
-        if not SiteSettings.objects.exists():
-            SiteSettings.get_settings()
-        return super().get_queryset()
+    def list(self, request, *args, **kwargs):
+        """S'assurer qu'il y a toujours une instance de paramètres (créée au premier accès)"""
+        SiteSettings.get_settings_cache()
+        return super().list(request, *args, **kwargs)
     
     def get_object(self):
-        """Toujours retourner la première (et unique) instance"""
-        queryset = self.get_queryset()
-        obj = queryset.first()
-        if obj is None:
-            obj = SiteSettings.get_settings()
+        """Toujours retourner l'unique instance (une seule requête)"""
+        obj = SiteSettings.get_settings()
         self.check_object_permissions(self.request, obj)
         return obj
     
@@ -37,40 +33,46 @@ class SiteSettingsViewSet(viewsets.ModelViewSet):
             return SiteSettingsUpdateSerializer
         return SiteSettingsSerializer
     
-    @method_decorator(cache_page(60 * 5))  # Cache de 5 minutes
-    @method_decorator(vary_on_headers('Authorization'))
-    def list(self, request, *args, **kwargs):
-        """Récupérer les paramètres du site (avec cache)"""
-        return super().list(request, *args, **kwargs)
-    
-    @method_decorator(cache_page(60 * 5))
-    @method_decorator(vary_on_headers('Authorization'))
     def retrieve(self, request, *args, **kwargs):
-        """Récupérer les paramètres du site (avec cache)"""
-        return super().retrieve(request, *args, **kwargs)
+        """Récupérer les paramètres du site (depuis le cache partagé)"""
+        instance = SiteSettings.get_settings_cache()
+        self.check_object_permissions(request, instance)
+        return Response(self.get_serializer(instance).data)
     
     def update(self, request, *args, **kwargs):
         """Mettre à jour les paramètres du site"""
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
+        # L'enregistrement invalide la clé versionnée des paramètres (SiteSettings.save)
         self.perform_update(serializer)
         
-        # Invalider le cache après mise à jour
-        from django.core.cache import cache
-        cache.clear()
-        
         # Retourner les données mises à jour avec le serializer complet
         response_serializer = SiteSettingsSerializer(instance)
         return Response(response_serializer.data)
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def public(self, request):
-        """Endpoint public pour récupérer les paramètres du site sans authentification"""
+        """
+        Endpoint public pour récupérer les paramètres du site sans authentification.
+        Servi depuis la mémoire du processus; ETag et Last-Modified (updated_at)
+        permettent au navigateur de revalider et d'obtenir un 304.
+        """
         try:
-            settings = SiteSettings.get_settings()
-            serializer = SiteSettingsSerializer(settings, context={'request': request})
-            return Response(serializer.data)
+            settings = SiteSettings.get_settings_cache()
+            derniere_modification = int(settings.updated_at.timestamp())
+            etag = quote_etag(f'{settings.pk}-{settings.updated_at.timestamp():.6f}')
+            
+            response = get_conditional_response(
+                request, etag=etag, last_modified=derniere_modification
+            )
+            if response is None:
+                serializer = SiteSettingsSerializer(settings, context={'request': request})
+                response = Response(serializer.data)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(derniere_modification)
+            response['Cache-Control'] = 'public, no-cache'
+            return response
         except Exception as e:
             return Response(
                 {'error': 'Erreur lors de la récupération des paramètres', 'detail': str(e)},
@@ -79,9 +81,8 @@ class SiteSettingsViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def clear_cache(self, request):
-        """Vider le cache des paramètres"""
-        from django.core.cache import cache
-        cache.clear()
+        """Vider le cache des paramètres (et seulement celui-ci)"""
+        cache_versionne.invalider(ESPACE_CACHE)
         return Response({'message': 'Cache vidé avec succès'})
     
     @action(detail=False, methods=['get'])
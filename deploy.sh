@@ -497,7 +497,27 @@ EOF
 # Backup quotidien à 2h du matin
 0 2 * * * $SERVICE_USER $PROJECT_PATH/backup.sh
 EOF
-    
+
+    # Expiration des sessions de paiement échues toutes les 5 minutes
+    cat > /etc/cron.d/$PROJECT_NAME-sessions <<EOF
+*/5 * * * * $SERVICE_USER cd $PROJECT_PATH && $VENV_PATH/bin/python manage.py expirer_sessions >> $PROJECT_PATH/logs/expiration_sessions.log 2>&1
+EOF
+
+    # Report en base des scans de QR codes comptés en cache (QR_CODES_SCANS_TAMPON)
+    cat > /etc/cron.d/$PROJECT_NAME-scans <<EOF
+* * * * * $SERVICE_USER cd $PROJECT_PATH && $VENV_PATH/bin/python manage.py vider_compteurs_scans >> $PROJECT_PATH/logs/compteurs_scans.log 2>&1
+EOF
+
+    # Reprise des notifications de paiement en erreur ou interrompues (fournisseur injoignable, worker arrêté)
+    cat > /etc/cron.d/$PROJECT_NAME-notifications <<EOF
+*/10 * * * * $SERVICE_USER cd $PROJECT_PATH && $VENV_PATH/bin/python manage.py traiter_notifications --reprendre-erreurs >> $PROJECT_PATH/logs/notifications.log 2>&1
+EOF
+
+    # Purge quotidienne des QR codes expirés et de leurs images orphelines
+    cat > /etc/cron.d/$PROJECT_NAME-qr-codes <<EOF
+30 3 * * * $SERVICE_USER cd $PROJECT_PATH && $VENV_PATH/bin/python manage.py purger_qr_codes >> $PROJECT_PATH/logs/purge_qr_codes.log 2>&1
+EOF
+
     log_success "Script de backup créé"
 }
 
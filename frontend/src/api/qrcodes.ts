@@ -1,38 +1,32 @@
 import api from './api';
 
+export type TypeQRCode = 'identification' | 'prestation' | 'paiement' | 'recapitulatif';
+
 export interface QRCodeData {
   id: string;
-  reference?: string;
-  type: 'paiement' | 'client' | 'prestation' | 'promotion' | 'session' | 'identification' | 'recapitulatif';
-  titre?: string;
-  description?: string;
-  contenu: string;
-  montant?: number;
-  client_id?: string;
-  prestation_id?: string;
-  date_creation: string;
-  date_expiration?: string;
-  statut: 'genere' | 'scanne' | 'expire' | 'utilise' | 'actif' | 'expiré' | 'utilisé';
-  utilisations?: number;
-  utilisations_max?: number;
+  // Absents de la liste (QRCodeListSerializer), présents dans le détail
+  client?: string;
+  type_qr?: TypeQRCode;
+  contenu?: string;
+  statut?: 'genere' | 'scanne' | 'expire' | 'utilise';
+  date_generation: string;
+  date_scan?: string | null;
+  date_expiration?: string | null;
   client_nom_complet?: string;
-  type_qrcode_display?: string;
+  type_qr_display?: string;
   statut_display?: string;
-  est_expire?: boolean;
   est_valide?: boolean;
   nombre_scans?: number;
   image_qr?: string;
+  url_image?: string;
+  empreinte?: string;
 }
 
 export interface QRCodeCreateData {
-  client_id?: string;
-  type_qrcode: 'identification' | 'prestation' | 'paiement' | 'recapitulatif';
+  client: string;
+  type_qr: TypeQRCode;
   contenu: string;
   date_expiration?: string;
-  titre?: string;
-  description?: string;
-  montant?: number;
-  prestation_id?: string;
 }
 
 export const qrcodesApi = {
@@ -99,7 +93,7 @@ export const qrcodesApi = {
   // Générer un QR code pour un client spécifique
   generateForClient: async (data: {
     client_id: string;
-    type_qrcode: 'identification' | 'prestation' | 'paiement' | 'recapitulatif';
+    type_qr: TypeQRCode;
     contenu?: string;
     date_expiration?: string;
   }): Promise<QRCodeData> => {
@@ -145,8 +139,8 @@ export const qrcodesApi = {
     }
   },
 
-  // Nettoyer les QR codes expirés
-  cleanupExpiredQRCodes: async (): Promise<{ cleaned: number }> => {
+  // Nettoyer les QR codes expirés (purge lancée en arrière-plan, réponse 202)
+  cleanupExpiredQRCodes: async (): Promise<{ message: string }> => {
     try {
       const response = await api.post('/qr-codes/nettoyer_expires/');
       return response.data;
@@ -14,6 +14,9 @@ export interface SiteSettingsData {
   meta_description: string;
   logo_url?: string;
   favicon_url?: string;
+  logo_src?: string;
+  logo_srcset?: { avif?: string; webp?: string; png?: string };
+  favicon_variantes?: { ico?: string; [cote: string]: string | undefined };
   created_at?: string;
   updated_at?: string;
 }
@@ -212,6 +212,16 @@ clear_cache() {
     log_success "Cache nettoyé"
 }
 
+archive_sessions() {
+    log_info "Archivage des sessions de paiement anciennes..."
+    
+    cd ${PROJECT_PATH}
+    
+    # Sessions plus anciennes que ARCHIVAGE_SESSIONS_AGE_JOURS (90 jours par défaut)
+    sudo -u ${SERVICE_USER} ${VENV_PATH}/bin/python manage.py archiver_sessions
+    log_success "Sessions anciennes archivées"
+}
+
 cleanup_logs() {
     log_info "Nettoyage des logs..."
     
@@ -374,6 +384,7 @@ main() {
     run_migrations
     collect_static_files
     clear_cache
+    archive_sessions
     cleanup_logs
     cleanup_temp_files
     optimize_database
@@ -409,6 +420,9 @@ case "${1:-}" in
         cleanup_temp_files
         optimize_database
         ;;
+    "archive")
+        archive_sessions
+        ;;
     "security")
         check_security_updates
         ;;
@@ -425,6 +439,7 @@ case "${1:-}" in
         echo "  health      Vérifier la santé du système et des services"
         echo "  update      Mettre à jour l'application et redémarrer"
         echo "  cleanup     Nettoyer les caches, logs et fichiers temporaires"
+        echo "  archive     Archiver les sessions de paiement anciennes"
         echo "  security    Vérifier les mises à jour de sécurité"
         echo "  report      Générer un rapport de santé complet"
         echo "  restart     Redémarrer les services"
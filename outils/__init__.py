@@ -0,0 +1,3 @@
+"""
+Outils de développement: passerelle de paiement simulée et tests de charge
+"""
@@ -0,0 +1,207 @@
+"""
+Test de charge du parcours de paiement client
+
+Chaque session virtuelle enchaîne le parcours complet de l'API, comme le
+frontend après un scan de QR code:
+
+    demarrer_session -> identifier_client -> selectionner_prestation
+    -> initier_paiement -> etat_paiement (jusqu'à l'URL de paiement)
+    -> recapitulatif (jusqu'au statut final, après l'IPN)
+
+Les durées de chaque appel sont relevées par étape, ainsi que les deux attentes
+vues par le client (URL de paiement, confirmation); le rapport donne p50, p95,
+p99 et max par étape.
+
+À lancer contre une instance qui pointe vers la passerelle simulée
+(outils/passerelle_simulee.py), avec un worker de notifications actif:
+
+    CINETPAY_URL_API=http://localhost:8900 PAIEMENTS_URL_API=http://localhost:8000 ...
+    python -m outils.charge_parcours --url http://localhost:8000/api --sessions 500 --concurrence 50
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+ETAPES = [
+    'demarrer_session',
+    'identifier_client',
+    'selectionner_prestation',
+    'initier_paiement',
+    'etat_paiement',
+    'recapitulatif',
+    'attente_url_paiement',
+    'attente_confirmation',
+    'parcours_complet',
+]
+STATUTS_FINAUX = ('reussi', 'echoue', 'annule', 'rembourse')
+
+
+class EchecEtape(Exception):
+    def __init__(self, etape, message):
+        super().__init__(message)
+        self.etape = etape
+
+
+class Mesures:
+    """Durées par étape, partagées entre les sessions virtuelles"""
+
+    def __init__(self):
+        self.durees = {etape: [] for etape in ETAPES}
+        self.erreurs = {}
+        self.resultats = {}
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, etape, duree):
+        with self._verrou:
+            self.durees[etape].append(duree)
+
+    def erreur(self, etape, message):
+        with self._verrou:
+            self.erreurs.setdefault(etape, {})
+            self.erreurs[etape][message] = self.erreurs[etape].get(message, 0) + 1
+
+    def resultat(self, statut):
+        with self._verrou:
+            self.resultats[statut] = self.resultats.get(statut, 0) + 1
+
+    @staticmethod
+    def centile(durees, centile):
+        return durees[min(len(durees) - 1, int(len(durees) * centile / 100))]
+
+    def rapport(self, duree_totale, sessions):
+        lignes = [
+            f"{'étape':<26}{'n':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        ]
+        for etape in ETAPES:
+            durees = sorted(self.durees[etape])
+            erreurs = sum(self.erreurs.get(etape, {}).values())
+            if not durees:
+                lignes.append(f"{etape:<26}{0:>7}{erreurs:>6}")
+                continue
+            valeurs = [self.centile(durees, c) * 1000 for c in (50, 95, 99)] + [durees[-1] * 1000]
+            lignes.append(
+                f"{etape:<26}{len(durees):>7}{erreurs:>6}" + ''.join(f'{valeur:>10.0f}' for valeur in valeurs)
+            )
+        lignes.append('')
+        lignes.append(
+            f"{sessions} sessions en {duree_totale:.1f} s "
+            f"({sessions / duree_totale:.1f} sessions/s), résultats: {self.resultats}"
+        )
+        for etape, messages in self.erreurs.items():
+            for message, nombre in sorted(messages.items(), key=lambda element: -element[1])[:5]:
+                lignes.append(f"  {etape}: {nombre} x {message}")
+        return '\n'.join(lignes)
+
+
+class SessionVirtuelle:
+    """Un client qui parcourt le tunnel de paiement"""
+
+    def __init__(self, options, mesures):
+        self.options = options
+        self.mesures = mesures
+        self.http = requests.Session()
+        self.base = options.url.rstrip('/') + '/sessions-paiement'
+
+    def appeler(self, etape, methode, url, attendus=(200,), **kwargs):
+        debut = time.monotonic()
+        try:
+            reponse = self.http.request(methode, url, timeout=self.options.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise EchecEtape(etape, type(e).__name__)
+        finally:
+            self.mesures.enregistrer(etape, time.monotonic() - debut)
+        if reponse.status_code not in attendus:
+            raise EchecEtape(etape, f'HTTP {reponse.status_code}')
+        return reponse.json()
+
+    def attendre(self, etape, url, condition):
+        """Interroger `url` jusqu'à ce que `condition(reponse)` soit vraie"""
+        limite = time.monotonic() + self.options.attente_max
+        while True:
+            donnees = self.appeler(etape, 'GET', url)
+            if condition(donnees):
+                return donnees
+            if time.monotonic() > limite:
+                raise EchecEtape(etape, 'délai dépassé')
+            time.sleep(self.options.intervalle)
+
+    def parcourir(self):
+        debut = time.monotonic()
+        session = self.appeler('demarrer_session', 'POST', f'{self.base}/demarrer_session/', attendus=(201,))
+        url_session = f"{self.base}/{session['session_id']}"
+
+        self.appeler('identifier_client', 'POST', f'{url_session}/identifier_client/', json={
+            'telephone': '+22507' + ''.join(random.choices('0123456789', k=8)),
+            'client': {'nom': 'Charge', 'prenom': 'Test', 'sexe': random.choice('MF')},
+        })
+        self.appeler('selectionner_prestation', 'POST', f'{url_session}/selectionner_prestation/', json={
+            'prestation_id': self.options.prestation,
+        })
+
+        debut_paiement = time.monotonic()
+        self.appeler('initier_paiement', 'POST', f'{url_session}/initier_paiement/', attendus=(200, 202), json={
+            'moyen_paiement': 'mobile_money',
+            'operateur_mobile': random.choice(['wave', 'orange', 'mtn', 'moov']),
+        })
+        etat = self.attendre('etat_paiement', f'{url_session}/etat_paiement/',
+                             lambda donnees: donnees.get('etat') != 'en_file')
+        self.mesures.enregistrer('attente_url_paiement', time.monotonic() - debut_paiement)
+        if etat['etat'] != 'initie':
+            raise EchecEtape('etat_paiement', etat.get('error') or etat['etat'])
+
+        debut_confirmation = time.monotonic()
+        recapitulatif = self.attendre(
+            'recapitulatif', f'{url_session}/recapitulatif/',
+            lambda donnees: (donnees.get('paiement') or {}).get('statut') in STATUTS_FINAUX
+        )
+        self.mesures.enregistrer('attente_confirmation', time.monotonic() - debut_confirmation)
+        self.mesures.enregistrer('parcours_complet', time.monotonic() - debut)
+        return recapitulatif['paiement']['statut']
+
+    def executer(self):
+        try:
+            self.mesures.resultat(self.parcourir())
+        except EchecEtape as e:
+            self.mesures.erreur(e.etape, str(e))
+            self.mesures.resultat('echec_parcours')
+        finally:
+            self.http.close()
+
+
+def premiere_prestation(url):
+    reponse = requests.get(url.rstrip('/') + '/prestations/', timeout=10)
+    reponse.raise_for_status()
+    donnees = reponse.json()
+    prestations = donnees.get('results', donnees) if isinstance(donnees, dict) else donnees
+    if not prestations:
+        raise SystemExit("Aucune prestation disponible: en créer une ou passer --prestation")
+    return prestations[0]['id']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test de charge du parcours de paiement')
+    parser.add_argument('--url', default='http://localhost:8000/api', help="Racine de l'API")
+    parser.add_argument('--sessions', type=int, default=100, help='Nombre de parcours complets')
+    parser.add_argument('--concurrence', type=int, default=20, help='Sessions menées en parallèle')
+    parser.add_argument('--prestation', help='ID de la prestation (défaut: la première de la liste)')
+    parser.add_argument('--intervalle', type=float, default=0.5, help='Intervalle de suivi en secondes')
+    parser.add_argument('--attente-max', type=float, default=60, help='Attente maximale par suivi en secondes')
+    parser.add_argument('--timeout', type=float, default=30, help="Timeout d'un appel en secondes")
+    options = parser.parse_args()
+
+    if not options.prestation:
+        options.prestation = premiere_prestation(options.url)
+
+    mesures = Mesures()
+    debut = time.monotonic()
+    with ThreadPoolExecutor(max_workers=options.concurrence) as executeur:
+        for _ in range(options.sessions):
+            executeur.submit(SessionVirtuelle(options, mesures).executer)
+    print(mesures.rapport(time.monotonic() - debut, options.sessions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Passerelle CinetPay simulée (application ASGI)
+
+Implémente le contrat utilisé par l'adaptateur CinetPay, pour exercer le
+parcours de paiement en local et sous charge sans passer par le bac à sable:
+
+    POST /v2/payment         initialisation (code '201', payment_url, payment_token)
+    POST /v2/payment/check   vérification (data.status: ACCEPTED, REFUSED, WAITING_FOR_CUSTOMER)
+    GET  /payer/<token>      page de paiement (simple réponse JSON)
+    GET  /metriques          compteurs de la passerelle
+
+Après chaque initialisation réussie, le « client » paie au bout de DELAI_IPN_MS
+et la passerelle envoie l'IPN (cpm_site_id, cpm_trans_id) à la notify_url reçue.
+
+Lancement (uvicorn n'est utile qu'à cet outil):
+
+    pip install uvicorn
+    PASSERELLE_LATENCE_MS=150 PASSERELLE_TAUX_ERREUR=0.02 \\
+        uvicorn outils.passerelle_simulee:app --port 8900
+
+puis côté Django: CINETPAY_URL_API=http://localhost:8900
+
+Réglages (variables d'environnement):
+    PASSERELLE_LATENCE_MS     latence moyenne de chaque réponse (défaut 100)
+    PASSERELLE_GIGUE_MS       écart maximal autour de la latence (défaut 50)
+    PASSERELLE_TAUX_ERREUR    part des appels répondant 500 (défaut 0)
+    PASSERELLE_TAUX_LENTEUR   part des appels anormalement lents (défaut 0)
+    PASSERELLE_LENTEUR_MS     durée d'un appel lent (défaut 25000, au-delà du timeout client)
+    PASSERELLE_TAUX_REFUS     part des paiements refusés (défaut 0.1)
+    PASSERELLE_DELAI_IPN_MS   délai entre l'initialisation et l'IPN (défaut 2000)
+    PASSERELLE_TAUX_IPN_PERDU part des IPN jamais envoyées (défaut 0, voir reconcilier_paiements)
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+logger = logging.getLogger('passerelle_simulee')
+
+
+def _reglage(nom, defaut):
+    return float(os.getenv(f'PASSERELLE_{nom}', defaut))
+
+
+CONFIGURATION = {
+    'LATENCE_MS': _reglage('LATENCE_MS', 100),
+    'GIGUE_MS': _reglage('GIGUE_MS', 50),
+    'TAUX_ERREUR': _reglage('TAUX_ERREUR', 0),
+    'TAUX_LENTEUR': _reglage('TAUX_LENTEUR', 0),
+    'LENTEUR_MS': _reglage('LENTEUR_MS', 25000),
+    'TAUX_REFUS': _reglage('TAUX_REFUS', 0.1),
+    'DELAI_IPN_MS': _reglage('DELAI_IPN_MS', 2000),
+    'TAUX_IPN_PERDU': _reglage('TAUX_IPN_PERDU', 0),
+}
+
+
+class PasserelleSimulee:
+    """Transactions en mémoire et réponses au format CinetPay"""
+
+    def __init__(self, configuration=None):
+        self.configuration = dict(CONFIGURATION, **(configuration or {}))
+        self.transactions = {}
+        self.compteurs = {}
+        self._taches = set()
+
+    # --- ASGI ---
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._cycle_de_vie(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        corps = await self._lire_corps(receive)
+        methode, chemin = scope['method'], scope['path'].rstrip('/')
+        self._compter(f'{methode} {chemin}')
+
+        if methode == 'GET' and chemin == '/metriques':
+            await self._repondre(send, 200, self.metriques())
+            return
+
+        await self._simuler_latence()
+        if random.random() < self.configuration['TAUX_ERREUR']:
+            self._compter('erreurs_500')
+            await self._repondre(send, 500, {'code': '500', 'message': 'INTERNAL_ERROR'})
+            return
+
+        donnees = self._analyser(scope, corps)
+        if methode == 'POST' and chemin == '/v2/payment':
+            statut, reponse = self.initialiser(donnees, self._base(scope))
+        elif methode == 'POST' and chemin == '/v2/payment/check':
+            statut, reponse = self.verifier(donnees)
+        elif methode == 'GET' and chemin.startswith('/payer/'):
+            statut, reponse = 200, {'message': 'Page de paiement simulée', 'token': chemin.rsplit('/', 1)[-1]}
+        else:
+            statut, reponse = 404, {'code': '404', 'message': 'NOT_FOUND'}
+        await self._repondre(send, statut, reponse)
+
+    async def _cycle_de_vie(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _lire_corps(receive):
+        corps = b''
+        while True:
+            message = await receive()
+            corps += message.get('body', b'')
+            if not message.get('more_body'):
+                return corps
+
+    @staticmethod
+    def _analyser(scope, corps):
+        entetes = dict(scope.get('headers') or [])
+        if b'application/x-www-form-urlencoded' in entetes.get(b'content-type', b''):
+            return {cle: valeurs[0] for cle, valeurs in urllib.parse.parse_qs(corps.decode()).items()}
+        try:
+            return json.loads(corps or b'{}')
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def _base(scope):
+        entetes = dict(scope.get('headers') or [])
+        hote = entetes.get(b'host', b'localhost').decode()
+        return f"{scope.get('scheme', 'http')}://{hote}"
+
+    @staticmethod
+    async def _repondre(send, statut, donnees):
+        corps = json.dumps(donnees).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': statut,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(corps)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': corps})
+
+    async def _simuler_latence(self):
+        if random.random() < self.configuration['TAUX_LENTEUR']:
+            self._compter('appels_lents')
+            latence = self.configuration['LENTEUR_MS']
+        else:
+            gigue = self.configuration['GIGUE_MS']
+            latence = max(0, self.configuration['LATENCE_MS'] + random.uniform(-gigue, gigue))
+        await asyncio.sleep(latence / 1000)
+
+    # --- Contrat CinetPay ---
+
+    def initialiser(self, donnees, base):
+        manquants = [cle for cle in ('apikey', 'site_id', 'transaction_id', 'amount') if not donnees.get(cle)]
+        if manquants:
+            return 200, {'code': '608', 'message': 'MINIMUM_REQUIRED_FIELDS', 'description': ', '.join(manquants)}
+
+        id_transaction = str(donnees['transaction_id'])
+        if id_transaction in self.transactions:
+            return 200, {'code': '609', 'message': 'TRANSACTION_ID_ALREADY_EXISTS'}
+
+        jeton = uuid.uuid4().hex
+        self.transactions[id_transaction] = {
+            'statut': 'WAITING_FOR_CUSTOMER',
+            'montant': donnees['amount'],
+            'site_id': donnees['site_id'],
+            'jeton': jeton,
+            'cree_le': time.time(),
+        }
+        self._planifier_paiement(id_transaction, donnees.get('notify_url'))
+        return 200, {
+            'code': '201',
+            'message': 'CREATED',
+            'data': {'payment_token': jeton, 'payment_url': f'{base}/payer/{jeton}'},
+        }
+
+    def verifier(self, donnees):
+        transaction = self.transactions.get(str(donnees.get('transaction_id')))
+        if transaction is None:
+            return 200, {'code': '627', 'message': 'TRANSACTION_NOT_FOUND', 'data': {}}
+        codes = {'ACCEPTED': '00', 'REFUSED': '600', 'WAITING_FOR_CUSTOMER': '662'}
+        return 200, {
+            'code': codes[transaction['statut']],
+            'message': transaction['statut'],
+            'data': {'status': transaction['statut'], 'amount': transaction['montant'], 'currency': 'XOF'},
+        }
+
+    def _planifier_paiement(self, id_transaction, notify_url):
+        tache = asyncio.ensure_future(self._payer(id_transaction, notify_url))
+        self._taches.add(tache)
+        tache.add_done_callback(self._taches.discard)
+
+    async def _payer(self, id_transaction, notify_url):
+        """Le client règle (ou se voit refuser) le paiement, puis l'IPN part vers le marchand"""
+        await asyncio.sleep(self.configuration['DELAI_IPN_MS'] / 1000)
+        transaction = self.transactions[id_transaction]
+        refuse = random.random() < self.configuration['TAUX_REFUS']
+        transaction['statut'] = 'REFUSED' if refuse else 'ACCEPTED'
+        self._compter('paiements_refuses' if refuse else 'paiements_acceptes')
+
+        if not notify_url or random.random() < self.configuration['TAUX_IPN_PERDU']:
+            self._compter('ipn_perdues')
+            return
+        corps = urllib.parse.urlencode({
+            'cpm_site_id': transaction['site_id'],
+            'cpm_trans_id': id_transaction,
+        }).encode()
+        loop = asyncio.get_event_loop()
+        try:
+            statut = await loop.run_in_executor(None, self._envoyer_ipn, notify_url, corps)
+            self._compter(f'ipn_{statut}')
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"IPN {id_transaction} non délivrée: {e}")
+            self._compter('ipn_echecs')
+
+    @staticmethod
+    def _envoyer_ipn(url, corps):
+        requete = urllib.request.Request(
+            url, data=corps, method='POST',
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+        try:
+            with urllib.request.urlopen(requete, timeout=10) as reponse:
+                return reponse.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    # --- Métriques ---
+
+    def _compter(self, cle):
+        self.compteurs[cle] = self.compteurs.get(cle, 0) + 1
+
+    def metriques(self):
+        par_statut = {}
+        for transaction in self.transactions.values():
+            par_statut[transaction['statut']] = par_statut.get(transaction['statut'], 0) + 1
+        return {
+            'configuration': self.configuration,
+            'compteurs': self.compteurs,
+            'transactions': par_statut,
+            'ipn_en_attente': len(self._taches),
+        }
+
+
+app = PasserelleSimulee()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Passerelle CinetPay simulée')
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    arguments = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn est requis pour lancer la passerelle simulée: pip install uvicorn")
+    uvicorn.run(app, host=arguments.hote, port=arguments.port, log_level='warning')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Paiement, TransactionExterne
+from .models import Paiement, TransactionExterne, StatistiqueJournaliere, NotificationEntrante
 
 
 @admin.register(Paiement)
@@ -51,3 +51,33 @@ class TransactionExterneAdmin(admin.ModelAdmin):
     )
     ordering = ['-date_creation']
     list_per_page = 25
+
+
+@admin.register(StatistiqueJournaliere)
+class StatistiqueJournaliereAdmin(admin.ModelAdmin):
+    list_display = ['jour', 'statut', 'moyen_paiement', 'operateur_mobile', 'nombre', 'montant_total']
+    list_filter = ['statut', 'moyen_paiement', 'operateur_mobile', 'jour']
+    readonly_fields = ['jour', 'statut', 'moyen_paiement', 'operateur_mobile', 'nombre', 'montant_total']
+    ordering = ['-jour']
+    list_per_page = 50
+    
+    def has_add_permission(self, request):
+        # Les agrégats sont maintenus automatiquement
+        return False
+
+
+@admin.register(NotificationEntrante)
+class NotificationEntranteAdmin(admin.ModelAdmin):
+    list_display = ['date_reception', 'fournisseur', 'id_transaction', 'statut_externe', 'etat', 'date_traitement']
+    list_filter = ['fournisseur', 'etat', 'date_reception']
+    search_fields = ['id_transaction']
+    readonly_fields = [
+        'id', 'fournisseur', 'id_transaction', 'statut_externe', 'donnees',
+        'etat', 'message', 'date_reception', 'date_traitement'
+    ]
+    ordering = ['-date_reception']
+    list_per_page = 50
+    
+    def has_add_permission(self, request):
+        # Les notifications ne proviennent que des fournisseurs
+        return False
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PaiementsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'paiements'
+    
+    def ready(self):
+        # Identifiants des fournisseurs lus une seule fois; adaptateurs chargés à la première utilisation
+        from django.conf import settings
+        from .services import fournisseurs
+        fournisseurs.configurer(getattr(settings, 'PASSERELLES_PAIEMENT', {}))
@@ -0,0 +1,166 @@
+import json
+import random
+import time
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+from clients.models import Client
+from prestations.models import Prestation
+from paiements.models import Paiement
+from paiements.views import PaiementViewSet
+from paiements.services.statistiques_service import statistiques_service
+
+PREFIXE_REFERENCE = 'BENCH-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Insérer un grand volume de paiements de test puis vérifier que les requêtes "
+        "de la liste des paiements utilisent un index (MySQL uniquement)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nombre', type=int, default=1_000_000, help="Nombre de paiements à insérer")
+        parser.add_argument('--lot', type=int, default=5000, help="Taille des lots d'insertion")
+        parser.add_argument('--jours', type=int, default=730, help="Étendue de l'historique généré en jours")
+        parser.add_argument(
+            '--conserver',
+            action='store_true',
+            help="Conserver les données générées (les statistiques journalières sont alors reconstruites)"
+        )
+        parser.add_argument(
+            '--sans-insertion',
+            action='store_true',
+            help="Ne pas insérer de données, analyser uniquement les plans de requête"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError("Ce benchmark nécessite la base MySQL de production")
+
+        if not options['sans_insertion']:
+            self.inserer(options['nombre'], options['lot'], options['jours'])
+
+        try:
+            echecs = self.analyser_plans()
+        finally:
+            if not options['sans_insertion']:
+                if options['conserver']:
+                    statistiques_service.reconstruire()
+                else:
+                    self.nettoyer()
+
+        if echecs:
+            raise CommandError(f"{echecs} requête(s) de liste n'utilisent pas d'index")
+        self.stdout.write(self.style.SUCCESS("Toutes les requêtes de liste utilisent un index"))
+
+    def inserer(self, nombre, taille_lot, jours):
+        """Insérer les paiements de test par lots avec bulk_create"""
+        clients = list(Client.objects.values_list('id', flat=True)[:500])
+        prestations = list(Prestation.objects.values_list('id', flat=True)[:50])
+        if not clients or not prestations:
+            raise CommandError("Il faut au moins un client et une prestation en base")
+
+        statuts = [choix[0] for choix in Paiement.STATUT_PAIEMENT_CHOICES]
+        operateurs = [choix[0] for choix in Paiement.OPERATEUR_MOBILE_CHOICES]
+        moyens = [choix[0] for choix in Paiement.MOYEN_PAIEMENT_CHOICES]
+        maintenant = timezone.now()
+        debut = time.monotonic()
+
+        # date_paiement est en auto_now_add: le désactiver le temps de répartir l'historique
+        champ_date = Paiement._meta.get_field('date_paiement')
+        champ_date.auto_now_add = False
+        try:
+            for offset in range(0, nombre, taille_lot):
+                lot = []
+                for _ in range(min(taille_lot, nombre - offset)):
+                    moyen = random.choice(moyens)
+                    lot.append(Paiement(
+                        id=uuid.uuid4(),
+                        client_id=random.choice(clients),
+                        prestation_id=random.choice(prestations),
+                        montant=random.randint(1, 100) * 1000,
+                        moyen_paiement=moyen,
+                        operateur_mobile=random.choice(operateurs) if moyen == 'mobile_money' else None,
+                        statut=random.choice(statuts),
+                        reference_paiement=f"{PREFIXE_REFERENCE}{offset}",
+                        date_paiement=maintenant - timedelta(seconds=random.randint(0, jours * 86400)),
+                    ))
+                Paiement.objects.bulk_create(lot)
+                self.stdout.write(f"  {offset + len(lot)}/{nombre} paiements insérés")
+        finally:
+            champ_date.auto_now_add = True
+
+        duree = time.monotonic() - debut
+        self.stdout.write(f"Insertion terminée en {duree:.1f}s ({nombre / max(duree, 0.001):.0f} lignes/s)")
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE TABLE {Paiement._meta.db_table}")
+
+    def analyser_plans(self):
+        """Vérifier le plan d'exécution de la requête de liste pour chaque combinaison de filtres"""
+        client_id = Client.objects.values_list('id', flat=True).first()
+        aujourd_hui = timezone.localdate()
+        scenarios = {
+            'sans filtre': {},
+            'statut': {'statut': 'reussi'},
+            'moyen de paiement': {'moyen_paiement': 'mobile_money'},
+            'client': {'client': str(client_id)},
+            'période': {
+                'date_debut': (aujourd_hui - timedelta(days=7)).isoformat(),
+                'date_fin': aujourd_hui.isoformat()
+            },
+            'statut et période': {
+                'statut': 'reussi',
+                'date_debut': (aujourd_hui - timedelta(days=30)).isoformat(),
+                'date_fin': aujourd_hui.isoformat()
+            },
+        }
+
+        echecs = 0
+        factory = RequestFactory()
+        for nom, parametres in scenarios.items():
+            vue = PaiementViewSet()
+            vue.request = Request(factory.get('/api/paiements/', parametres))
+            vue.action = 'list'
+            queryset = vue.get_queryset()[:20]
+
+            debut = time.monotonic()
+            list(queryset)
+            duree_ms = (time.monotonic() - debut) * 1000
+
+            plan = json.loads(queryset.explain(format='json'))
+            acces = self._acces_table(plan, Paiement._meta.db_table)
+            utilise_index = acces is not None and acces.get('key') and acces.get('access_type') != 'ALL'
+            if not utilise_index:
+                echecs += 1
+            style = self.style.SUCCESS if utilise_index else self.style.ERROR
+            self.stdout.write(style(
+                f"{nom}: index={acces.get('key') if acces else None} "
+                f"accès={acces.get('access_type') if acces else None} durée={duree_ms:.1f}ms"
+            ))
+        return echecs
+
+    def nettoyer(self):
+        """Supprimer les paiements de test"""
+        supprimes, _ = Paiement.objects.filter(reference_paiement__startswith=PREFIXE_REFERENCE).delete()
+        self.stdout.write(f"{supprimes} paiements de test supprimés")
+
+    def _acces_table(self, noeud, table):
+        """Rechercher l'accès à une table dans un plan EXPLAIN FORMAT=JSON"""
+        if isinstance(noeud, dict):
+            if noeud.get('table_name') == table:
+                return noeud
+            enfants = noeud.values()
+        elif isinstance(noeud, list):
+            enfants = noeud
+        else:
+            return None
+        for enfant in enfants:
+            trouve = self._acces_table(enfant, table)
+            if trouve is not None:
+                return trouve
+        return None
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from paiements.services.reconciliation_service import reconciliation_service
+
+
+class Command(BaseCommand):
+    help = "Vérifier auprès des fournisseurs les paiements restés en cours et appliquer leur statut final"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--age', type=int, default=30, help="Âge minimal en minutes des paiements à vérifier")
+        parser.add_argument('--limite', type=int, help="Nombre maximal de paiements vérifiés")
+        parser.add_argument('--workers', type=int, default=8, help="Nombre d'appels simultanés aux fournisseurs")
+        parser.add_argument('--debit', type=float, default=5, help="Nombre maximal d'appels par seconde")
+        parser.add_argument(
+            '--simulation',
+            action='store_true',
+            help="Interroger les fournisseurs sans modifier les paiements"
+        )
+
+    def handle(self, *args, **options):
+        bilan = reconciliation_service.reconcilier(
+            age_minutes=options['age'],
+            limite=options['limite'],
+            workers=options['workers'],
+            par_seconde=options['debit'],
+            simulation=options['simulation']
+        )
+
+        self.stdout.write(f"Paiements en cours vérifiés: {bilan['selectionnes']}")
+        for statut, nombre in sorted(bilan['par_statut'].items()):
+            self.stdout.write(f"  -> {statut}: {nombre}")
+        self.stdout.write(f"  toujours en cours: {bilan['inchanges']}")
+        for paiement_id, erreur in bilan['erreurs']:
+            self.stdout.write(self.style.WARNING(f"  erreur {paiement_id}: {erreur}"))
+
+        verbe = "à mettre à jour" if options['simulation'] else "mis à jour"
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(bilan['par_statut'].values())} paiement(s) {verbe}, "
+            f"{len(bilan['erreurs'])} erreur(s), {bilan['duree']:.1f} s"
+        ))
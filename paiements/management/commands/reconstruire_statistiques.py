@@ -0,0 +1,26 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from paiements.services.statistiques_service import statistiques_service
+
+
+class Command(BaseCommand):
+    help = "Reconstruire la table des statistiques journalières de paiement"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depuis',
+            help="Ne recalculer qu'à partir de cette date (AAAA-MM-JJ)"
+        )
+
+    def handle(self, *args, **options):
+        depuis = options.get('depuis')
+        if depuis:
+            try:
+                depuis = date.fromisoformat(depuis)
+            except ValueError:
+                raise CommandError("La date doit être au format AAAA-MM-JJ")
+
+        nombre = statistiques_service.reconstruire(depuis=depuis)
+        self.stdout.write(self.style.SUCCESS(
+            f"{nombre} lignes de statistiques journalières reconstruites"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from paiements.services.webhook_service import webhook_service
+
+
+class Command(BaseCommand):
+    help = "Appliquer aux paiements les notifications des fournisseurs en attente de traitement"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=100, help="Nombre de notifications par transaction")
+        parser.add_argument(
+            '--reprendre-erreurs',
+            action='store_true',
+            help="Retraiter aussi les notifications en erreur ou dont le traitement a été interrompu"
+        )
+
+    def handle(self, *args, **options):
+        if options['reprendre_erreurs']:
+            nombre = webhook_service.reprendre_erreurs()
+            self.stdout.write(f"{nombre} notification(s) en erreur remise(s) en file")
+
+        bilan = webhook_service.traiter(taille_lot=options['lot'])
+        for etat, nombre in sorted(bilan.items()):
+            self.stdout.write(f"  {etat}: {nombre}")
+        self.stdout.write(self.style.SUCCESS(f"{sum(bilan.values())} notification(s) traitée(s)"))
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+def reconstruire_statistiques(apps, schema_editor):
+    """Initialiser les agrégats à partir des paiements existants"""
+    from django.utils import timezone
+
+    Paiement = apps.get_model('paiements', 'Paiement')
+    StatistiqueJournaliere = apps.get_model('paiements', 'StatistiqueJournaliere')
+
+    # Jour calculé en Python: TruncDate produirait un CONVERT_TZ, NULL sur un
+    # serveur MySQL sans tables de fuseaux horaires
+    totaux = {}
+    valeurs = Paiement.objects.values_list(
+        'date_paiement', 'statut', 'moyen_paiement', 'operateur_mobile', 'montant'
+    ).order_by()
+    for date_paiement, statut, moyen_paiement, operateur_mobile, montant in valeurs.iterator(chunk_size=2000):
+        if date_paiement is None:
+            continue
+        if timezone.is_naive(date_paiement):
+            date_paiement = timezone.make_aware(date_paiement)
+        cle = (timezone.localdate(date_paiement), statut, moyen_paiement, operateur_mobile or '')
+        nombre, montant_total = totaux.get(cle, (0, 0))
+        totaux[cle] = (nombre + 1, montant_total + (montant or 0))
+
+    StatistiqueJournaliere.objects.bulk_create(
+        [
+            StatistiqueJournaliere(
+                jour=jour,
+                statut=statut,
+                moyen_paiement=moyen_paiement,
+                operateur_mobile=operateur_mobile,
+                nombre=nombre,
+                montant_total=montant_total
+            )
+            for (jour, statut, moyen_paiement, operateur_mobile), (nombre, montant_total) in totaux.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueJournaliere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('reussi', 'Réussi'), ('echoue', 'Échoué'), ('annule', 'Annulé')], max_length=20)),
+                ('moyen_paiement', models.CharField(choices=[('mobile_money', 'Mobile Money'), ('carte_bancaire', 'Carte Bancaire'), ('carte_prepayee', 'Carte Prépayée'), ('espece', 'Espèce')], max_length=20)),
+                ('operateur_mobile', models.CharField(blank=True, default='', help_text='Vide si aucun opérateur mobile', max_length=20)),
+                ('nombre', models.IntegerField(default=0, help_text='Nombre de paiements')),
+                ('montant_total', models.BigIntegerField(default=0, help_text='Somme des montants en FCFA')),
+            ],
+            options={
+                'verbose_name': 'Statistique Journalière',
+                'verbose_name_plural': 'Statistiques Journalières',
+                'db_table': 'paiements_statistiques_journalieres',
+                'ordering': ['-jour'],
+                'unique_together': {('jour', 'statut', 'moyen_paiement', 'operateur_mobile')},
+            },
+        ),
+        migrations.RunPython(reconstruire_statistiques, migrations.RunPython.noop),
+    ]
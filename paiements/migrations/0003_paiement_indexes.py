@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_clientfeedback'),
+        ('paiements', '0002_statistiquejournaliere'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['-date_paiement'], name='paiements_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['statut', '-date_paiement'], name='paiements_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['moyen_paiement', '-date_paiement'], name='paiements_moyen_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['client', '-date_paiement'], name='paiements_client_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0003_paiement_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paiement',
+            name='reference_paiement',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
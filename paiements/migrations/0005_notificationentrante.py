@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 14:20
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0004_paiement_reference_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEntrante',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fournisseur', models.CharField(max_length=50)),
+                ('id_transaction', models.CharField(max_length=100)),
+                ('statut_externe', models.CharField(blank=True, default='', max_length=50)),
+                ('donnees', models.JSONField(default=dict, help_text='Contenu brut de la notification')),
+                ('etat', models.CharField(choices=[('recue', 'Reçue'), ('appliquee', 'Appliquée'), ('ignoree', 'Ignorée'), ('erreur', 'Erreur')], default='recue', max_length=20)),
+                ('message', models.TextField(blank=True, default='', help_text='Résultat ou erreur du traitement')),
+                ('date_reception', models.DateTimeField(default=django.utils.timezone.now)),
+                ('date_traitement', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Notification Entrante',
+                'verbose_name_plural': 'Notifications Entrantes',
+                'db_table': 'paiements_notifications_entrantes',
+                'ordering': ['-date_reception'],
+                'unique_together': {('fournisseur', 'id_transaction', 'statut_externe')},
+                'indexes': [models.Index(fields=['etat', 'date_reception'], name='notifications_etat_date_idx')],
+            },
+        ),
+    ]
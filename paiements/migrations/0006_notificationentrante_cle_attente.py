@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0005_notificationentrante'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='notificationentrante',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='notificationentrante',
+            name='cle_attente',
+            field=models.CharField(blank=True, editable=False, help_text='fournisseur:transaction tant que la notification attend son traitement', max_length=160, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='notificationentrante',
+            name='statut_externe',
+            field=models.CharField(blank=True, default='', help_text='Statut confirmé auprès du fournisseur lors du traitement', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='notificationentrante',
+            name='etat',
+            field=models.CharField(choices=[('recue', 'Reçue'), ('en_cours', 'En cours de traitement'), ('appliquee', 'Appliquée'), ('ignoree', 'Ignorée'), ('erreur', 'Erreur')], default='recue', max_length=20),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.core.validators import RegexValidator
 import uuid
 from clients.models import Client
@@ -40,7 +41,7 @@ class Paiement(models.Model):
         null=True
     )
     numero_transaction = models.CharField(max_length=100, blank=True, null=True)
-    reference_paiement = models.CharField(max_length=100, blank=True, null=True)
+    reference_paiement = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     statut = models.CharField(
         max_length=20,
         choices=STATUT_PAIEMENT_CHOICES,
@@ -55,6 +56,12 @@ class Paiement(models.Model):
         verbose_name = 'Paiement'
         verbose_name_plural = 'Paiements'
         ordering = ['-date_paiement']
+        indexes = [
+            models.Index(fields=['-date_paiement'], name='paiements_date_idx'),
+            models.Index(fields=['statut', '-date_paiement'], name='paiements_statut_date_idx'),
+            models.Index(fields=['moyen_paiement', '-date_paiement'], name='paiements_moyen_date_idx'),
+            models.Index(fields=['client', '-date_paiement'], name='paiements_client_date_idx'),
+        ]
     
     def __str__(self):
         return f"Paiement {self.id} - {self.client.nom_complet} - {self.montant:,} FCFA"
@@ -69,7 +76,23 @@ class Paiement(models.Model):
         # Valider que l'opérateur mobile est spécifié si le moyen de paiement est mobile money
         if self.moyen_paiement == 'mobile_money' and not self.operateur_mobile:
             raise ValueError("L'opérateur mobile doit être spécifié pour les paiements Mobile Money")
-        super().save(*args, **kwargs)
+        
+        # Maintenir les statistiques journalières dans la même transaction
+        from .services.statistiques_service import statistiques_service
+        with transaction.atomic():
+            ancien = None
+            if not self._state.adding:
+                ancien = statistiques_service.etat_en_base(self.pk)
+            super().save(*args, **kwargs)
+            statistiques_service.enregistrer_modification(ancien, statistiques_service.etat(self))
+    
+    def delete(self, *args, **kwargs):
+        from .services.statistiques_service import statistiques_service
+        with transaction.atomic():
+            ancien = statistiques_service.etat_en_base(self.pk)
+            resultat = super().delete(*args, **kwargs)
+            statistiques_service.enregistrer_modification(ancien, None)
+        return resultat
 
 
 class TransactionExterne(models.Model):
@@ -90,3 +113,82 @@ class TransactionExterne(models.Model):
     
     def __str__(self):
         return f"Transaction {self.fournisseur} - {self.id_transaction_externe}"
+
+
+class StatistiqueJournaliere(models.Model):
+    """
+    Agrégat quotidien des paiements par statut, moyen de paiement et opérateur,
+    maintenu de façon incrémentale à chaque enregistrement de paiement
+    """
+    jour = models.DateField()
+    statut = models.CharField(max_length=20, choices=Paiement.STATUT_PAIEMENT_CHOICES)
+    moyen_paiement = models.CharField(max_length=20, choices=Paiement.MOYEN_PAIEMENT_CHOICES)
+    operateur_mobile = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text="Vide si aucun opérateur mobile"
+    )
+    nombre = models.IntegerField(default=0, help_text="Nombre de paiements")
+    montant_total = models.BigIntegerField(default=0, help_text="Somme des montants en FCFA")
+    
+    class Meta:
+        db_table = 'paiements_statistiques_journalieres'
+        verbose_name = 'Statistique Journalière'
+        verbose_name_plural = 'Statistiques Journalières'
+        ordering = ['-jour']
+        unique_together = [('jour', 'statut', 'moyen_paiement', 'operateur_mobile')]
+    
+    def __str__(self):
+        return f"{self.jour} - {self.statut} - {self.moyen_paiement}: {self.nombre} ({self.montant_total:,} FCFA)"
+
+
+class NotificationEntrante(models.Model):
+    """
+    Boîte de réception des notifications (IPN) des fournisseurs de paiement.
+    Chaque notification est enregistrée telle quelle à la réception (une seule en
+    attente par transaction), puis appliquée au paiement par lots, après
+    confirmation du statut auprès du fournisseur.
+    """
+    ETAT_CHOICES = [
+        ('recue', 'Reçue'),
+        ('en_cours', 'En cours de traitement'),
+        ('appliquee', 'Appliquée'),
+        ('ignoree', 'Ignorée'),
+        ('erreur', 'Erreur'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    fournisseur = models.CharField(max_length=50)
+    id_transaction = models.CharField(max_length=100)
+    statut_externe = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="Statut confirmé auprès du fournisseur lors du traitement"
+    )
+    cle_attente = models.CharField(
+        max_length=160,
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        help_text="fournisseur:transaction tant que la notification attend son traitement"
+    )
+    donnees = models.JSONField(default=dict, help_text="Contenu brut de la notification")
+    etat = models.CharField(max_length=20, choices=ETAT_CHOICES, default='recue')
+    message = models.TextField(blank=True, default='', help_text="Résultat ou erreur du traitement")
+    date_reception = models.DateTimeField(default=timezone.now)
+    date_traitement = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'paiements_notifications_entrantes'
+        verbose_name = 'Notification Entrante'
+        verbose_name_plural = 'Notifications Entrantes'
+        ordering = ['-date_reception']
+        indexes = [
+            models.Index(fields=['etat', 'date_reception'], name='notifications_etat_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Notification {self.fournisseur} {self.id_transaction} ({self.statut_externe or '-'}) - {self.get_etat_display()}"
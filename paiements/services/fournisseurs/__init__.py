@@ -0,0 +1,56 @@
+"""
+Registre des fournisseurs de paiement
+
+Chaque fournisseur est décrit dans le réglage PASSERELLES_PAIEMENT (chemin de
+son adaptateur et identifiants). La configuration est lue une seule fois, au
+démarrage de l'application (PaiementsConfig.ready); le module de l'adaptateur
+n'est importé et instancié qu'à la première utilisation du fournisseur.
+"""
+import logging
+import threading
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_configuration = {}
+_adaptateurs = {}
+_verrou = threading.Lock()
+
+
+class FournisseurInconnu(Exception):
+    """Aucun adaptateur n'est configuré pour ce fournisseur"""
+
+
+def configurer(passerelles):
+    """Enregistrer la configuration des fournisseurs (appelé une fois au démarrage)"""
+    global _configuration
+    with _verrou:
+        _configuration = {nom.lower(): dict(reglages) for nom, reglages in passerelles.items()}
+        _adaptateurs.clear()
+    for nom, reglages in _configuration.items():
+        if 'ADAPTATEUR' not in reglages:
+            raise ValueError(f"PASSERELLES_PAIEMENT['{nom}'] doit indiquer son ADAPTATEUR")
+
+
+def fournisseurs_disponibles():
+    return sorted(_configuration)
+
+
+def obtenir_fournisseur(nom):
+    """Adaptateur (unique par processus) du fournisseur `nom`"""
+    adaptateur = _adaptateurs.get(nom)
+    if adaptateur is not None:
+        return adaptateur
+    with _verrou:
+        adaptateur = _adaptateurs.get(nom)
+        if adaptateur is None:
+            reglages = _configuration.get(nom)
+            if reglages is None:
+                raise FournisseurInconnu(f"Fournisseur de paiement inconnu: {nom}")
+            classe = import_string(reglages['ADAPTATEUR'])
+            identifiants = {cle: valeur for cle, valeur in reglages.items() if cle != 'ADAPTATEUR'}
+            adaptateur = _adaptateurs[nom] = classe(identifiants)
+            manquants = [cle for cle in classe.IDENTIFIANTS_REQUIS if not identifiants.get(cle)]
+            if manquants:
+                logger.warning(f"Identifiants {nom} manquants: {', '.join(manquants)}")
+    return adaptateur
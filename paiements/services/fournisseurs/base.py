@@ -0,0 +1,74 @@
+"""
+Interface commune des adaptateurs de fournisseurs de paiement
+"""
+from concurrent.futures import ThreadPoolExecutor
+from ..passerelle_http import client_passerelle
+
+
+class AdaptateurFournisseur:
+    """
+    Un adaptateur traduit les opérations de paiement vers l'API d'un fournisseur:
+    - initier(paiement): créer la transaction et obtenir l'URL de paiement;
+    - verifier(id_transaction): interroger le statut d'une transaction;
+    - analyser_notification(donnees): lire une notification (IPN) reçue (statut
+      indicatif seulement: il est toujours confirmé par verifier());
+    - statut_paiement(statut_externe): traduire un statut du fournisseur en statut de Paiement.
+    Les appels HTTP passent par le client partagé du fournisseur (passerelle_http).
+    """
+    nom = None
+    IDENTIFIANTS_REQUIS = ()
+
+    # Statut externe (en minuscules) -> statut du paiement; inconnu = toujours en cours
+    STATUTS = {
+        'completed': 'reussi',
+        'failed': 'echoue',
+        'cancelled': 'annule',
+        'pending': 'en_cours',
+    }
+
+    def __init__(self, identifiants):
+        self.identifiants = identifiants
+        self.http = client_passerelle(self.nom)
+
+    def initier(self, paiement):
+        """
+        Retourne un dictionnaire {'success', 'payment_url', 'id_transaction', 'error', 'reponse'}.
+        Lève requests.RequestException en cas d'erreur réseau.
+        """
+        raise NotImplementedError
+
+    def verifier(self, id_transaction):
+        """Retourne le statut externe de la transaction. Lève requests.RequestException en cas d'erreur réseau."""
+        raise NotImplementedError
+
+    def analyser_notification(self, donnees):
+        """
+        Retourne (id_transaction, statut indiqué); statut vide si la notification n'en
+        porte pas. Le contenu n'est pas authentifié: le statut n'est qu'une indication.
+        """
+        raise NotImplementedError
+
+    def statut_paiement(self, statut_externe):
+        return self.STATUTS.get(str(statut_externe or '').lower(), 'en_cours')
+
+    def id_transaction(self, paiement, transaction_externe=None):
+        """Identifiant à utiliser pour vérifier le paiement chez le fournisseur"""
+        if transaction_externe is not None and transaction_externe.id_transaction_externe:
+            return transaction_externe.id_transaction_externe
+        return str(paiement.id)
+
+    def verifier_lot(self, ids_transaction, workers=8, limiteur=None):
+        """
+        Vérifier plusieurs transactions en parallèle (pool borné, débit limité).
+        Retourne {id_transaction: (statut_externe, erreur)}.
+        """
+        def verifier(id_transaction):
+            if limiteur is not None:
+                limiteur.attendre()
+            try:
+                return id_transaction, (self.verifier(id_transaction), None)
+            except Exception as e:
+                return id_transaction, (None, str(e))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'verification-{self.nom}') as executeur:
+            return dict(executeur.map(verifier, ids_transaction))
@@ -0,0 +1,94 @@
+"""
+Adaptateur CinetPay
+"""
+from django.conf import settings
+from django.urls import reverse
+from salon_paiement.cinetpay_config import CINETPAY_URLS
+from .base import AdaptateurFournisseur
+
+# Moyen de paiement -> canal CinetPay
+CANAUX = {
+    'mobile_money': 'MOBILE_MONEY',
+    'carte_bancaire': 'CREDIT_CARD',
+    'carte_prepayee': 'CREDIT_CARD',
+}
+
+
+class CinetPayAdaptateur(AdaptateurFournisseur):
+    nom = 'cinetpay'
+    IDENTIFIANTS_REQUIS = ('API_KEY', 'SITE_ID')
+
+    STATUTS = dict(
+        AdaptateurFournisseur.STATUTS,
+        accepted='reussi',
+        refused='echoue',
+        waiting_for_customer='en_cours',
+        **{'00': 'reussi'}
+    )
+
+    def __init__(self, identifiants):
+        super().__init__(identifiants)
+        urls = CINETPAY_URLS[identifiants.get('MODE') or 'test']
+        base = identifiants.get('URL_API')
+        # URL_API permet de pointer vers une autre instance de l'API (passerelle de test)
+        self.url_paiement = f"{base.rstrip('/')}/v2/payment" if base else urls['payment_url']
+        self.url_verification = f"{base.rstrip('/')}/v2/payment/check" if base else urls['check_url']
+
+    def initier(self, paiement):
+        client = paiement.client
+        donnees = {
+            'apikey': self.identifiants['API_KEY'],
+            'site_id': self.identifiants['SITE_ID'],
+            # L'identifiant du paiement sert d'identifiant de transaction (vérification, IPN)
+            'transaction_id': str(paiement.id),
+            'amount': paiement.montant,
+            'currency': self.identifiants.get('CURRENCY', 'XOF'),
+            'description': f"Paiement pour {paiement.prestation.nom}",
+            'customer_name': client.nom,
+            'customer_surname': client.prenom,
+            'customer_email': client.email or '',
+            'customer_phone_number': client.telephone,
+            'customer_address': client.lieu_habitation or '',
+            'customer_city': '',
+            'customer_country': 'CI',
+            'notify_url': settings.PAIEMENTS_URL_API + reverse('paiement-cinetpay-notification'),
+            'return_url': settings.PAIEMENTS_URL_RETOUR + '/paiement/succes',
+            'channels': CANAUX.get(paiement.moyen_paiement, 'ALL'),
+            'metadata': str(paiement.id),
+            'lang': self.identifiants.get('LANGUE', 'fr'),
+        }
+
+        reponse = self.http.post(self.url_paiement, json=donnees)
+        if reponse.status_code != 200:
+            return {'success': False, 'error': f'Erreur HTTP {reponse.status_code}', 'reponse': None}
+
+        resultat = reponse.json()
+        if resultat.get('code') != '201':
+            return {'success': False, 'error': resultat.get('message', 'Erreur CinetPay'), 'reponse': resultat}
+
+        data = resultat.get('data') or {}
+        return {
+            'success': True,
+            'payment_url': data.get('payment_url'),
+            'payment_token': data.get('payment_token'),
+            'id_transaction': str(paiement.id),
+            'reponse': resultat,
+        }
+
+    def verifier(self, id_transaction):
+        reponse = self.http.post(
+            self.url_verification,
+            json={
+                'apikey': self.identifiants['API_KEY'],
+                'site_id': self.identifiants['SITE_ID'],
+                'transaction_id': id_transaction
+            },
+            idempotent=True
+        )
+        reponse.raise_for_status()
+        resultat = reponse.json()
+        return (resultat.get('data') or {}).get('status') or resultat.get('code', '')
+
+    def analyser_notification(self, donnees):
+        # L'IPN CinetPay ne contient que l'identifiant: le statut est vérifié au traitement (verifier)
+        return donnees.get('cpm_trans_id') or donnees.get('transaction_id'), donnees.get('status', '')
@@ -0,0 +1,84 @@
+"""
+Adaptateur PayDunya
+"""
+from django.conf import settings
+from django.urls import reverse
+from .base import AdaptateurFournisseur
+
+URLS_API = {
+    'test': 'https://app.paydunya.com/sandbox-api/v1',
+    'prod': 'https://app.paydunya.com/api/v1',
+}
+
+
+class PayDunyaAdaptateur(AdaptateurFournisseur):
+    nom = 'paydunya'
+    IDENTIFIANTS_REQUIS = ('MASTER_KEY', 'PRIVATE_KEY', 'TOKEN')
+
+    def __init__(self, identifiants):
+        super().__init__(identifiants)
+        base = identifiants.get('URL_API') or URLS_API[identifiants.get('MODE') or 'test']
+        self.url_api = base.rstrip('/')
+        self.entetes = {
+            'PAYDUNYA-MASTER-KEY': identifiants.get('MASTER_KEY', ''),
+            'PAYDUNYA-PRIVATE-KEY': identifiants.get('PRIVATE_KEY', ''),
+            'PAYDUNYA-TOKEN': identifiants.get('TOKEN', ''),
+        }
+
+    def initier(self, paiement):
+        client = paiement.client
+        donnees = {
+            'invoice': {
+                'items': {
+                    'item_0': {
+                        'name': paiement.prestation.nom,
+                        'quantity': 1,
+                        'unit_price': paiement.montant,
+                        'total_price': paiement.montant
+                    }
+                },
+                'total_amount': paiement.montant,
+                'description': f"Paiement pour {paiement.prestation.nom}"
+            },
+            'store': {
+                'name': self.identifiants.get('NOM_BOUTIQUE', 'Salon de Coiffure'),
+            },
+            'actions': {
+                'callback_url': settings.PAIEMENTS_URL_API + reverse('paiement-paydunya-notification'),
+                'return_url': settings.PAIEMENTS_URL_RETOUR + '/paiement/succes',
+                'cancel_url': settings.PAIEMENTS_URL_RETOUR + '/paiement/annule'
+            },
+            'customer': {
+                'name': f"{client.prenom} {client.nom}",
+                'phone': client.telephone,
+                'email': client.email or ''
+            },
+            'custom_data': {
+                'paiement_id': str(paiement.id)
+            }
+        }
+
+        reponse = self.http.post(f'{self.url_api}/checkout-invoice/create', json=donnees, headers=self.entetes)
+        if reponse.status_code != 200:
+            return {'success': False, 'error': f'Erreur HTTP {reponse.status_code}', 'reponse': None}
+
+        resultat = reponse.json()
+        if resultat.get('response_code') != '00':
+            return {'success': False, 'error': resultat.get('response_text', 'Erreur PayDunya'), 'reponse': resultat}
+
+        return {
+            'success': True,
+            'payment_url': resultat.get('response_text'),
+            'id_transaction': resultat.get('token'),
+            'reponse': resultat,
+        }
+
+    def verifier(self, id_transaction):
+        reponse = self.http.get(f'{self.url_api}/checkout-invoice/confirm/{id_transaction}', headers=self.entetes)
+        reponse.raise_for_status()
+        return reponse.json().get('status', '')
+
+    def analyser_notification(self, donnees):
+        data = donnees.get('data') if isinstance(donnees.get('data'), dict) else {}
+        facture = data.get('invoice') or {}
+        return donnees.get('token') or facture.get('token'), donnees.get('status') or data.get('status', '')
@@ -0,0 +1,83 @@
+"""
+Initiation asynchrone des paiements auprès des passerelles
+
+La vue crée le paiement puis demande son initiation: l'appel au fournisseur est
+exécuté par la file de tâches (paiements.tasks) et la vue répond immédiatement.
+Le résultat est conservé dans une TransactionExterne, que le client interroge
+pour obtenir l'URL de paiement.
+"""
+import logging
+from django.db import transaction
+from django.utils import timezone
+from ..models import Paiement
+from .fournisseurs import obtenir_fournisseur
+
+logger = logging.getLogger(__name__)
+
+
+class InitiationPaiementService:
+    """Mise en file et suivi de l'initiation des paiements"""
+
+    def demander(self, paiement, fournisseur):
+        """Mettre l'initiation en file (après validation de la transaction en cours)"""
+        from ..tasks import initier_paiement_passerelle
+
+        # Lève FournisseurInconnu avant la mise en file
+        obtenir_fournisseur(fournisseur)
+        initier_paiement_passerelle.soumettre(str(paiement.id), fournisseur)
+        return {'paiement_id': str(paiement.id), 'fournisseur': fournisseur, 'etat': 'en_file'}
+
+    def executer(self, paiement_id, fournisseur):
+        """Appeler le fournisseur et enregistrer le résultat (exécuté par la file de tâches)"""
+        from .payment_service import payment_service
+
+        # Réserver le paiement avant l'appel: une soumission en double ou une tâche
+        # rejouée (acks_late) ne l'initie pas une seconde fois chez le fournisseur
+        if not self.reserver(paiement_id):
+            # Paiement supprimé, ou initiation déjà prise en charge
+            return
+
+        paiement = Paiement.objects.select_related('client', 'prestation').get(pk=paiement_id)
+        payment_service.initier(paiement, fournisseur)
+
+    def reserver(self, paiement_id):
+        """Passer atomiquement le paiement de en_attente à en_cours; False si déjà fait"""
+        from .statistiques_service import statistiques_service
+
+        with transaction.atomic():
+            ancien = statistiques_service.etat_en_base(paiement_id)
+            if not Paiement.objects.filter(pk=paiement_id, statut='en_attente').update(
+                statut='en_cours', date_mise_a_jour=timezone.now()
+            ):
+                return False
+            # update() contourne Paiement.save: agrégats tenus à jour ici
+            cle, montant = ancien
+            statistiques_service.enregistrer_modifications([(ancien, ((cle[0], 'en_cours', *cle[2:]), montant))])
+        return True
+
+    def etat(self, paiement):
+        """État de l'initiation: en_file, initie (avec l'URL de paiement), a_verifier ou echoue"""
+        etat = {'paiement_id': str(paiement.id), 'statut_paiement': paiement.statut}
+        transaction_externe = paiement.transactions_externes.order_by('-date_creation').first()
+        if transaction_externe is None:
+            # en_cours sans transaction externe: initiation réservée, appel en cours
+            etat['etat'] = 'en_file' if paiement.statut in ('en_attente', 'en_cours') else 'inconnu'
+            return etat
+
+        reponse = transaction_externe.reponse_api or {}
+        etat['fournisseur'] = transaction_externe.fournisseur
+        if reponse.get('incertain') and paiement.statut == 'en_cours':
+            # Délai dépassé chez le fournisseur: statut confirmé par webhook ou réconciliation
+            etat['etat'] = 'a_verifier'
+            etat['error'] = reponse.get('error')
+        elif reponse.get('success') is False or transaction_externe.statut_externe == 'erreur':
+            etat['etat'] = 'echoue'
+            etat['error'] = reponse.get('error', "Échec d'initialisation du paiement")
+        else:
+            etat['etat'] = 'initie'
+            etat['payment_url'] = reponse.get('payment_url')
+        return etat
+
+
+# Instance unique du service
+initiation_service = InitiationPaiementService()
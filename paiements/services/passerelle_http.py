@@ -0,0 +1,239 @@
+"""
+Couche HTTP commune aux passerelles de paiement (CinetPay, PayDunya)
+
+Chaque fournisseur dispose d'un client unique par processus qui réutilise ses
+connexions (Session keep-alive, pool dimensionné), applique des délais de
+connexion et de lecture, réessaie les appels idempotents (vérifications de
+statut) avec une attente exponentielle bornée, et coupe les appels pendant un
+temps lorsque le fournisseur enchaîne les échecs (disjoncteur).
+Les latences sont mesurées par fournisseur.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONFIGURATION_DEFAUT = {
+    'TAILLE_POOL': 10,
+    'TIMEOUT_CONNEXION': 3.05,
+    'TIMEOUT_LECTURE': 20,
+    'TENTATIVES': 3,
+    'ATTENTE_INITIALE': 0.5,
+    'ATTENTE_MAX': 4,
+    'SEUIL_ECHECS': 5,
+    'DELAI_REOUVERTURE': 30,
+}
+
+
+class CircuitOuvert(requests.RequestException):
+    """Appel refusé sans contacter le fournisseur: le disjoncteur est ouvert"""
+
+
+class Disjoncteur:
+    """
+    Disjoncteur classique fermé / ouvert / semi-ouvert.
+    Après `seuil_echecs` échecs consécutifs, les appels sont refusés pendant
+    `delai_reouverture` secondes, puis un seul appel d'essai est autorisé.
+    """
+
+    def __init__(self, seuil_echecs, delai_reouverture):
+        self.seuil_echecs = seuil_echecs
+        self.delai_reouverture = delai_reouverture
+        self.etat = 'ferme'
+        self.echecs = 0
+        self._ouvert_depuis = None
+        self._verrou = threading.Lock()
+
+    def autoriser(self):
+        with self._verrou:
+            if self.etat == 'ferme':
+                return True
+            if self.etat == 'ouvert' and time.monotonic() - self._ouvert_depuis >= self.delai_reouverture:
+                self.etat = 'semi_ouvert'
+                return True
+            return False
+
+    def succes(self):
+        with self._verrou:
+            self.etat = 'ferme'
+            self.echecs = 0
+
+    def echec(self):
+        with self._verrou:
+            self.echecs += 1
+            if self.etat == 'semi_ouvert' or self.echecs >= self.seuil_echecs:
+                self.etat = 'ouvert'
+                self._ouvert_depuis = time.monotonic()
+
+
+class MesuresLatence:
+    """Latences des derniers appels d'un fournisseur (fenêtre glissante)"""
+
+    def __init__(self, taille_fenetre=500):
+        self._durees = deque(maxlen=taille_fenetre)
+        self.appels = 0
+        self.erreurs = 0
+        self.refus = 0
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, duree, erreur=False):
+        with self._verrou:
+            self._durees.append(duree)
+            self.appels += 1
+            if erreur:
+                self.erreurs += 1
+
+    def refuser(self):
+        with self._verrou:
+            self.refus += 1
+
+    def instantane(self):
+        with self._verrou:
+            durees = sorted(self._durees)
+            resultat = {'appels': self.appels, 'erreurs': self.erreurs, 'refus_disjoncteur': self.refus}
+        if durees:
+            resultat.update({
+                'p50_ms': round(self._centile(durees, 50) * 1000, 1),
+                'p95_ms': round(self._centile(durees, 95) * 1000, 1),
+                'p99_ms': round(self._centile(durees, 99) * 1000, 1),
+                'max_ms': round(durees[-1] * 1000, 1),
+            })
+        return resultat
+
+    @staticmethod
+    def _centile(durees, centile):
+        return durees[min(len(durees) - 1, int(len(durees) * centile / 100))]
+
+
+class ClientPasserelle:
+    """Client HTTP d'un fournisseur de paiement"""
+
+    def __init__(self, fournisseur, configuration=None):
+        self.fournisseur = fournisseur
+        self.configuration = dict(CONFIGURATION_DEFAUT, **(configuration or {}))
+        self.timeout = (self.configuration['TIMEOUT_CONNEXION'], self.configuration['TIMEOUT_LECTURE'])
+        self.disjoncteur = Disjoncteur(
+            self.configuration['SEUIL_ECHECS'],
+            self.configuration['DELAI_REOUVERTURE']
+        )
+        self.mesures = MesuresLatence()
+
+        self.session = requests.Session()
+        adaptateur = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.configuration['TAILLE_POOL'],
+            pool_block=False
+        )
+        self.session.mount('https://', adaptateur)
+        self.session.mount('http://', adaptateur)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+    def post(self, url, json=None, headers=None, idempotent=False):
+        """
+        Envoyer une requête POST au fournisseur.
+
+        Les appels `idempotent=True` (vérification de statut) sont réessayés en
+        cas d'erreur réseau ou de réponse 5xx; une initiation de paiement n'est
+        jamais renvoyée pour ne pas risquer une double transaction.
+        Lève requests.RequestException (dont CircuitOuvert) en cas d'échec.
+        """
+        return self._requete('POST', url, idempotent, json=json, headers=headers)
+
+    def get(self, url, headers=None):
+        """Envoyer une requête GET (toujours idempotente, donc réessayée)"""
+        return self._requete('GET', url, True, headers=headers)
+
+    def _requete(self, methode, url, idempotent, **options):
+        tentatives = self.configuration['TENTATIVES'] if idempotent else 1
+        for tentative in range(1, tentatives + 1):
+            try:
+                reponse = self._envoyer(methode, url, options)
+            except requests.RequestException as e:
+                if isinstance(e, CircuitOuvert) or tentative == tentatives:
+                    raise
+                logger.warning(f"{self.fournisseur}: tentative {tentative} échouée ({e}), nouvel essai")
+            else:
+                if reponse.status_code < 500 or tentative == tentatives:
+                    return reponse
+                logger.warning(f"{self.fournisseur}: réponse {reponse.status_code}, nouvel essai")
+            time.sleep(self._attente(tentative))
+
+    def _envoyer(self, methode, url, options):
+        if not self.disjoncteur.autoriser():
+            self.mesures.refuser()
+            raise CircuitOuvert(f"{self.fournisseur} indisponible (disjoncteur ouvert)")
+
+        debut = time.monotonic()
+        # Toute sortie enregistre un résultat, exceptions quelconques comprises:
+        # sinon un essai semi-ouvert interrompu laisserait le disjoncteur bloqué
+        erreur = True
+        try:
+            reponse = self.session.request(methode, url, timeout=self.timeout, **options)
+            erreur = reponse.status_code >= 500
+            return reponse
+        finally:
+            self.mesures.enregistrer(time.monotonic() - debut, erreur=erreur)
+            if erreur:
+                self.disjoncteur.echec()
+            else:
+                self.disjoncteur.succes()
+
+    def _attente(self, tentative):
+        """Attente exponentielle bornée, avec gigue"""
+        attente = min(
+            self.configuration['ATTENTE_MAX'],
+            self.configuration['ATTENTE_INITIALE'] * 2 ** (tentative - 1)
+        )
+        return attente * random.uniform(0.5, 1)
+
+    def metriques(self):
+        resultat = self.mesures.instantane()
+        resultat['disjoncteur'] = self.disjoncteur.etat
+        return resultat
+
+
+class LimiteurDebit:
+    """Espace les appels pour ne pas dépasser `par_seconde` appels par seconde (tous threads confondus)"""
+
+    def __init__(self, par_seconde):
+        self.intervalle = 1 / par_seconde if par_seconde else 0
+        self._prochain = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def attendre(self):
+        if not self.intervalle:
+            return
+        with self._verrou:
+            maintenant = time.monotonic()
+            depart = max(maintenant, self._prochain)
+            self._prochain = depart + self.intervalle
+        if depart > maintenant:
+            time.sleep(depart - maintenant)
+
+
+_clients = {}
+_verrou_clients = threading.Lock()
+
+
+def client_passerelle(fournisseur):
+    """Client HTTP unique (par processus) du fournisseur"""
+    client = _clients.get(fournisseur)
+    if client is None:
+        with _verrou_clients:
+            client = _clients.get(fournisseur)
+            if client is None:
+                reglages = getattr(settings, 'PASSERELLES_PAIEMENT_HTTP', {})
+                configuration = dict(reglages.get('DEFAUT', {}), **reglages.get(fournisseur.upper(), {}))
+                client = _clients[fournisseur] = ClientPasserelle(fournisseur, configuration)
+    return client
+
+
+def metriques_passerelles():
+    """Latences et état des disjoncteurs de chaque fournisseur utilisé par ce processus"""
+    return {fournisseur: client.metriques() for fournisseur, client in sorted(_clients.items())}
@@ -2,71 +2,71 @@
 Service principal de gestion des paiements
 """
 import logging
-from .cinetpay_service import CinetPayService
+import requests
+from django.db import transaction
+from ..models import TransactionExterne
+from .fournisseurs import obtenir_fournisseur
 
 logger = logging.getLogger(__name__)
 
+
 class PaymentService:
     """
     Service principal qui coordonne les différents fournisseurs de paiement
+    (adaptateurs du registre paiements.services.fournisseurs)
     """
     
-    def __init__(self):
-        self.cinetpay_service = CinetPayService()
-    
-    def initier_paiement_cinetpay(self, paiement):
+    def initier(self, paiement, fournisseur):
         """
-        Initialiser un paiement via CinetPay
+        Initialiser un paiement auprès du fournisseur et enregistrer le résultat
+        (statut du paiement et transaction externe)
         """
+        adaptateur = obtenir_fournisseur(fournisseur)
+        incertain = False
         try:
-            session_paiement = paiement.session_paiement
-            result = self.cinetpay_service.initier_paiement(
-                session_paiement=session_paiement,
-                montant=paiement.montant,
-                moyen_paiement=paiement.moyen_paiement
-            )
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation CinetPay: {str(e)}")
-            return {
+            resultat = adaptateur.initier(paiement)
+        except requests.ReadTimeout as e:
+            # Demande reçue par le fournisseur sans réponse à temps: la transaction a pu
+            # être créée. Le paiement reste en cours, la réconciliation tranchera.
+            logger.warning(f"Initialisation {fournisseur} sans réponse pour {paiement.id}: {str(e)}")
+            incertain = True
+            resultat = {
                 'success': False,
-                'error': f"Erreur technique: {str(e)}"
+                'incertain': True,
+                'error': "Le fournisseur n'a pas répondu à temps, vérification en cours",
+                'id_transaction': adaptateur.id_transaction(paiement),
+                'reponse': None
             }
-    
-    def traiter_notification_cinetpay(self, notification_data):
-        """
-        Traiter les notifications de CinetPay
-        """
-        try:
-            result = self.cinetpay_service.traiter_notification(notification_data)
-            return result
-            
         except Exception as e:
-            logger.error(f"Erreur lors du traitement notification CinetPay: {str(e)}")
-            return {
-                'success': False,
-                'error': f"Erreur technique: {str(e)}"
-            }
-    
-    def initier_paiement_paydunya(self, paiement):
-        """
-        Initialiser un paiement via PayDunya (à implémenter)
-        """
-        return {
-            'success': False,
-            'error': 'PayDunya non implémenté'
-        }
+            logger.error(f"Erreur lors de l'initialisation {fournisseur}: {str(e)}")
+            resultat = {'success': False, 'error': f"Erreur technique: {str(e)}", 'reponse': None}
+        
+        if resultat['success']:
+            statut, statut_externe = 'en_cours', 'initie'
+        elif incertain:
+            statut, statut_externe = 'en_cours', 'inconnu'
+        else:
+            statut, statut_externe = 'echoue', 'erreur'
+        with transaction.atomic():
+            paiement.statut = statut
+            paiement.save(update_fields=['statut', 'date_mise_a_jour'])
+            TransactionExterne.objects.create(
+                paiement=paiement,
+                fournisseur=fournisseur,
+                id_transaction_externe=resultat.get('id_transaction') or '',
+                reponse_api=resultat,
+                statut_externe=statut_externe
+            )
+        return resultat
     
-    def traiter_notification_paydunya(self, notification_data):
-        """
-        Traiter les notifications de PayDunya (à implémenter)
-        """
-        return {
-            'success': False,
-            'error': 'PayDunya non implémenté'
-        }
+    def verifier(self, paiement, transaction_externe=None):
+        """Statut du paiement chez son fournisseur, traduit en statut de Paiement"""
+        if transaction_externe is None:
+            transaction_externe = paiement.transactions_externes.order_by('-date_creation').first()
+        fournisseur = obtenir_fournisseur(transaction_externe.fournisseur if transaction_externe else 'cinetpay')
+        statut_externe = fournisseur.verifier(fournisseur.id_transaction(paiement, transaction_externe))
+        return fournisseur.statut_paiement(statut_externe), statut_externe
+
 
 # Instance unique du service
 payment_service = PaymentService()
@@ -0,0 +1,115 @@
+"""
+Réconciliation des paiements restés en cours
+
+Les paiements 'en_cours' plus anciens qu'un âge donné (notification jamais
+reçue) sont vérifiés auprès de leur fournisseur en parallèle, par un pool de
+threads borné et avec un débit maximal d'appels. Les résultats sont ensuite
+appliqués par lots: une mise à jour par statut cible, agrégats journaliers et
+transactions externes compris.
+"""
+import logging
+import time
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from ..models import Paiement, TransactionExterne
+from .fournisseurs import obtenir_fournisseur
+from .passerelle_http import LimiteurDebit
+from .statistiques_service import statistiques_service
+
+logger = logging.getLogger(__name__)
+
+
+class ReconciliationService:
+    """Vérification par lots des paiements en cours auprès des fournisseurs"""
+
+    def a_verifier(self, age_minutes=30, limite=None):
+        """Paiements en cours depuis plus de `age_minutes`, avec leur transaction externe la plus récente"""
+        avant = timezone.now() - timedelta(minutes=age_minutes)
+        paiements = list(
+            Paiement.objects.filter(statut='en_cours', date_paiement__lt=avant)
+            .order_by('-date_paiement')
+            .only('id', 'statut', 'date_paiement')[:limite]
+        )
+        transactions = {}
+        for transaction_externe in TransactionExterne.objects.filter(
+            paiement_id__in=[paiement.id for paiement in paiements]
+        ).order_by('date_creation'):
+            transactions[transaction_externe.paiement_id] = transaction_externe
+        return [(paiement, transactions.get(paiement.id)) for paiement in paiements]
+
+    def reconcilier(self, age_minutes=30, limite=None, workers=8, par_seconde=5, simulation=False):
+        """
+        Vérifier et mettre à jour les paiements en cours anciens.
+        Retourne un bilan: nombres par résultat, erreurs et durée.
+        """
+        debut = time.monotonic()
+        elements = self.a_verifier(age_minutes, limite)
+        limiteur = LimiteurDebit(par_seconde)
+
+        # Regrouper par fournisseur: chaque adaptateur vérifie son lot en parallèle
+        par_fournisseur = {}
+        for paiement, transaction_externe in elements:
+            nom = transaction_externe.fournisseur if transaction_externe else 'cinetpay'
+            par_fournisseur.setdefault(nom, []).append((paiement, transaction_externe))
+
+        bilan = {'selectionnes': len(elements), 'inchanges': 0, 'erreurs': [], 'par_statut': {}}
+        par_statut = {}
+        for nom, lot in par_fournisseur.items():
+            fournisseur = obtenir_fournisseur(nom)
+            ids = {
+                paiement.id: fournisseur.id_transaction(paiement, transaction_externe)
+                for paiement, transaction_externe in lot
+            }
+            resultats = fournisseur.verifier_lot(list(ids.values()), workers=workers, limiteur=limiteur)
+            for paiement_id, id_transaction in ids.items():
+                statut_externe, erreur = resultats[id_transaction]
+                if erreur is not None:
+                    bilan['erreurs'].append((str(paiement_id), erreur))
+                    continue
+                nouveau_statut = fournisseur.statut_paiement(statut_externe)
+                if nouveau_statut == 'en_cours':
+                    bilan['inchanges'] += 1
+                    continue
+                par_statut.setdefault(nouveau_statut, []).append((paiement_id, statut_externe))
+
+        for nouveau_statut, lignes in par_statut.items():
+            nombre = len(lignes) if simulation else self._appliquer(nouveau_statut, lignes)
+            bilan['par_statut'][nouveau_statut] = nombre
+
+        bilan['duree'] = time.monotonic() - debut
+        return bilan
+
+    def _appliquer(self, nouveau_statut, lignes):
+        """Passer un lot de paiements en cours au même statut final"""
+        statuts_externes = dict(lignes)
+        maintenant = timezone.now()
+        with transaction.atomic():
+            # Relire sous verrou: un webhook a pu traiter certains paiements entre-temps
+            anciens = statistiques_service.etats_en_base(
+                Paiement.objects.filter(pk__in=list(statuts_externes), statut='en_cours')
+            )
+            if not anciens:
+                return 0
+
+            Paiement.objects.filter(pk__in=list(anciens)).update(
+                statut=nouveau_statut,
+                date_mise_a_jour=maintenant
+            )
+            # queryset.update() ne passe pas par Paiement.save(): ajuster les agrégats ici
+            transitions = []
+            for ancien in anciens.values():
+                if ancien is None:
+                    continue
+                (jour, _, moyen_paiement, operateur_mobile), montant = ancien
+                transitions.append((ancien, ((jour, nouveau_statut, moyen_paiement, operateur_mobile), montant)))
+            statistiques_service.enregistrer_modifications(transitions)
+            for statut_externe in set(statuts_externes[pk] for pk in anciens):
+                TransactionExterne.objects.filter(
+                    paiement_id__in=[pk for pk in anciens if statuts_externes[pk] == statut_externe]
+                ).update(statut_externe=str(statut_externe)[:50])
+        return len(anciens)
+
+
+# Instance unique du service
+reconciliation_service = ReconciliationService()
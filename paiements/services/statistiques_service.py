@@ -0,0 +1,177 @@
+"""
+Service de maintenance des statistiques journalières de paiement
+"""
+import logging
+from datetime import datetime, time
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from salon_paiement import cache as cache_versionne
+from ..models import Paiement, StatistiqueJournaliere
+
+logger = logging.getLogger(__name__)
+
+# Espace de cache versionné: sa version change à chaque modification des agrégats
+ESPACE_CACHE = 'statistiques_paiements'
+
+
+class StatistiquesService:
+    """
+    Tient à jour la table d'agrégats journaliers (jour, statut, moyen, opérateur)
+    à partir des modifications de paiements
+    """
+
+    CHAMPS_ETAT = ('date_paiement', 'statut', 'moyen_paiement', 'operateur_mobile', 'montant')
+
+    def etat(self, paiement):
+        """
+        Retourne la clé d'agrégat et le montant d'un paiement sous la forme
+        ((jour, statut, moyen_paiement, operateur_mobile), montant)
+        """
+        return self._etat_depuis_valeurs(
+            paiement.date_paiement, paiement.statut, paiement.moyen_paiement,
+            paiement.operateur_mobile, paiement.montant
+        )
+
+    def etat_en_base(self, paiement_id):
+        """
+        Lire l'état enregistré d'un paiement en verrouillant la ligne, pour que
+        deux mises à jour concurrentes ne décomptent pas deux fois le même état
+        """
+        valeurs = Paiement.objects.select_for_update().filter(
+            pk=paiement_id
+        ).values_list(*self.CHAMPS_ETAT).first()
+        if valeurs is None:
+            return None
+        return self._etat_depuis_valeurs(*valeurs)
+
+    def etats_en_base(self, filtre):
+        """Comme etat_en_base, pour tous les paiements du queryset `filtre` ({id: état})"""
+        return {
+            valeurs[0]: self._etat_depuis_valeurs(*valeurs[1:])
+            for valeurs in filtre.select_for_update().values_list('pk', *self.CHAMPS_ETAT)
+        }
+
+    def enregistrer_modification(self, ancien, nouveau):
+        """Appliquer le passage d'un état à un autre sur les agrégats"""
+        if ancien == nouveau:
+            return
+        if ancien is not None:
+            cle, montant = ancien
+            self._ajuster(cle, -1, -montant)
+        if nouveau is not None:
+            cle, montant = nouveau
+            self._ajuster(cle, 1, montant)
+
+    def enregistrer_modifications(self, transitions):
+        """
+        Appliquer une série de passages (ancien, nouveau) en une seule mise à jour
+        par ligne d'agrégat, pour les modifications faites par lot (queryset.update)
+        """
+        ecarts = {}
+        for ancien, nouveau in transitions:
+            for etat, signe in ((ancien, -1), (nouveau, 1)):
+                if etat is None:
+                    continue
+                cle, montant = etat
+                nombre, total = ecarts.get(cle, (0, 0))
+                ecarts[cle] = (nombre + signe, total + signe * montant)
+        for cle, (nombre, total) in ecarts.items():
+            if nombre or total:
+                self._ajuster(cle, nombre, total)
+
+    def reconstruire(self, depuis=None):
+        """
+        Recalculer les agrégats à partir de la table des paiements.
+        Si `depuis` (date) est fourni, seuls les jours à partir de cette date sont recalculés.
+        Retourne le nombre de lignes d'agrégat écrites.
+        """
+        paiements = Paiement.objects.all()
+        agregats = StatistiqueJournaliere.objects.all()
+        if depuis:
+            debut = timezone.make_aware(datetime.combine(depuis, time.min))
+            paiements = paiements.filter(date_paiement__gte=debut)
+            agregats = agregats.filter(jour__gte=depuis)
+
+        # Jour calculé en Python (fuseau de TIME_ZONE): TruncDate produirait un
+        # CONVERT_TZ, NULL sur un serveur MySQL sans tables de fuseaux horaires
+        totaux = {}
+        valeurs = paiements.values_list(
+            'date_paiement', 'statut', 'moyen_paiement', 'operateur_mobile', 'montant'
+        ).order_by()
+        for ligne in valeurs.iterator(chunk_size=2000):
+            etat = self._etat_depuis_valeurs(*ligne)
+            if etat is None:
+                continue
+            cle, montant = etat
+            nombre, montant_total = totaux.get(cle, (0, 0))
+            totaux[cle] = (nombre + 1, montant_total + montant)
+
+        with transaction.atomic():
+            agregats.delete()
+            objets = StatistiqueJournaliere.objects.bulk_create(
+                [
+                    StatistiqueJournaliere(
+                        jour=jour,
+                        statut=statut,
+                        moyen_paiement=moyen_paiement,
+                        operateur_mobile=operateur_mobile,
+                        nombre=nombre,
+                        montant_total=montant_total
+                    )
+                    for (jour, statut, moyen_paiement, operateur_mobile), (nombre, montant_total)
+                    in totaux.items()
+                ],
+                batch_size=1000
+            )
+
+        self._signaler_modification()
+        logger.info(f"Statistiques journalières reconstruites: {len(objets)} lignes")
+        return len(objets)
+
+    def _etat_depuis_valeurs(self, date_paiement, statut, moyen_paiement, operateur_mobile, montant):
+        if date_paiement is None:
+            return None
+        if timezone.is_naive(date_paiement):
+            date_paiement = timezone.make_aware(date_paiement)
+        jour = timezone.localdate(date_paiement)
+        return (jour, statut, moyen_paiement, operateur_mobile or ''), montant or 0
+
+    def version(self):
+        """Numéro de version des agrégats (ETag de l'endpoint des statistiques)"""
+        return cache_versionne.version(ESPACE_CACHE)
+
+    def _signaler_modification(self):
+        # Après validation: un lecteur ne doit pas associer la nouvelle version aux anciennes données
+        transaction.on_commit(lambda: cache_versionne.invalider(ESPACE_CACHE))
+
+    def _ajuster(self, cle, nombre, montant):
+        """Incrémenter une ligne d'agrégat, en la créant si nécessaire"""
+        self._signaler_modification()
+        jour, statut, moyen_paiement, operateur_mobile = cle
+        lignes = StatistiqueJournaliere.objects.filter(
+            jour=jour,
+            statut=statut,
+            moyen_paiement=moyen_paiement,
+            operateur_mobile=operateur_mobile
+        )
+        if lignes.update(nombre=F('nombre') + nombre, montant_total=F('montant_total') + montant):
+            return
+
+        try:
+            with transaction.atomic():
+                StatistiqueJournaliere.objects.create(
+                    jour=jour,
+                    statut=statut,
+                    moyen_paiement=moyen_paiement,
+                    operateur_mobile=operateur_mobile,
+                    nombre=nombre,
+                    montant_total=montant
+                )
+        except IntegrityError:
+            # Une autre transaction a créé la ligne entre-temps
+            lignes.update(nombre=F('nombre') + nombre, montant_total=F('montant_total') + montant)
+
+
+# Instance unique du service
+statistiques_service = StatistiquesService()
@@ -0,0 +1,215 @@
+"""
+Réception et traitement des notifications (IPN) des fournisseurs de paiement
+
+La réception se limite à une insertion dans NotificationEntrante puis à la mise
+en file du traitement. Une notification est ignorée si une autre, pour la même
+transaction, attend encore son traitement: celui-ci interrogera de toute façon
+le fournisseur plus tard (clé cle_attente, effacée dès la prise en charge).
+
+Le contenu d'une notification n'est jamais cru sur parole (les webhooks sont
+publics): le paiement visé est retrouvé par la transaction enregistrée à
+l'initiation et son statut est toujours confirmé auprès du fournisseur.
+
+Le traitement se fait en trois temps, pour ne garder aucun verrou pendant les
+appels réseau:
+1. prise en charge d'un lot (SKIP LOCKED, état en_cours), transaction courte;
+2. vérification du statut auprès du fournisseur, hors transaction;
+3. application au paiement, verrouillé, dans une transaction par notification.
+Seules les transitions qui font avancer le paiement sont appliquées:
+en_attente -> en_cours -> reussi / echoue / annule, plus echoue -> reussi
+(paiement noté échoué à tort, par exemple sur un délai dépassé à l'initiation).
+"""
+import logging
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import Paiement, TransactionExterne, NotificationEntrante
+from .fournisseurs import obtenir_fournisseur, FournisseurInconnu
+
+logger = logging.getLogger(__name__)
+
+# Rang des statuts de paiement: une notification ne fait jamais reculer un paiement
+RANG_STATUT = {
+    'en_attente': 0,
+    'en_cours': 1,
+    'reussi': 2,
+    'echoue': 2,
+    'annule': 2,
+}
+
+# Exceptions à la règle des rangs: un paiement noté échoué (ex. erreur à l'initiation)
+# que le fournisseur confirme payé passe à réussi
+TRANSITIONS_AUTORISEES = {('echoue', 'reussi')}
+
+# Notification prise en charge depuis plus longtemps: worker interrompu, à reprendre
+DELAI_REPRISE = timedelta(minutes=10)
+
+
+class NotificationInvalide(Exception):
+    """Notification sans identifiant de transaction exploitable"""
+
+
+class WebhookService:
+    """Boîte de réception des notifications de paiement"""
+
+    # --- Réception ---
+
+    def recevoir(self, fournisseur, donnees):
+        """Enregistrer une notification et mettre son traitement en file"""
+        from ..tasks import traiter_notifications
+
+        id_transaction, _ = self.identifier(fournisseur, donnees)
+        if not id_transaction:
+            raise NotificationInvalide('Identifiant de transaction manquant')
+
+        id_transaction = str(id_transaction)[:100]
+        NotificationEntrante.objects.bulk_create([
+            NotificationEntrante(
+                fournisseur=fournisseur,
+                id_transaction=id_transaction,
+                cle_attente=f'{fournisseur}:{id_transaction}',
+                donnees=donnees
+            )
+        ], ignore_conflicts=True)
+        traiter_notifications.soumettre()
+
+    def identifier(self, fournisseur, donnees):
+        """Extraire (identifiant de transaction, statut indiqué) du contenu d'une notification"""
+        try:
+            return obtenir_fournisseur(fournisseur).analyser_notification(donnees)
+        except FournisseurInconnu as e:
+            raise NotificationInvalide(str(e))
+
+    # --- Traitement ---
+
+    def reprendre_erreurs(self):
+        """
+        Remettre en file les notifications en erreur (fournisseur injoignable, etc.)
+        et celles dont la prise en charge a été interrompue
+        """
+        a_reprendre = Q(etat='erreur') | Q(etat='en_cours', date_traitement__lt=timezone.now() - DELAI_REPRISE)
+        nombre = 0
+        notifications = NotificationEntrante.objects.filter(a_reprendre).only('id', 'fournisseur', 'id_transaction')
+        for notification in notifications.iterator():
+            try:
+                with transaction.atomic():
+                    # Clé d'attente rétablie: une nouvelle notification de la même transaction est dédoublonnée
+                    nombre += NotificationEntrante.objects.filter(a_reprendre, pk=notification.pk).update(
+                        etat='recue',
+                        message='',
+                        cle_attente=f'{notification.fournisseur}:{notification.id_transaction}'
+                    )
+            except IntegrityError:
+                # Une notification de la même transaction attend déjà: elle interrogera le fournisseur
+                NotificationEntrante.objects.filter(pk=notification.pk).update(
+                    etat='ignoree', message="Remplacée par une notification en attente pour la même transaction"
+                )
+        return nombre
+
+    def traiter(self, taille_lot=100):
+        """Traiter toutes les notifications reçues, par lots. Retourne le nombre par état."""
+        bilan = {}
+        while True:
+            etats = self.traiter_lot(taille_lot)
+            if not etats:
+                return bilan
+            for etat in etats:
+                bilan[etat] = bilan.get(etat, 0) + 1
+
+    def traiter_lot(self, taille_lot=100):
+        notifications = self._prendre_en_charge(taille_lot)
+        for notification in notifications:
+            try:
+                self._traiter(notification)
+            except Exception as e:
+                logger.exception(f"Erreur de traitement de la notification {notification.id}")
+                self._terminer(notification, 'erreur', str(e))
+        return [notification.etat for notification in notifications]
+
+    def _prendre_en_charge(self, taille_lot):
+        """Réserver un lot de notifications reçues (transaction courte, sans appel réseau)"""
+        with transaction.atomic():
+            notifications = list(
+                NotificationEntrante.objects.filter(etat='recue')
+                .order_by('date_reception')
+                .select_for_update(skip_locked=True)[:taille_lot]
+            )
+            if notifications:
+                # Une notification arrivant désormais pour ces transactions sera conservée
+                NotificationEntrante.objects.filter(
+                    pk__in=[notification.pk for notification in notifications]
+                ).update(etat='en_cours', cle_attente=None, date_traitement=timezone.now())
+        return notifications
+
+    def _traiter(self, notification):
+        paiement_id = self._paiement_id(notification)
+        if paiement_id is None:
+            self._terminer(notification, 'ignoree', 'Paiement introuvable')
+            return
+
+        # Statut toujours confirmé auprès du fournisseur, hors transaction (appel réseau)
+        fournisseur = obtenir_fournisseur(notification.fournisseur)
+        notification.statut_externe = str(fournisseur.verifier(notification.id_transaction) or '')[:50]
+
+        with transaction.atomic():
+            paiement = Paiement.objects.select_for_update().filter(pk=paiement_id).first()
+            if paiement is None:
+                etat, message = 'ignoree', 'Paiement introuvable'
+            else:
+                etat, message = self._appliquer(notification, paiement, fournisseur)
+            self._terminer(notification, etat, message)
+
+    def _terminer(self, notification, etat, message):
+        notification.etat, notification.message = etat, message
+        notification.date_traitement = timezone.now()
+        notification.save(update_fields=['etat', 'message', 'statut_externe', 'date_traitement'])
+
+    def _appliquer(self, notification, paiement, fournisseur):
+        statut_externe = notification.statut_externe
+        nouveau_statut = fournisseur.statut_paiement(statut_externe)
+
+        fait_avancer = RANG_STATUT[nouveau_statut] > RANG_STATUT.get(paiement.statut, 0)
+        if not fait_avancer and (paiement.statut, nouveau_statut) not in TRANSITIONS_AUTORISEES:
+            return 'ignoree', f"Paiement déjà {paiement.statut}, statut {nouveau_statut} sans effet"
+
+        paiement.statut = nouveau_statut
+        champs = ['statut', 'date_mise_a_jour']
+        if notification.fournisseur == 'cinetpay':
+            paiement.numero_transaction = notification.id_transaction
+            champs.append('numero_transaction')
+        else:
+            paiement.reference_paiement = notification.id_transaction
+            champs.append('reference_paiement')
+        paiement.save(update_fields=champs)
+
+        TransactionExterne.objects.filter(
+            paiement=paiement, fournisseur=notification.fournisseur
+        ).update(statut_externe=statut_externe)
+        return 'appliquee', f"Paiement passé à {nouveau_statut}"
+
+    def _paiement_id(self, notification):
+        """
+        Paiement visé par la notification, retrouvé par la transaction enregistrée à
+        l'initiation. Les métadonnées du contenu (paiement_id...) ne sont pas utilisées:
+        elles permettraient d'associer la transaction payée d'un autre à ce paiement.
+        """
+        transaction_externe = TransactionExterne.objects.filter(
+            fournisseur=notification.fournisseur,
+            id_transaction_externe=notification.id_transaction
+        ).only('paiement_id').first()
+        if transaction_externe is not None:
+            return transaction_externe.paiement_id
+        if notification.fournisseur != 'cinetpay':
+            return None
+        # CinetPay: l'identifiant de transaction est celui du paiement
+        try:
+            return Paiement.objects.filter(pk=notification.id_transaction).values_list('pk', flat=True).first()
+        except (ValueError, ValidationError):
+            # Identifiant qui n'est pas un UUID de paiement
+            return None
+
+
+# Instance unique du service
+webhook_service = WebhookService()
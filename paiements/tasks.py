@@ -0,0 +1,16 @@
+"""
+Tâches d'arrière-plan des paiements (Celery ou pool local, voir salon_paiement.taches)
+"""
+from salon_paiement.taches import tache
+
+
+@tache('paiements.initier_paiement_passerelle')
+def initier_paiement_passerelle(paiement_id, fournisseur):
+    from .services.initiation_service import initiation_service
+    initiation_service.executer(paiement_id, fournisseur)
+
+
+@tache('paiements.traiter_notifications')
+def traiter_notifications():
+    from .services.webhook_service import webhook_service
+    webhook_service.traiter()
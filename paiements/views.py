@@ -2,25 +2,56 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from salon_paiement.permissions import CanManagePaiements, IsOwnerOrAdmin, CanViewCreatePaiements
-from django.db.models import Q, ProtectedError
+from rest_framework.exceptions import ValidationError
+from salon_paiement.permissions import CanManagePaiements, IsOwnerOrAdmin, CanViewCreatePaiements, IsAdmin
+from salon_paiement.conditionnel import GetConditionnelMixin, calculer_etag
+from salon_paiement.pagination import PaginationCurseur
+from clients.recherche import filtre_recherche_client
+from django.db.models import Q, ProtectedError, Sum
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.utils.translation import gettext_lazy as _
-from .models import Paiement, TransactionExterne
+from datetime import datetime, time, timedelta
+from .models import Paiement, TransactionExterne, StatistiqueJournaliere
 from .serializers import (
     PaiementSerializer, PaiementListSerializer, PaiementDetailSerializer, 
     PaiementCreateSerializer, TransactionExterneSerializer
 )
-from .services import payment_service
-from .services.cinetpay_service import CinetPayService
+from .services.initiation_service import initiation_service
+from .services.statistiques_service import statistiques_service
+from .services.webhook_service import webhook_service, NotificationInvalide
+from .services import passerelle_http
 
 
-class PaiementViewSet(viewsets.ModelViewSet):
+def debut_de_journee(valeur, parametre):
+    """
+    Convertir une date AAAA-MM-JJ en début de journée dans le fuseau du site (Africa/Abidjan),
+    pour filtrer sur des intervalles semi-ouverts pouvant utiliser les index sur date_paiement
+    """
+    try:
+        jour = parse_date(valeur)
+    except ValueError:
+        jour = None
+    if jour is None:
+        raise ValidationError({parametre: 'La date doit être au format AAAA-MM-JJ'})
+    return timezone.make_aware(datetime.combine(jour, time.min), timezone.get_default_timezone())
+
+
+class PaiementViewSet(GetConditionnelMixin, viewsets.ModelViewSet):
     """
     API endpoint pour la gestion des paiements
     """
     queryset = Paiement.objects.all()
     serializer_class = PaiementSerializer
     permission_classes = [IsAuthenticated, CanViewCreatePaiements]
+    pagination_class = PaginationCurseur
+    # Pas de date de modification sur les paiements: seules les statistiques sont conditionnelles
+    actions_conditionnelles = ()
+    
+    def get_champ_curseur(self):
+        """Colonne de date utilisée par la pagination par curseur"""
+        return 'date_paiement'
     
     def get_serializer_class(self):
         """Retourne le serializer approprié selon l'action"""
@@ -40,10 +71,8 @@ class PaiementViewSet(viewsets.ModelViewSet):
         search = self.request.query_params.get('search', None)
         if search:
             queryset = queryset.filter(
-                Q(client__nom__icontains=search) |
-                Q(client__prenom__icontains=search) |
-                Q(client__telephone__icontains=search) |
-                Q(reference_paiement__icontains=search)
+                filtre_recherche_client(search) |
+                Q(reference_paiement__startswith=search)
             )
         
         # Filtrer par statut
@@ -65,68 +94,74 @@ class PaiementViewSet(viewsets.ModelViewSet):
         date_debut = self.request.query_params.get('date_debut', None)
         date_fin = self.request.query_params.get('date_fin', None)
         if date_debut:
-            queryset = queryset.filter(date_paiement__date__gte=date_debut)
+            queryset = queryset.filter(date_paiement__gte=debut_de_journee(date_debut, 'date_debut'))
         if date_fin:
-            queryset = queryset.filter(date_paiement__date__lte=date_fin)
+            # Intervalle semi-ouvert: strictement avant le début du jour suivant
+            fin = debut_de_journee(date_fin, 'date_fin') + timedelta(days=1)
+            queryset = queryset.filter(date_paiement__lt=fin)
         
         return queryset.order_by('-date_paiement')
     
     @action(detail=False, methods=['get'])
     def statistiques(self, request):
-        """Retourner des statistiques sur les paiements"""
-        today = timezone.now().date()
+        """
+        Retourner des statistiques sur les paiements (lues depuis les agrégats journaliers).
+        ETag: version des agrégats et jour courant (fenêtres aujourd'hui/semaine/mois),
+        304 sans aucune requête d'agrégat tant qu'aucun paiement n'a changé.
+        """
+        today = timezone.localdate()
+        etag = calculer_etag('statistiques', statistiques_service.version(), today)
+        return self.reponse_conditionnelle(request, lambda: self._statistiques(today), etag=etag)
+    
+    def _statistiques(self, today):
         last_week = today - timedelta(days=7)
         last_month = today - timedelta(days=30)
+        reussi = Q(statut='reussi')
         
-        # Statistiques générales
-        total_paiements = Paiement.objects.count()
-        total_revenus = Paiement.objects.filter(statut='reussi').aggregate(
-            total=Sum('montant'))['total'] or 0
-        
-        # Statistiques par période
-        paiements_aujourd_hui = Paiement.objects.filter(
-            date_paiement__date=today).count()
-        revenus_aujourd_hui = Paiement.objects.filter(
-            date_paiement__date=today, statut='reussi').aggregate(
-            total=Sum('montant'))['total'] or 0
-        
-        paiements_semaine = Paiement.objects.filter(
-            date_paiement__date__gte=last_week).count()
-        revenus_semaine = Paiement.objects.filter(
-            date_paiement__date__gte=last_week, statut='reussi').aggregate(
-            total=Sum('montant'))['total'] or 0
+        # Une seule requête groupée par moyen de paiement sur la table d'agrégats
+        lignes = list(StatistiqueJournaliere.objects.values('moyen_paiement').annotate(
+            total_paiements=Sum('nombre'),
+            total_revenus=Sum('montant_total', filter=reussi),
+            paiements_reussis=Sum('nombre', filter=reussi),
+            paiements_aujourd_hui=Sum('nombre', filter=Q(jour=today)),
+            revenus_aujourd_hui=Sum('montant_total', filter=Q(jour=today) & reussi),
+            paiements_semaine=Sum('nombre', filter=Q(jour__gte=last_week)),
+            revenus_semaine=Sum('montant_total', filter=Q(jour__gte=last_week) & reussi),
+            paiements_mois=Sum('nombre', filter=Q(jour__gte=last_month)),
+            revenus_mois=Sum('montant_total', filter=Q(jour__gte=last_month) & reussi),
+        ).order_by('moyen_paiement'))
         
-        paiements_mois = Paiement.objects.filter(
-            date_paiement__date__gte=last_month).count()
-        revenus_mois = Paiement.objects.filter(
-            date_paiement__date__gte=last_month, statut='reussi').aggregate(
-            total=Sum('montant'))['total'] or 0
+        def total(cle):
+            return sum(ligne[cle] or 0 for ligne in lignes)
         
-        # Statistiques par moyen de paiement
-        stats_moyen_paiement = Paiement.objects.filter(statut='reussi').values(
-            'moyen_paiement').annotate(
-            count=Count('id'),
-            total=Sum('montant')
-        )
+        # Statistiques par moyen de paiement (paiements réussis uniquement)
+        stats_moyen_paiement = [
+            {
+                'moyen_paiement': ligne['moyen_paiement'],
+                'count': ligne['paiements_reussis'],
+                'total': ligne['total_revenus'] or 0
+            }
+            for ligne in lignes if ligne['paiements_reussis']
+        ]
         
         return Response({
             'general': {
-                'total_paiements': total_paiements,
-                'total_revenus': total_revenus
+                'total_paiements': total('total_paiements'),
+                'total_revenus': total('total_revenus')
             },
             'aujourd_hui': {
-                'paiements': paiements_aujourd_hui,
-                'revenus': revenus_aujourd_hui
+                'paiements': total('paiements_aujourd_hui'),
+                'revenus': total('revenus_aujourd_hui')
             },
             'semaine': {
-                'paiements': paiements_semaine,
-                'revenus': revenus_semaine
+                'paiements': total('paiements_semaine'),
+                'revenus': total('revenus_semaine')
             },
             'mois': {
-                'paiements': paiements_mois,
-                'revenus': revenus_mois
+                'paiements': total('paiements_mois'),
+                'revenus': total('revenus_mois')
             },
-            'par_moyen_paiement': list(stats_moyen_paiement)
+            'par_moyen_paiement': stats_moyen_paiement
         })
     
     def annuler(self, request, pk=None):
@@ -178,17 +213,12 @@ class PaiementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        result = payment_service.initier_paiement_cinetpay(paiement)
-        
-        if result['success']:
-            paiement.statut = 'en_cours'
-            paiement.save()
-            return Response(result)
-        else:
-            return Response(
-                {'error': result['error']},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # L'appel au fournisseur est fait en arrière-plan; suivre avec etat_initiation
+        demande = initiation_service.demander(paiement, 'cinetpay')
+        demande['suivi_url'] = request.build_absolute_uri(
+            reverse('paiement-etat-initiation', kwargs={'pk': paiement.pk})
+        )
+        return Response(demande, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['post'])
     def initier_paiement_paydunya(self, request, pk=None):
@@ -202,43 +232,41 @@ class PaiementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        result = payment_service.initier_paiement_paydunya(paiement)
-        
-        if result['success']:
-            paiement.statut = 'en_cours'
-            paiement.save()
-            return Response(result)
-        else:
-            return Response(
-                {'error': result['error']},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # L'appel au fournisseur est fait en arrière-plan; suivre avec etat_initiation
+        demande = initiation_service.demander(paiement, 'paydunya')
+        demande['suivi_url'] = request.build_absolute_uri(
+            reverse('paiement-etat-initiation', kwargs={'pk': paiement.pk})
+        )
+        return Response(demande, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def etat_initiation(self, request, pk=None):
+        """Suivre l'initiation d'un paiement auprès de la passerelle (URL de paiement une fois prête)"""
+        paiement = self.get_object()
+        return Response(initiation_service.etat(paiement))
+    
+    def _recevoir_notification(self, fournisseur, request):
+        donnees = request.data.dict() if hasattr(request.data, 'dict') else dict(request.data)
+        try:
+            webhook_service.recevoir(fournisseur, donnees)
+        except NotificationInvalide as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Notification reçue'})
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
     def cinetpay_notification(self, request):
-        """Webhook pour les notifications CinetPay"""
-        result = payment_service.traiter_notification_cinetpay(request.data)
-        
-        if result['success']:
-            return Response({'message': 'Notification traitée avec succès'})
-        else:
-            return Response(
-                {'error': result['error']},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        """Webhook pour les notifications CinetPay (enregistrées, puis traitées en arrière-plan)"""
+        return self._recevoir_notification('cinetpay', request)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdmin])
+    def metriques_passerelles(self, request):
+        """Latences et état des disjoncteurs des passerelles de paiement (processus courant)"""
+        return Response(passerelle_http.metriques_passerelles())
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
     def paydunya_notification(self, request):
-        """Webhook pour les notifications PayDunya"""
-        result = payment_service.traiter_notification_paydunya(request.data)
-        
-        if result['success']:
-            return Response({'message': 'Notification traitée avec succès'})
-        else:
-            return Response(
-                {'error': result['error']},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        """Webhook pour les notifications PayDunya (enregistrées, puis traitées en arrière-plan)"""
+        return self._recevoir_notification('paydunya', request)
 
 
 class TransactionExterneViewSet(viewsets.ModelViewSet):
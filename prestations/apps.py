@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PrestationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'prestations'
+    
+    def ready(self):
+        # Invalidation du catalogue en cache à chaque enregistrement
+        from . import signals  # noqa: F401
@@ -0,0 +1,94 @@
+"""
+Catalogue des prestations pré-sérialisé
+
+Le catalogue change rarement mais est lu à chaque session de paiement (chaque
+QR code scanné). Il est sérialisé une fois, rendu en JSON et rangé tel quel
+(octets) dans le cache partagé, sous une clé versionnée:
+
+    catalogue_prestations:v<version>:<variante>
+
+Toute création, modification ou suppression d'une prestation incrémente la
+version (signaux post_save / post_delete, après validation). La version sert
+aussi d'ETag: un navigateur à jour reçoit un 304 sans aucune requête en base.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from salon_paiement import cache as cache_versionne
+from salon_paiement.conditionnel import calculer_etag
+
+ESPACE_CACHE = 'catalogue_prestations'
+
+# Paramètres de requête de la liste servis depuis le catalogue: aucun (toutes
+# les prestations) ou actif=true (session de paiement)
+VARIANTES_LISTE = {
+    (): 'toutes',
+    (('actif', 'true'),): 'actives',
+}
+
+
+class CatalogueService:
+    """Instantanés JSON de la liste des prestations et de leur regroupement par type"""
+
+    def version(self):
+        return cache_versionne.version(ESPACE_CACHE)
+
+    def invalider(self):
+        """Rendre le catalogue obsolète, pour tous les workers, après validation"""
+        transaction.on_commit(lambda: cache_versionne.invalider(ESPACE_CACHE))
+
+    def variante_liste(self, query_params):
+        """Variante du catalogue correspondant aux paramètres de la liste (None: requête ordinaire)"""
+        parametres = tuple(sorted((cle, valeur.lower()) for cle, valeur in query_params.items()))
+        return VARIANTES_LISTE.get(parametres)
+
+    def etag(self, variante):
+        return calculer_etag(ESPACE_CACHE, self.version(), variante)
+
+    def contenu(self, variante):
+        """Octets JSON de la variante, construits au premier appel après chaque modification"""
+        construire = self._construire_par_type if variante == 'par_type' else (
+            lambda: self._construire_liste(actives=variante == 'actives')
+        )
+        return cache_versionne.obtenir(ESPACE_CACHE, variante, calculer=construire)
+
+    def reponse(self, contenu):
+        return HttpResponse(contenu, content_type='application/json')
+
+    def _prestations(self, actives):
+        from .models import Prestation
+
+        prestations = Prestation.objects.order_by('type_prestation', 'nom')
+        return prestations.filter(actif=True) if actives else prestations
+
+    def _construire_liste(self, actives):
+        """Même enveloppe que la liste paginée (page unique)"""
+        from .serializers import PrestationListSerializer
+
+        taille_page = settings.REST_FRAMEWORK.get('PAGE_SIZE')
+        resultats = PrestationListSerializer(self._prestations(actives), many=True).data
+        if taille_page and len(resultats) > taille_page:
+            # Plus d'une page: la liste paginée ordinaire s'applique (b'' et non
+            # None, pour ne pas reconstruire à chaque appel)
+            return b''
+        return JSONRenderer().render({
+            'count': len(resultats),
+            'next': None,
+            'previous': None,
+            'results': resultats,
+        })
+
+    def _construire_par_type(self):
+        from .serializers import PrestationListSerializer
+
+        resultat = {}
+        for prestation in self._prestations(actives=True):
+            resultat.setdefault(prestation.get_type_prestation_display(), []).append(
+                PrestationListSerializer(prestation).data
+            )
+        return JSONRenderer().render(resultat)
+
+
+# Instance unique du service
+catalogue_service = CatalogueService()
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .catalogue import catalogue_service
+from .models import Prestation
+
+
+@receiver(post_save, sender=Prestation)
+@receiver(post_delete, sender=Prestation)
+def invalider_catalogue(sender, **kwargs):
+    """Le catalogue pré-sérialisé devient obsolète"""
+    catalogue_service.invalider()
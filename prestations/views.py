@@ -2,16 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from salon_paiement.conditionnel import GetConditionnelMixin
 from salon_paiement.permissions import CanManagePrestations, IsOwnerOrAdmin, CanViewCreatePrestations
 from django.db.models import Q, ProtectedError
 from django.utils.translation import gettext_lazy as _
+from .catalogue import catalogue_service
 from .models import Prestation
 from .serializers import PrestationSerializer, PrestationListSerializer, PrestationDetailSerializer
 
 
-class PrestationViewSet(viewsets.ModelViewSet):
+class PrestationViewSet(GetConditionnelMixin, viewsets.ModelViewSet):
     """
     API endpoint pour la gestion des prestations
+    (liste avec ETag: 304 si rien n'a changé depuis le dernier appel)
     """
     queryset = Prestation.objects.all()
     serializer_class = PrestationSerializer
@@ -55,19 +58,29 @@ class PrestationViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('type_prestation', 'nom')
     
-    @action(detail=False, methods=['get'])
-    def par_type(self, request):
-        """Retourner les prestations groupées par type"""
-        prestations = Prestation.objects.filter(actif=True)
-        result = {}
+    def list(self, request, *args, **kwargs):
+        """Liste; le catalogue complet ou actif (session de paiement) est servi depuis le cache"""
+        variante = catalogue_service.variante_liste(request.query_params)
+        if variante is None:
+            return super().list(request, *args, **kwargs)
         
-        for prestation in prestations:
-            type_key = prestation.get_type_prestation_display()
-            if type_key not in result:
-                result[type_key] = []
-            result[type_key].append(PrestationListSerializer(prestation).data)
+        def produire():
+            contenu = catalogue_service.contenu(variante)
+            if not contenu:
+                # Catalogue de plus d'une page
+                return super(PrestationViewSet, self).list(request, *args, **kwargs)
+            return catalogue_service.reponse(contenu)
         
-        return Response(result)
+        return self.reponse_conditionnelle(request, produire, etag=catalogue_service.etag(variante))
+    
+    @action(detail=False, methods=['get'])
+    def par_type(self, request):
+        """Retourner les prestations groupées par type (depuis le catalogue en cache)"""
+        return self.reponse_conditionnelle(
+            request,
+            lambda: catalogue_service.reponse(catalogue_service.contenu('par_type')),
+            etag=catalogue_service.etag('par_type')
+        )
     
     @action(detail=False, methods=['post'])
     def creer_prestations_defaut(self, request):
@@ -7,13 +7,13 @@ class QRCodeAdmin(admin.ModelAdmin):
     list_display = ['id', 'type_qr', 'client', 'statut', 'date_generation', 'date_expiration', 'nombre_scans', 'actif']
     list_filter = ['type_qr', 'statut', 'actif', 'date_generation']
     search_fields = ['client__nom', 'client__prenom', 'client__telephone', 'contenu']
-    readonly_fields = ['id', 'date_generation', 'date_scan', 'nombre_scans']
+    readonly_fields = ['id', 'date_generation', 'date_scan', 'nombre_scans', 'empreinte']
     fieldsets = (
         ('Informations de base', {
             'fields': ('type_qr', 'client', 'statut')
         }),
         ('Contenu et image', {
-            'fields': ('contenu', 'image_qr')
+            'fields': ('contenu', 'image_qr', 'empreinte')
         }),
         ('Dates et suivi', {
             'fields': ('date_generation', 'date_scan', 'date_expiration')
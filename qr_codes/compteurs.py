@@ -0,0 +1,152 @@
+"""
+Compteurs de scans des QR codes
+
+Par défaut chaque scan est une mise à jour atomique en base
+(nombre_scans = nombre_scans + 1), sans relire ni réécrire la ligne.
+
+Pour les QR codes très scannés (chevalets de comptoir), le mode tampon
+(QR_CODES_SCANS['TAMPON']) compte les scans dans le cache partagé et les reporte
+en base périodiquement (commande vider_compteurs_scans): une seule mise à jour
+par QR code et par report. Ce mode suppose un cache commun à tous les processus
+(Redis); avec un cache local, chaque processus garde ses propres compteurs.
+
+Le premier scan d'un QR code depuis le dernier report l'inscrit dans une liste
+numérotée (clés <préfixe>:a_reporter:<position>): le report ne parcourt que ces
+QR codes, jamais toute la table. La position est attribuée (incr) avant que le
+QR code n'y soit écrit: le report s'arrête à la première position encore vide
+et la reprend au passage suivant; une position restée vide plus d'une minute
+(processus interrompu entre les deux) est abandonnée, et l'inscription du QR
+code expire au bout d'une heure pour qu'un scan suivant le réinscrive.
+"""
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from .models import QRCode
+
+logger = logging.getLogger(__name__)
+
+# Délai (secondes) au-delà duquel une position de la liste restée vide est abandonnée
+DELAI_POSITION_VIDE = 60
+# Durée de l'inscription d'un QR code à reporter: filet de sécurité si sa position est perdue
+DUREE_INSCRIPTION = 3600
+
+
+def configuration():
+    return getattr(settings, 'QR_CODES_SCANS', {})
+
+
+class CompteurScans:
+    """Enregistrement des scans, immédiat ou via le cache"""
+
+    PREFIXE = 'qr_codes:scans'
+
+    def tampon_actif(self):
+        return configuration().get('TAMPON', False)
+
+    def _cle(self, pk, suffixe='nombre'):
+        return f'{self.PREFIXE}:{suffixe}:{pk}'
+
+    def _incrementer(self, cle):
+        cache.add(cle, 0, timeout=None)
+        return cache.incr(cle)
+
+    def enregistrer(self, qr_code):
+        """Compter un scan. Retourne le nombre de scans, ceux en attente de report compris."""
+        maintenant = timezone.now()
+        if not self.tampon_actif():
+            QRCode.objects.filter(pk=qr_code.pk).update(
+                nombre_scans=F('nombre_scans') + 1,
+                statut='scanne',
+                date_scan=maintenant
+            )
+            qr_code.refresh_from_db(fields=['nombre_scans', 'statut', 'date_scan'])
+            return qr_code.nombre_scans
+
+        en_attente = self._incrementer(self._cle(qr_code.pk))
+        cache.set(self._cle(qr_code.pk, 'date'), maintenant, timeout=None)
+        if cache.add(self._cle(qr_code.pk, 'inscrit'), 1, timeout=DUREE_INSCRIPTION):
+            # Premier scan depuis le dernier report: inscrire le QR code à reporter
+            position = self._incrementer(f'{self.PREFIXE}:fin')
+            cache.set(self._cle(position, 'a_reporter'), qr_code.pk, timeout=None)
+        return qr_code.nombre_scans + en_attente
+
+    def en_attente(self, qr_code):
+        """Scans comptés dans le cache et pas encore reportés en base"""
+        return cache.get(self._cle(qr_code.pk)) or 0
+
+    def vider(self, taille_lot=500):
+        """
+        Reporter en base les scans en attente des QR codes inscrits depuis le
+        dernier report. Retourne (nombre de QR codes mis à jour, nombre de scans reportés).
+        """
+        bilan = [0, 0]
+        verrou = f'{self.PREFIXE}:verrou'
+        if not cache.add(verrou, 1, timeout=300):
+            # Report précédent encore en cours: ne pas retrancher deux fois les mêmes scans
+            logger.info("Report des scans déjà en cours, ignoré")
+            return tuple(bilan)
+        try:
+            debut = (cache.get(f'{self.PREFIXE}:debut') or 0) + 1
+            fin = cache.get(f'{self.PREFIXE}:fin') or 0
+            for premiere in range(debut, fin + 1, taille_lot):
+                positions = range(premiere, min(premiere + taille_lot, fin + 1))
+                trouves = cache.get_many([self._cle(position, 'a_reporter') for position in positions])
+                lues = []
+                for position in positions:
+                    if self._cle(position, 'a_reporter') not in trouves and not self._position_abandonnee(position):
+                        # Inscription en cours d'écriture: reprise à cette position la fois suivante
+                        break
+                    lues.append(position)
+                if not lues:
+                    break
+
+                cles = [self._cle(position, 'a_reporter') for position in lues]
+                lot = {trouves[cle] for cle in cles if cle in trouves}
+                # Désinscrire avant de lire les compteurs: un scan arrivant pendant le
+                # report réinscrit le QR code et sera reporté la fois suivante
+                cache.delete_many([self._cle(pk, 'inscrit') for pk in lot])
+                self._vider_lot(list(lot), bilan)
+                cache.delete_many(cles + [self._cle(position, 'vide_depuis') for position in lues])
+                cache.set(f'{self.PREFIXE}:debut', lues[-1], timeout=None)
+                if len(lues) < len(positions):
+                    break
+        finally:
+            cache.delete(verrou)
+        return tuple(bilan)
+
+    def _position_abandonnee(self, position):
+        """Position vide depuis plus de DELAI_POSITION_VIDE secondes (inscription perdue)"""
+        cle = self._cle(position, 'vide_depuis')
+        cache.add(cle, time.time(), timeout=DUREE_INSCRIPTION)
+        vide_depuis = cache.get(cle) or time.time()
+        return time.time() - vide_depuis > DELAI_POSITION_VIDE
+
+    def _vider_lot(self, lot, bilan):
+        cles = {self._cle(pk): pk for pk in lot}
+        a_reporter = {cles[cle]: nombre for cle, nombre in cache.get_many(list(cles)).items() if nombre}
+        if not a_reporter:
+            return
+        dates = cache.get_many([self._cle(pk, 'date') for pk in a_reporter])
+
+        for pk, nombre in a_reporter.items():
+            # Retrancher ce qui est reporté: les scans arrivés entre-temps restent en attente
+            cache.decr(self._cle(pk), nombre)
+            try:
+                QRCode.objects.filter(pk=pk).update(
+                    nombre_scans=F('nombre_scans') + nombre,
+                    statut='scanne',
+                    date_scan=dates.get(self._cle(pk, 'date')) or timezone.now()
+                )
+            except Exception:
+                logger.exception(f"Report des scans du QR code {pk} impossible, remis en attente")
+                cache.incr(self._cle(pk), nombre)
+                continue
+            bilan[0] += 1
+            bilan[1] += nombre
+
+
+# Instance unique du service
+compteur_scans = CompteurScans()
@@ -0,0 +1,206 @@
+"""
+Génération de QR codes par lots
+
+Utilisée à l'ouverture d'un salon (un QR code d'identification par client ou
+par poste): les images manquantes sont dessinées en parallèle dans un pool de
+processus, les lignes insérées avec bulk_create, et le résultat peut être
+exporté en archive ZIP ou en PDF d'une page par QR code.
+"""
+import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+from clients.models import Client
+from .models import QRCode
+from .rendu import (
+    calculer_empreinte, chemin_image, dessiner_png, parametres_rendu, rendu_qr_service, stocker_images
+)
+
+
+class LotInvalide(ValueError):
+    """Demande de génération incohérente (client inconnu, type ou date invalide, lot vide ou trop grand)"""
+
+
+def configuration():
+    return getattr(settings, 'QR_CODES_LOT', {})
+
+
+def contenu_par_defaut(type_qr, client):
+    """Contenu encodé quand l'appelant n'en fournit pas: le type et le client"""
+    return json.dumps({'type': type_qr, 'client_id': str(client.id)})
+
+
+class GenerationLotService:
+    """Création de nombreux QR codes en une seule opération"""
+
+    def preparer(self, elements, type_qr='identification', date_expiration=None):
+        """
+        Construire les QR codes (non enregistrés) d'une liste d'éléments
+        {'client_id': ..., 'contenu': ..., 'libelle': ...}, chaque clé étant facultative
+        mais un élément devant avoir un client ou un contenu.
+        """
+        taille_max = configuration().get('TAILLE_MAX', 1000)
+        if not elements:
+            raise LotInvalide("Aucun élément à générer")
+        if len(elements) > taille_max:
+            raise LotInvalide(f"Au plus {taille_max} QR codes par lot")
+        if type_qr not in dict(QRCode.TYPE_QR_CHOICES):
+            raise LotInvalide(f"Type de QR code inconnu: {type_qr}")
+        if isinstance(date_expiration, str):
+            try:
+                date_expiration = parse_datetime(date_expiration)
+            except ValueError:
+                date_expiration = None
+            if date_expiration is None:
+                raise LotInvalide("Date d'expiration invalide (format ISO 8601 attendu)")
+        if date_expiration is not None and timezone.is_naive(date_expiration):
+            date_expiration = timezone.make_aware(date_expiration)
+
+        ids_clients = {str(element['client_id']) for element in elements if element.get('client_id')}
+        try:
+            clients = {str(client.id): client for client in Client.objects.filter(id__in=ids_clients)}
+        except ValidationError:
+            raise LotInvalide("Identifiant de client invalide")
+        inconnus = ids_clients - set(clients)
+        if inconnus:
+            raise LotInvalide(f"Clients introuvables: {', '.join(sorted(inconnus))}")
+
+        if date_expiration is None and type_qr != 'identification':
+            # Même règle que QRCode.save(), que bulk_create n'appelle pas
+            date_expiration = timezone.now() + timedelta(hours=24)
+
+        qr_codes = []
+        for element in elements:
+            client = clients.get(str(element.get('client_id') or ''))
+            contenu = element.get('contenu') or (client and contenu_par_defaut(type_qr, client))
+            if not contenu:
+                raise LotInvalide("Chaque élément doit avoir un client ou un contenu")
+            qr_code = QRCode(
+                client=client,
+                type_qr=type_qr,
+                contenu=contenu,
+                date_expiration=date_expiration,
+                empreinte=calculer_empreinte(contenu)
+            )
+            if stocker_images():
+                qr_code.image_qr.name = chemin_image(qr_code.empreinte)
+            qr_code.libelle = element.get('libelle') or (client.nom_complet if client else '')
+            qr_codes.append(qr_code)
+        return qr_codes
+
+    def rendre(self, qr_codes, workers=None):
+        """
+        Dessiner en parallèle les images absentes du stockage (une fois par empreinte).
+        Retourne les octets PNG par empreinte, images existantes comprises.
+        """
+        stocker = stocker_images()
+        contenus = {qr_code.empreinte: qr_code.contenu for qr_code in qr_codes}
+        images = {}
+        a_dessiner = []
+        for empreinte, contenu in contenus.items():
+            octets = rendu_qr_service.cache.obtenir(empreinte)
+            # Réserver l'image (protégée de la purge jusqu'à l'enregistrement des lignes)
+            existe = stocker and rendu_qr_service.reserver(chemin_image(empreinte))
+            if octets is None and existe:
+                with rendu_qr_service.stockage.open(chemin_image(empreinte), 'rb') as fichier:
+                    octets = fichier.read()
+            if octets is None:
+                a_dessiner.append(empreinte)
+            else:
+                if stocker and not existe:
+                    rendu_qr_service.ecrire(chemin_image(empreinte), octets)
+                images[empreinte] = octets
+
+        if a_dessiner:
+            parametres = parametres_rendu()
+            workers = workers or configuration().get('PROCESSUS') or os.cpu_count()
+            if len(a_dessiner) == 1 or workers == 1:
+                rendus = [dessiner_png(contenus[empreinte], parametres) for empreinte in a_dessiner]
+            else:
+                # 'spawn' et non fork: un fork copierait les connexions (base, cache)
+                # et les verrous du processus appelant
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, len(a_dessiner)),
+                    mp_context=multiprocessing.get_context('spawn')
+                ) as pool:
+                    rendus = list(pool.map(
+                        dessiner_png,
+                        [contenus[empreinte] for empreinte in a_dessiner],
+                        [parametres] * len(a_dessiner),
+                        chunksize=max(1, len(a_dessiner) // (workers * 4))
+                    ))
+            for empreinte, octets in zip(a_dessiner, rendus):
+                if stocker:
+                    rendu_qr_service.ecrire(chemin_image(empreinte), octets)
+                images[empreinte] = octets
+        return images
+
+    def generer(self, elements, type_qr='identification', date_expiration=None, workers=None,
+                avec_images=True):
+        """
+        Créer les QR codes d'un lot. Retourne (qr_codes, images par empreinte).
+        Les images sont écrites avant l'insertion: une ligne ne pointe jamais vers
+        un fichier absent. Sans export ni enregistrement des images
+        (`avec_images=False`), rien n'est dessiné.
+        """
+        qr_codes = self.preparer(elements, type_qr, date_expiration)
+        images = self.rendre(qr_codes, workers) if avec_images or stocker_images() else {}
+        with transaction.atomic():
+            QRCode.objects.bulk_create(qr_codes, batch_size=500)
+        return qr_codes, images
+
+    # --- Exports ---
+
+    FORMATS_EXPORT = {
+        'zip': 'application/zip',
+        'pdf': 'application/pdf',
+    }
+
+    def exporter(self, format_export, qr_codes, images):
+        """Octets de l'export demandé ('zip' ou 'pdf')"""
+        if format_export not in self.FORMATS_EXPORT:
+            raise LotInvalide(f"Format d'export inconnu: {format_export}")
+        if format_export == 'pdf':
+            return self.exporter_pdf(qr_codes, images)
+        return self.exporter_zip(qr_codes, images)
+
+    def nom_fichier(self, qr_code):
+        libelle = slugify(qr_code.libelle)[:50]
+        return f"{libelle + '_' if libelle else ''}{qr_code.id}.png"
+
+    def exporter_zip(self, qr_codes, images):
+        tampon = BytesIO()
+        with zipfile.ZipFile(tampon, 'w', zipfile.ZIP_STORED) as archive:
+            # Les PNG sont déjà compressés
+            for qr_code in qr_codes:
+                archive.writestr(self.nom_fichier(qr_code), images[qr_code.empreinte])
+        return tampon.getvalue()
+
+    def exporter_pdf(self, qr_codes, images):
+        """Une page par QR code, avec son libellé sous l'image"""
+        from PIL import Image, ImageDraw
+
+        pages = []
+        for qr_code in qr_codes:
+            image = Image.open(BytesIO(images[qr_code.empreinte])).convert('RGB')
+            page = Image.new('RGB', (image.width, image.height + 40), 'white')
+            page.paste(image, (0, 0))
+            if qr_code.libelle:
+                ImageDraw.Draw(page).text((20, image.height + 10), qr_code.libelle[:60], fill='black')
+            pages.append(page)
+        tampon = BytesIO()
+        pages[0].save(tampon, format='PDF', save_all=True, append_images=pages[1:], resolution=150)
+        return tampon.getvalue()
+
+
+# Instance unique du service
+generation_lot_service = GenerationLotService()
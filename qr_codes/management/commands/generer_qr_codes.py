@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from clients.models import Client
+from qr_codes.generation import configuration, generation_lot_service, LotInvalide
+from qr_codes.models import QRCode
+
+
+class Command(BaseCommand):
+    help = "Générer un lot de QR codes (par client ou par contenu) et les exporter en ZIP ou PDF"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', nargs='+', default=[], help="IDs des clients")
+        parser.add_argument('--tous-clients', action='store_true', help="Un QR code par client actif")
+        parser.add_argument(
+            '--fichier',
+            help="Fichier texte de contenus, une ligne par QR code (libellé facultatif après une tabulation)"
+        )
+        parser.add_argument(
+            '--type',
+            default='identification',
+            choices=[choix for choix, _ in QRCode.TYPE_QR_CHOICES],
+            help="Type des QR codes générés"
+        )
+        parser.add_argument('--format', default='zip', choices=['zip', 'pdf'], help="Format de l'export")
+        parser.add_argument('--sortie', help="Fichier d'export (défaut: qr_codes_<type>.<format>)")
+        parser.add_argument('--processus', type=int, help="Processus de rendu (défaut: nombre de CPU)")
+
+    def handle(self, *args, **options):
+        elements = [{'client_id': client_id} for client_id in options['clients']]
+        if options['tous_clients']:
+            elements += [
+                {'client_id': client_id}
+                for client_id in Client.objects.filter(actif=True).values_list('id', flat=True)
+            ]
+        if options['fichier']:
+            with open(options['fichier'], encoding='utf-8') as fichier:
+                for ligne in fichier:
+                    contenu, _, libelle = ligne.rstrip('\n').partition('\t')
+                    if contenu.strip():
+                        elements.append({'contenu': contenu.strip(), 'libelle': libelle.strip()})
+
+        if not elements:
+            raise CommandError("Aucun élément à générer")
+
+        # Par lots de TAILLE_MAX (limite de generer()), réunis dans un seul export
+        taille_lot = configuration().get('TAILLE_MAX', 1000)
+        qr_codes, images = [], {}
+        try:
+            for debut in range(0, len(elements), taille_lot):
+                lot, images_lot = generation_lot_service.generer(
+                    elements[debut:debut + taille_lot], type_qr=options['type'], workers=options['processus']
+                )
+                qr_codes += lot
+                images.update(images_lot)
+                self.stdout.write(f"{len(qr_codes)}/{len(elements)} QR codes créés")
+            export = generation_lot_service.exporter(options['format'], qr_codes, images)
+        except LotInvalide as e:
+            raise CommandError(str(e))
+
+        sortie = options['sortie'] or f"qr_codes_{options['type']}.{options['format']}"
+        with open(sortie, 'wb') as fichier:
+            fichier.write(export)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(qr_codes)} QR codes créés ({len(images)} images distinctes), export: {sortie}"
+        ))
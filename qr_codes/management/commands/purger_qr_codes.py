@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from qr_codes.purge import configuration, purge_qr_codes_service
+
+
+class Command(BaseCommand):
+    help = "Supprimer par lots les QR codes expirés et leurs images devenues orphelines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--age',
+            type=int,
+            help="Jours écoulés depuis l'expiration (défaut: QR_CODES_PURGE['AGE_JOURS'])"
+        )
+        parser.add_argument('--lot', type=int, help="Nombre de QR codes supprimés par transaction")
+        parser.add_argument('--pause', type=float, help="Pause en secondes entre deux lots")
+        parser.add_argument('--max-lots', type=int, help="Arrêter après ce nombre de lots")
+        parser.add_argument(
+            '--simulation',
+            action='store_true',
+            help="Compter les QR codes concernés sans rien supprimer"
+        )
+
+    def handle(self, *args, **options):
+        avant = purge_qr_codes_service.date_limite(options['age'])
+        if options['simulation']:
+            nombre = purge_qr_codes_service.estimer(avant)
+            self.stdout.write(f"{nombre} QR codes expirés avant le {avant:%Y-%m-%d %H:%M} seraient supprimés")
+            return
+
+        bilan = purge_qr_codes_service.purger(
+            avant,
+            taille_lot=options['lot'] or configuration().get('TAILLE_LOT', 1000),
+            pause=configuration().get('PAUSE', 0) if options['pause'] is None else options['pause'],
+            limite_lots=options['max_lots']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{bilan['supprimes']} QR codes supprimés en {bilan['lots']} lots, "
+            f"{bilan['images']} images orphelines à supprimer, "
+            f"{bilan['duree']:.1f} s ({bilan['par_seconde']:.0f} lignes/s)"
+        ))
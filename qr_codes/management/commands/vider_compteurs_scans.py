@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from qr_codes.compteurs import compteur_scans
+
+
+class Command(BaseCommand):
+    help = "Reporter en base les scans de QR codes comptés dans le cache (mode tampon)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=500, help="Nombre de QR codes à reporter par lot")
+
+    def handle(self, *args, **options):
+        qr_codes, scans = compteur_scans.vider(taille_lot=options['lot'])
+        self.stdout.write(self.style.SUCCESS(f"{scans} scans reportés sur {qr_codes} QR codes"))
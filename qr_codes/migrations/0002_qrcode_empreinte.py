@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_codes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qrcode',
+            name='empreinte',
+            field=models.CharField(blank=True, db_index=True, default='', help_text="SHA-256 du contenu et des paramètres de rendu (nom de l'image partagée)", max_length=64),
+        ),
+    ]
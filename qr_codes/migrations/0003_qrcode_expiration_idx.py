@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_codes', '0002_qrcode_empreinte'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='qrcode',
+            index=models.Index(fields=['date_expiration'], name='qr_codes_expiration_idx'),
+        ),
+    ]
@@ -1,9 +1,7 @@
 from django.db import models
 import uuid
-import qrcode
-from io import BytesIO
-from django.core.files.base import ContentFile
 from clients.models import Client
+from .rendu import calculer_empreinte, rendu_qr_service, stocker_images
 
 
 class QRCode(models.Model):
@@ -45,6 +43,13 @@ class QRCode(models.Model):
         null=True,
         help_text="Image du QR code généré"
     )
+    empreinte = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text="SHA-256 du contenu et des paramètres de rendu (nom de l'image partagée)"
+    )
     nombre_scans = models.PositiveIntegerField(default=0)
     actif = models.BooleanField(default=True)
     
@@ -53,39 +58,43 @@ class QRCode(models.Model):
         verbose_name = 'QR Code'
         verbose_name_plural = 'QR Codes'
         ordering = ['-date_generation']
+        indexes = [
+            models.Index(fields=['date_expiration'], name='qr_codes_expiration_idx'),
+        ]
     
     def __str__(self):
         client_info = f" - {self.client.nom_complet}" if self.client else ""
         return f"QR Code {self.get_type_qr_display()}{client_info}"
     
-    def generer_qr_code(self):
-        """Génère l'image du QR code et la sauvegarde"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(self.contenu)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Sauvegarder l'image dans un buffer
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        # Générer un nom de fichier unique
-        filename = f"qr_{self.id}_{self.type_qr}.png"
-        
-        # Sauvegarder l'image dans le modèle
-        self.image_qr.save(filename, ContentFile(buffer.getvalue()), save=False)
+    def generer_qr_code(self, force=False):
+        """
+        Associer l'image du QR code à son contenu.
+        Les images sont partagées entre QR codes de même contenu: rien n'est
+        dessiné ni écrit si l'empreinte n'a pas changé. Avec `force`, la présence
+        du fichier est revérifiée (image supprimée du disque).
+        Sans enregistrement des images (QR_CODES_RENDU['STOCKER_IMAGES']), seule
+        l'empreinte est mise à jour: l'image est rendue à la demande (url_image).
+        Retourne True si l'image a été (ré)associée.
+        """
+        stocker = stocker_images()
+        if (not force and self.empreinte == calculer_empreinte(self.contenu)
+                and (self.image_qr or not stocker)):
+            return False
+        if stocker:
+            self.empreinte, self.image_qr.name = rendu_qr_service.stocker(self.contenu)
+        else:
+            self.empreinte = calculer_empreinte(self.contenu)
+        return True
+    
+    def url_image(self, format_image='png'):
+        """URL de l'image rendue à la volée, versionnée par l'empreinte (cache immuable)"""
+        from django.urls import reverse
+        return f"{reverse('qrcode-image', args=[self.pk])}?type_image={format_image}&v={self.empreinte}"
         
     def save(self, *args, **kwargs):
-        # Générer le QR code si le contenu est défini et qu'aucune image n'existe
-        if self.contenu and not self.image_qr:
-            self.generer_qr_code()
+        # (Ré)associer l'image si le contenu a changé depuis le dernier rendu
+        if self.contenu and self.generer_qr_code() and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'image_qr', 'empreinte'}
         
         # Définir une date d'expiration si non définie (24h par défaut)
         if not self.date_expiration and self.type_qr != 'identification':
@@ -107,14 +116,14 @@ class QRCode(models.Model):
         return True
     
     def marquer_comme_scanne(self):
-        """Marque le QR code comme scanné"""
-        from django.utils import timezone
-        self.statut = 'scanne'
-        self.date_scan = timezone.now()
-        self.nombre_scans += 1
-        self.save()
+        """
+        Marque le QR code comme scanné (incrément atomique, ou différé en mode tampon).
+        Retourne le nombre de scans.
+        """
+        from .compteurs import compteur_scans
+        return compteur_scans.enregistrer(self)
     
     def marquer_comme_utilise(self):
         """Marque le QR code comme utilisé"""
         self.statut = 'utilise'
-        self.save()
+        self.save(update_fields=['statut'])
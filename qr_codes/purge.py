@@ -0,0 +1,111 @@
+"""
+Purge des QR codes expirés
+
+Les QR codes expirés depuis plus de `age_jours` sont supprimés par petits lots
+de clés primaires, chaque lot dans sa propre transaction courte: la table n'est
+jamais verrouillée longtemps et la purge peut tourner en journée (`pause` laisse
+respirer la base entre deux lots).
+
+Les images étant partagées entre QR codes de même contenu (voir rendu.py), un
+fichier n'est supprimé que s'il n'est plus référencé par aucune ligne; les
+suppressions de fichiers sont faites en arrière-plan (tâche
+qr_codes.supprimer_images).
+"""
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import QRCode
+
+logger = logging.getLogger(__name__)
+
+
+def configuration():
+    return getattr(settings, 'QR_CODES_PURGE', {})
+
+
+def images_orphelines(noms):
+    """Parmi `noms`, les images qui ne sont plus référencées par aucun QR code"""
+    noms = set(noms)
+    if not noms:
+        return set()
+    references = set(QRCode.objects.filter(image_qr__in=noms).values_list('image_qr', flat=True))
+    return noms - references
+
+
+class PurgeQRCodesService:
+    """Suppression par lots des QR codes expirés et de leurs images"""
+
+    def date_limite(self, age_jours=None):
+        """Date d'expiration en deçà de laquelle un QR code est purgé"""
+        if age_jours is None:
+            age_jours = configuration().get('AGE_JOURS', 30)
+        return timezone.now() - timedelta(days=age_jours)
+
+    def a_purger(self, avant):
+        return QRCode.objects.filter(date_expiration__lt=avant)
+
+    def estimer(self, avant):
+        return self.a_purger(avant).count()
+
+    def purger(self, avant, taille_lot=1000, pause=0, limite_lots=None):
+        """
+        Supprimer les QR codes expirés avant `avant`, lot par lot.
+        Retourne un bilan: lignes supprimées, lots, images orphelines envoyées
+        à la suppression, durée et débit.
+        """
+        from .tasks import supprimer_images
+
+        debut = time.monotonic()
+        bilan = {'supprimes': 0, 'lots': 0, 'images': 0}
+        dernier = None
+        while limite_lots is None or bilan['lots'] < limite_lots:
+            # Parcours dans l'ordre de l'index (date_expiration, pk), en reprenant après le
+            # dernier élément du lot précédent: chaque lot ne lit que ses propres lignes
+            queryset = self.a_purger(avant).order_by('date_expiration', 'pk')
+            if dernier is not None:
+                date, pk = dernier
+                queryset = queryset.filter(date_expiration__gte=date).exclude(
+                    date_expiration=date, pk__lte=pk
+                )
+            lignes = list(queryset.values_list('pk', 'date_expiration', 'image_qr')[:taille_lot])
+            if not lignes:
+                break
+            dernier = lignes[-1][1], lignes[-1][0]
+
+            with transaction.atomic():
+                supprimes, _ = QRCode.objects.filter(
+                    pk__in=[pk for pk, _, _ in lignes], date_expiration__lt=avant
+                ).delete()
+                orphelines = images_orphelines(image for _, _, image in lignes if image)
+                if orphelines:
+                    supprimer_images.soumettre(sorted(orphelines))
+
+            bilan['supprimes'] += supprimes
+            bilan['images'] += len(orphelines)
+            bilan['lots'] += 1
+            logger.info(
+                f"Purge QR codes: lot {bilan['lots']}, {supprimes} lignes, "
+                f"{len(orphelines)} images ({bilan['supprimes']} au total)"
+            )
+            if pause:
+                time.sleep(pause)
+
+        bilan['duree'] = time.monotonic() - debut
+        bilan['par_seconde'] = bilan['supprimes'] / bilan['duree'] if bilan['duree'] else 0
+        return bilan
+
+
+# Instance unique du service
+purge_qr_codes_service = PurgeQRCodesService()
+
+
+def purger_qr_codes_expires(age_jours=None, taille_lot=None):
+    """Point d'entrée pour les tâches planifiées (cron, tâche d'arrière-plan)"""
+    return purge_qr_codes_service.purger(
+        purge_qr_codes_service.date_limite(age_jours),
+        taille_lot=taille_lot or configuration().get('TAILLE_LOT', 1000),
+        pause=configuration().get('PAUSE', 0)
+    )
@@ -0,0 +1,227 @@
+"""
+Rendu et stockage des images de QR codes
+
+Les images sont adressées par leur contenu: le nom de fichier est l'empreinte
+SHA-256 du contenu encodé et des paramètres de rendu,
+
+    qr_codes/<2 premiers caractères>/<empreinte>.png
+
+Deux QR codes de même contenu (chevalets imprimés, sessions répétées) partagent
+donc le même fichier, écrit une seule fois. Les derniers rendus sont gardés en
+mémoire (LRU) pour éviter de redessiner une image demandée plusieurs fois.
+
+Une image partagée n'est supprimée (purge) que si aucune ligne ne la référence
+ni ne s'apprête à la référencer: avant d'associer une image à un QR code, le
+service la réserve pour quelques minutes (reserver), sous un verrou par fichier
+partagé avec la suppression (verrou_image).
+
+L'enregistrement des images est facultatif (QR_CODES_RENDU['STOCKER_IMAGES']):
+l'API sert aussi chaque QR code à la volée, en SVG ou en PNG à la taille
+demandée, avec des en-têtes de cache HTTP.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+import qrcode
+from django.conf import settings
+from django.core.cache import cache as cache_partage
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PARAMETRES_DEFAUT = {
+    'version': 1,
+    'correction': 'L',
+    'taille_module': 10,
+    'marge': 4,
+    'couleur': 'black',
+    'fond': 'white',
+}
+
+NIVEAUX_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+
+def configuration():
+    return getattr(settings, 'QR_CODES_RENDU', {})
+
+
+def parametres_rendu(parametres=None):
+    """Paramètres complets: défauts, surchargés par les réglages puis par l'appelant"""
+    return dict(PARAMETRES_DEFAUT, **configuration().get('PARAMETRES', {}), **(parametres or {}))
+
+
+def calculer_empreinte(contenu, parametres=None):
+    """Empreinte SHA-256 du contenu et des paramètres de rendu"""
+    description = json.dumps(
+        {'contenu': contenu, 'parametres': parametres_rendu(parametres)},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def stocker_images():
+    """Les images PNG sont-elles enregistrées dans les médias ?"""
+    return configuration().get('STOCKER_IMAGES', True)
+
+
+def chemin_image(empreinte):
+    """Nom de l'image dans le stockage des médias"""
+    return f'qr_codes/{empreinte[:2]}/{empreinte}.png'
+
+
+# Durée (secondes) pendant laquelle une image réservée est protégée de la suppression:
+# largement le temps d'enregistrer la ligne qui la référence
+DUREE_RESERVATION = 600
+
+
+@contextmanager
+def verrou_image(nom, attente=5):
+    """Verrou (cache partagé) sur un fichier d'image; donne False s'il n'a pas été obtenu"""
+    cle = f'qr_codes:verrou_image:{nom}'
+    limite = time.monotonic() + attente
+    obtenu = cache_partage.add(cle, 1, timeout=30)
+    while not obtenu and time.monotonic() < limite:
+        time.sleep(0.05)
+        obtenu = cache_partage.add(cle, 1, timeout=30)
+    try:
+        yield obtenu
+    finally:
+        if obtenu:
+            cache_partage.delete(cle)
+
+
+def image_reservee(nom):
+    return cache_partage.get(f'qr_codes:image_reservee:{nom}') is not None
+
+
+def _preparer(contenu, parametres):
+    qr = qrcode.QRCode(
+        version=parametres['version'],
+        error_correction=NIVEAUX_CORRECTION[parametres['correction']],
+        box_size=parametres['taille_module'],
+        border=parametres['marge'],
+    )
+    qr.add_data(contenu)
+    qr.make(fit=True)
+    if parametres.get('taille'):
+        # Taille demandée en pixels: modules entiers, pour une image nette
+        qr.box_size = max(1, parametres['taille'] // (qr.modules_count + 2 * qr.border))
+    return qr
+
+
+def dessiner_png(contenu, parametres):
+    """
+    Dessiner un QR code en PNG avec des paramètres complets.
+    Fonction de module, sans accès aux réglages: utilisable dans un pool de processus.
+    """
+    image = _preparer(contenu, parametres).make_image(
+        fill_color=parametres['couleur'], back_color=parametres['fond']
+    )
+    tampon = BytesIO()
+    image.save(tampon, format='PNG')
+    return tampon.getvalue()
+
+
+def dessiner_svg(contenu, parametres):
+    """Dessiner un QR code en SVG (un seul chemin, sans Pillow)"""
+    from qrcode.image.svg import SvgPathFillImage
+
+    image = _preparer(contenu, parametres).make_image(image_factory=SvgPathFillImage)
+    tampon = BytesIO()
+    image.save(tampon)
+    return tampon.getvalue()
+
+
+DESSINATEURS = {
+    'png': dessiner_png,
+    'svg': dessiner_svg,
+}
+
+
+class CacheLRU:
+    """Derniers rendus (empreinte -> octets PNG), bornés en nombre d'entrées"""
+
+    def __init__(self, taille):
+        self.taille = taille
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def obtenir(self, cle):
+        with self._verrou:
+            valeur = self._entrees.get(cle)
+            if valeur is not None:
+                self._entrees.move_to_end(cle)
+            return valeur
+
+    def ajouter(self, cle, valeur):
+        if self.taille <= 0:
+            return
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille:
+                self._entrees.popitem(last=False)
+
+
+class RenduQRService:
+    """Rendu des QR codes en PNG et stockage adressé par le contenu"""
+
+    def __init__(self, taille_cache=None, stockage=None):
+        if taille_cache is None:
+            taille_cache = configuration().get('CACHE_TAILLE', 256)
+        self.cache = CacheLRU(taille_cache)
+        self._stockage = stockage
+
+    @property
+    def stockage(self):
+        return self._stockage or default_storage
+
+    def rendre(self, contenu, parametres=None, empreinte=None, format_image='png'):
+        """Octets de l'image ('png' ou 'svg'), depuis le cache mémoire si rendue récemment"""
+        empreinte = empreinte or calculer_empreinte(contenu, parametres)
+        cle = empreinte if format_image == 'png' else f'{empreinte}.{format_image}'
+        octets = self.cache.obtenir(cle)
+        if octets is None:
+            octets = DESSINATEURS[format_image](contenu, parametres_rendu(parametres))
+            self.cache.ajouter(cle, octets)
+        return octets
+
+    def stocker(self, contenu, parametres=None):
+        """
+        Garantir la présence de l'image dans le stockage.
+        Retourne (empreinte, nom du fichier); rien n'est dessiné ni écrit si
+        le fichier existe déjà.
+        """
+        empreinte = calculer_empreinte(contenu, parametres)
+        nom = chemin_image(empreinte)
+        if not self.reserver(nom):
+            self.ecrire(nom, self.rendre(contenu, parametres, empreinte=empreinte))
+        return empreinte, nom
+
+    def reserver(self, nom):
+        """
+        Protéger l'image `nom` de la suppression le temps qu'une ligne la référence.
+        Retourne True si le fichier existe (sinon, à écrire par l'appelant).
+        """
+        with verrou_image(nom):
+            cache_partage.set(f'qr_codes:image_reservee:{nom}', 1, timeout=DUREE_RESERVATION)
+            return self.stockage.exists(nom)
+
+    def ecrire(self, nom, octets):
+        """Écrire une image dans le stockage sous son nom adressé par le contenu"""
+        enregistre = self.stockage.save(nom, ContentFile(octets))
+        if enregistre != nom:
+            # Écrit entre-temps par un autre processus: garder l'original
+            self.stockage.delete(enregistre)
+
+
+# Instance unique du service
+rendu_qr_service = RenduQRService()
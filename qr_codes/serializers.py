@@ -1,24 +1,24 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import QRCode
 
 
 class QRCodeSerializer(serializers.ModelSerializer):
     client_nom_complet = serializers.CharField(source='client.nom_complet', read_only=True)
-    type_qrcode_display = serializers.CharField(source='get_type_qrcode_display', read_only=True)
+    type_qr_display = serializers.CharField(source='get_type_qr_display', read_only=True)
     statut_display = serializers.CharField(source='get_statut_display', read_only=True)
-    est_expire = serializers.ReadOnlyField()
     est_valide = serializers.ReadOnlyField()
+    url_image = serializers.ReadOnlyField()
     
     class Meta:
         model = QRCode
         fields = [
-            'id', 'client', 'client_nom_complet', 'type_qrcode', 'type_qrcode_display',
-            'contenu', 'statut', 'statut_display', 'image', 'date_expiration',
-            'nombre_scans', 'nombre_utilisations', 'est_expire', 'est_valide',
-            'date_creation', 'date_modification'
+            'id', 'client', 'client_nom_complet', 'type_qr', 'type_qr_display',
+            'contenu', 'statut', 'statut_display', 'image_qr', 'url_image', 'empreinte',
+            'date_expiration', 'nombre_scans', 'est_valide', 'date_generation', 'date_scan'
         ]
-        read_only_fields = ['id', 'image', 'nombre_scans', 'nombre_utilisations', 
-                           'date_creation', 'date_modification']
+        read_only_fields = ['id', 'image_qr', 'empreinte', 'nombre_scans',
+                           'date_generation', 'date_scan']
     
     def validate(self, data):
         """Valider les données du QR code"""
@@ -35,41 +35,40 @@ class QRCodeSerializer(serializers.ModelSerializer):
 
 class QRCodeListSerializer(serializers.ModelSerializer):
     client_nom_complet = serializers.CharField(source='client.nom_complet', read_only=True)
-    type_qrcode_display = serializers.CharField(source='get_type_qrcode_display', read_only=True)
+    type_qr_display = serializers.CharField(source='get_type_qr_display', read_only=True)
     statut_display = serializers.CharField(source='get_statut_display', read_only=True)
-    est_expire = serializers.ReadOnlyField()
+    url_image = serializers.ReadOnlyField()
     
     class Meta:
         model = QRCode
         fields = [
-            'id', 'client_nom_complet', 'type_qrcode_display', 'statut_display',
-            'date_expiration', 'est_expire', 'date_creation'
+            'id', 'client_nom_complet', 'type_qr_display', 'statut_display',
+            'url_image', 'date_expiration', 'date_generation'
         ]
 
 
 class QRCodeDetailSerializer(serializers.ModelSerializer):
     client_nom_complet = serializers.CharField(source='client.nom_complet', read_only=True)
-    type_qrcode_display = serializers.CharField(source='get_type_qrcode_display', read_only=True)
+    type_qr_display = serializers.CharField(source='get_type_qr_display', read_only=True)
     statut_display = serializers.CharField(source='get_statut_display', read_only=True)
-    est_expire = serializers.ReadOnlyField()
     est_valide = serializers.ReadOnlyField()
+    url_image = serializers.ReadOnlyField()
     
     class Meta:
         model = QRCode
         fields = [
-            'id', 'client', 'client_nom_complet', 'type_qrcode', 'type_qrcode_display',
-            'contenu', 'statut', 'statut_display', 'image', 'date_expiration',
-            'nombre_scans', 'nombre_utilisations', 'est_expire', 'est_valide',
-            'date_creation', 'date_modification'
+            'id', 'client', 'client_nom_complet', 'type_qr', 'type_qr_display',
+            'contenu', 'statut', 'statut_display', 'image_qr', 'url_image', 'empreinte',
+            'date_expiration', 'nombre_scans', 'est_valide', 'date_generation', 'date_scan'
         ]
-        read_only_fields = ['id', 'image', 'nombre_scans', 'nombre_utilisations', 
-                           'date_creation', 'date_modification']
+        read_only_fields = ['id', 'image_qr', 'empreinte', 'nombre_scans',
+                           'date_generation', 'date_scan']
 
 
 class QRCodeCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = QRCode
-        fields = ['client', 'type_qrcode', 'contenu', 'date_expiration']
+        fields = ['client', 'type_qr', 'contenu', 'date_expiration']
     
     def validate(self, data):
         """Valider les données du QR code"""
@@ -0,0 +1,32 @@
+"""
+Tâches d'arrière-plan des QR codes (Celery ou pool local, voir salon_paiement.taches)
+"""
+import logging
+from salon_paiement.taches import tache
+
+logger = logging.getLogger(__name__)
+
+
+@tache('qr_codes.supprimer_images')
+def supprimer_images(noms):
+    """Supprimer des images de QR codes devenues orphelines"""
+    from .purge import images_orphelines
+    from .rendu import image_reservee, rendu_qr_service, verrou_image
+
+    for nom in sorted(images_orphelines(noms)):
+        # Sous le verrou de l'image: un QR code de même contenu a pu la réserver
+        # (ligne pas encore enregistrée) ou la référencer depuis la première vérification
+        with verrou_image(nom) as obtenu:
+            if not obtenu or image_reservee(nom) or not images_orphelines([nom]):
+                continue
+            try:
+                rendu_qr_service.stockage.delete(nom)
+            except OSError:
+                logger.exception(f"Suppression de l'image {nom} impossible")
+
+
+@tache('qr_codes.purger_expires')
+def purger_expires(age_jours=None):
+    from .purge import purger_qr_codes_expires
+    bilan = purger_qr_codes_expires(age_jours)
+    logger.info(f"Purge QR codes terminée: {bilan}")
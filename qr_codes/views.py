@@ -4,15 +4,25 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from salon_paiement.permissions import CanManageSessions, IsOwnerOrAdmin
 from django.db.models import Q
+from django.http import HttpResponse
 from django.utils import timezone
-from datetime import timedelta
+from clients.recherche import filtre_recherche_client
+from .generation import generation_lot_service, LotInvalide
 from .models import QRCode
+from .rendu import calculer_empreinte, rendu_qr_service
 from .serializers import (
     QRCodeSerializer, QRCodeListSerializer, QRCodeDetailSerializer, 
     QRCodeCreateSerializer
 )
 
 
+TYPES_IMAGE = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+TAILLE_IMAGE_MIN, TAILLE_IMAGE_MAX = 64, 2048
+
+
 class QRCodeViewSet(viewsets.ModelViewSet):
     """
     API endpoint pour la gestion des QR codes
@@ -35,15 +45,10 @@ class QRCodeViewSet(viewsets.ModelViewSet):
         """Filtrer les QR codes selon les paramètres de recherche"""
         queryset = QRCode.objects.select_related('client').all()
         
-        # Recherche par client ou contenu
+        # Recherche par client
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(client__nom__icontains=search) |
-                Q(client__prenom__icontains=search) |
-                Q(client__telephone__icontains=search) |
-                Q(contenu__icontains=search)
-            )
+            queryset = queryset.filter(filtre_recherche_client(search))
         
         # Filtrer par client
         client_id = self.request.query_params.get('client', None)
@@ -51,9 +56,9 @@ class QRCodeViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(client_id=client_id)
         
         # Filtrer par type
-        type_qrcode = self.request.query_params.get('type', None)
-        if type_qrcode:
-            queryset = queryset.filter(type_qrcode=type_qrcode)
+        type_qr = self.request.query_params.get('type', None)
+        if type_qr:
+            queryset = queryset.filter(type_qr=type_qr)
         
         # Filtrer par statut
         statut = self.request.query_params.get('statut', None)
@@ -70,19 +75,18 @@ class QRCodeViewSet(viewsets.ModelViewSet):
                     Q(date_expiration__gte=timezone.now()) | Q(date_expiration__isnull=True)
                 )
         
-        return queryset.order_by('-date_creation')
+        return queryset.order_by('-date_generation')
     
     def perform_create(self, serializer):
-        """Générer l'image du QR code lors de la création"""
-        qr_code = serializer.save()
-        qr_code.generer_image()
-        qr_code.save()
+        """L'image du QR code est associée à l'enregistrement (QRCode.save)"""
+        serializer.save()
     
     @action(detail=False, methods=['post'])
     def generer_pour_client(self, request):
         """Générer un QR code pour un client spécifique"""
         client_id = request.data.get('client_id')
-        type_qrcode = request.data.get('type_qrcode', 'identification')
+        # type_qrcode: ancien nom du champ, encore accepté
+        type_qr = request.data.get('type_qr') or request.data.get('type_qrcode', 'identification')
         contenu = request.data.get('contenu', '')
         date_expiration = request.data.get('date_expiration')
         
@@ -101,42 +105,128 @@ class QRCodeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Créer le QR code
+        # Créer le QR code (image partagée si le contenu a déjà été rendu)
         qr_code = QRCode.objects.create(
             client=client,
-            type_qrcode=type_qrcode,
+            type_qr=type_qr,
             contenu=contenu,
             date_expiration=date_expiration
         )
         
-        # Générer l'image
-        qr_code.generer_image()
-        qr_code.save()
-        
         serializer = QRCodeDetailSerializer(qr_code)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=False, methods=['post'])
+    def generer_lot(self, request):
+        """
+        Générer un lot de QR codes en une requête.
+        Corps: {'type_qr', 'clients': [ids], 'elements': [{'client_id', 'contenu', 'libelle'}],
+        'date_expiration', 'format': 'json' | 'zip' | 'pdf'}
+        """
+        format_export = request.data.get('format', 'json')
+        elements = [{'client_id': client_id} for client_id in request.data.get('clients', [])]
+        elements += list(request.data.get('elements', []))
+        
+        try:
+            qr_codes, images = generation_lot_service.generer(
+                elements,
+                type_qr=request.data.get('type_qr', 'identification'),
+                date_expiration=request.data.get('date_expiration'),
+                # Rendu dans le processus de la requête: les gros lots passent
+                # par la commande generer_qr_codes, qui parallélise
+                workers=1,
+                avec_images=format_export != 'json'
+            )
+            if format_export != 'json':
+                export = generation_lot_service.exporter(format_export, qr_codes, images)
+        except LotInvalide as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if format_export != 'json':
+            reponse = HttpResponse(export, content_type=generation_lot_service.FORMATS_EXPORT[format_export])
+            reponse['Content-Disposition'] = f'attachment; filename="qr_codes.{format_export}"'
+            return reponse
+        
+        return Response({
+            'nombre': len(qr_codes),
+            'qr_codes': [
+                {
+                    'id': str(qr_code.id),
+                    'client': str(qr_code.client_id) if qr_code.client_id else None,
+                    'contenu': qr_code.contenu,
+                    'empreinte': qr_code.empreinte,
+                    'url_image': request.build_absolute_uri(qr_code.url_image())
+                }
+                for qr_code in qr_codes
+            ]
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def image(self, request, pk=None):
+        """
+        Image du QR code rendue à la volée depuis son contenu.
+        ?type_image=png|svg, ?taille=<pixels> (PNG). Avec ?v=<empreinte> courante
+        (voir QRCode.url_image), la réponse est immuable et peut être gardée un an.
+        """
+        format_image = request.query_params.get('type_image', 'png')
+        if format_image not in TYPES_IMAGE:
+            return Response(
+                {'error': f"type_image doit être l'un de: {', '.join(TYPES_IMAGE)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        parametres = {}
+        taille = request.query_params.get('taille')
+        if taille and format_image == 'png':
+            try:
+                parametres['taille'] = int(taille)
+            except ValueError:
+                parametres['taille'] = 0
+            if not TAILLE_IMAGE_MIN <= parametres['taille'] <= TAILLE_IMAGE_MAX:
+                return Response(
+                    {'error': f'La taille doit être comprise entre {TAILLE_IMAGE_MIN} et {TAILLE_IMAGE_MAX} pixels'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        qr_code = self.get_object()
+        empreinte = calculer_empreinte(qr_code.contenu, parametres)
+        etag = f'"{empreinte}.{format_image}"'
+        if request.query_params.get('v') and request.query_params['v'] == qr_code.empreinte:
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            # URL non versionnée: le contenu peut changer, revalider régulièrement
+            cache_control = 'public, max-age=300'
+        
+        if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            reponse = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            octets = rendu_qr_service.rendre(
+                qr_code.contenu, parametres, empreinte=empreinte, format_image=format_image
+            )
+            reponse = HttpResponse(octets, content_type=TYPES_IMAGE[format_image])
+        reponse['ETag'] = etag
+        reponse['Cache-Control'] = cache_control
+        return reponse
+    
     @action(detail=True, methods=['post'])
     def scanner(self, request, pk=None):
         """Enregistrer un scan de QR code"""
         qr_code = self.get_object()
         
         # Vérifier si le QR code est valide
-        if not qr_code.est_valide:
+        if not qr_code.est_valide():
             return Response(
                 {'error': 'QR code invalide ou expiré'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Incrémenter le nombre de scans
-        qr_code.nombre_scans += 1
-        qr_code.save()
+        # Incrément atomique (ou compté en cache), sans réécrire la ligne
+        nombre_scans = qr_code.marquer_comme_scanne()
         
         return Response({
             'message': 'QR code scanné avec succès',
-            'client': qr_code.client.nom_complet,
-            'type': qr_code.get_type_qrcode_display(),
-            'nombre_scans': qr_code.nombre_scans
+            'client': qr_code.client.nom_complet if qr_code.client else None,
+            'type': qr_code.get_type_qr_display(),
+            'nombre_scans': nombre_scans
         })
     
     @action(detail=True, methods=['post'])
@@ -166,26 +256,22 @@ class QRCodeViewSet(viewsets.ModelViewSet):
     def regenerer_image(self, request, pk=None):
         """Régénérer l'image du QR code"""
         qr_code = self.get_object()
-        qr_code.generer_image()
-        qr_code.save()
+        # Contenu inchangé: l'image existante est conservée (fichier recréé s'il manque)
+        if qr_code.generer_qr_code(force=True):
+            qr_code.save(update_fields=['image_qr', 'empreinte'])
         
-        return Response({'message': 'Image du QR code régénérée avec succès'})
+        return Response({
+            'message': 'Image du QR code régénérée avec succès',
+            'empreinte': qr_code.empreinte
+        })
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['post'])
     def nettoyer_expires(self, request):
-        """Nettoyer les QR codes expirés"""
-        from datetime import datetime
-        
-        # Trouver les QR codes expirés depuis plus de 30 jours
-        date_limite = timezone.now() - timedelta(days=30)
-        qr_codes_expires = QRCode.objects.filter(
-            date_expiration__lt=timezone.now(),
-            date_modification__lt=date_limite
-        )
+        """Lancer en arrière-plan la purge des QR codes expirés (voir QR_CODES_PURGE)"""
+        from .tasks import purger_expires
         
-        count = qr_codes_expires.count()
-        qr_codes_expires.delete()
-        
-        return Response({
-            'message': f'{count} QR codes expirés ont été supprimés'
-        })
+        purger_expires.soumettre()
+        return Response(
+            {'message': 'Purge des QR codes expirés lancée en arrière-plan'},
+            status=status.HTTP_202_ACCEPTED
+        )
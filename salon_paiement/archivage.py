@@ -0,0 +1,179 @@
+"""
+Archivage des sessions de paiement anciennes
+
+Les sessions créées avant une date limite sont déplacées, avec leur historique,
+dans des fichiers JSON Lines compressés, un par mois de création:
+
+    <REPERTOIRE>/sessions-AAAA-MM.jsonl.gz
+
+Chaque ligne décrit une session et contient la liste de ses entrées d'historique.
+Chaque lot est ajouté au fichier sous la forme d'un nouveau membre gzip, écrit et
+synchronisé sur disque avant la suppression des lignes en base. Si le processus
+s'interrompt entre les deux, la relance réécrit le lot: les lecteurs ignorent les
+doublons.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+MOTIF_FICHIER = re.compile(r'^sessions-(\d{4}-\d{2})\.jsonl\.gz$')
+MOTIF_MOIS = re.compile(r'^\d{4}-\d{2}$')
+
+
+def configuration():
+    return getattr(settings, 'ARCHIVAGE_SESSIONS', {})
+
+
+class ArchivageSessionsService:
+    """Déplacement des sessions anciennes vers les archives et lecture des archives"""
+
+    def __init__(self, repertoire=None):
+        self._repertoire = repertoire
+
+    @property
+    def repertoire(self):
+        if self._repertoire is None:
+            return Path(configuration().get('REPERTOIRE', Path(settings.BASE_DIR) / 'archives' / 'sessions'))
+        return Path(self._repertoire)
+
+    def date_limite(self, age_jours=None):
+        """Date de création en deçà de laquelle une session est archivée"""
+        if age_jours is None:
+            age_jours = configuration().get('AGE_JOURS', 90)
+        return timezone.now() - timedelta(days=age_jours)
+
+    def chemin(self, mois):
+        return self.repertoire / f'sessions-{mois}.jsonl.gz'
+
+    # --- Écriture ---
+
+    def estimer(self, avant):
+        """Nombre de sessions à archiver par mois, sans rien modifier"""
+        from .models import SessionPaiement
+
+        lignes = (
+            SessionPaiement.objects.filter(date_creation__lt=avant)
+            .annotate(mois=TruncMonth('date_creation'))
+            .values('mois')
+            .annotate(nombre=Count('id'))
+            .order_by('mois')
+        )
+        return {ligne['mois'].strftime('%Y-%m'): ligne['nombre'] for ligne in lignes}
+
+    def archiver(self, avant, taille_lot=500):
+        """
+        Archiver par lots les sessions créées avant `avant`.
+        Retourne le nombre de sessions archivées par mois.
+        """
+        from .models import SessionPaiement
+
+        self.repertoire.mkdir(parents=True, exist_ok=True)
+        bilan = {}
+        while True:
+            sessions = list(
+                SessionPaiement.objects.filter(date_creation__lt=avant)
+                .order_by('date_creation', 'pk')
+                .values()[:taille_lot]
+            )
+            if not sessions:
+                return bilan
+            for mois, nombre in self._archiver_lot(sessions).items():
+                bilan[mois] = bilan.get(mois, 0) + nombre
+
+    def _archiver_lot(self, sessions):
+        from .models import SessionPaiement, HistoriqueSession
+
+        identifiants = [session['id'] for session in sessions]
+        historiques = {}
+        for entree in (
+            HistoriqueSession.objects.filter(session_id__in=identifiants)
+            .order_by('date_action')
+            .values()
+        ):
+            historiques.setdefault(entree['session_id'], []).append(entree)
+
+        par_mois = {}
+        for session in sessions:
+            session['historique'] = historiques.get(session['id'], [])
+            mois = timezone.localtime(session['date_creation']).strftime('%Y-%m')
+            par_mois.setdefault(mois, []).append(session)
+
+        for mois, lignes in par_mois.items():
+            self._ecrire(mois, lignes)
+
+        with transaction.atomic():
+            HistoriqueSession.objects.filter(session_id__in=identifiants).delete()
+            SessionPaiement.objects.filter(pk__in=identifiants).delete()
+
+        return {mois: len(lignes) for mois, lignes in par_mois.items()}
+
+    def _ecrire(self, mois, sessions):
+        contenu = ''.join(
+            json.dumps(session, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+            for session in sessions
+        ).encode('utf-8')
+        with open(self.chemin(mois), 'ab') as fichier:
+            fichier.write(gzip.compress(contenu))
+            fichier.flush()
+            os.fsync(fichier.fileno())
+
+    # --- Lecture ---
+
+    def mois_disponibles(self):
+        """Mois archivés avec la taille de leur fichier, du plus récent au plus ancien"""
+        if not self.repertoire.is_dir():
+            return []
+        archives = []
+        for fichier in self.repertoire.iterdir():
+            correspondance = MOTIF_FICHIER.match(fichier.name)
+            if correspondance:
+                archives.append({'mois': correspondance.group(1), 'taille': fichier.stat().st_size})
+        return sorted(archives, key=lambda archive: archive['mois'], reverse=True)
+
+    def lire(self, mois, statut=None, client_id=None, session_id=None):
+        """Parcourir les sessions archivées d'un mois, filtrées, sans doublons"""
+        if not MOTIF_MOIS.match(mois or ''):
+            raise ValueError(f"Mois invalide: {mois} (format attendu AAAA-MM)")
+        chemin = self.chemin(mois)
+        if not chemin.exists():
+            return
+        vus = set()
+        with gzip.open(chemin, 'rt', encoding='utf-8') as fichier:
+            for ligne in fichier:
+                session = json.loads(ligne)
+                if session['id'] in vus:
+                    continue
+                vus.add(session['id'])
+                if statut and session['statut'] != statut:
+                    continue
+                if client_id and str(session['client_id']) != str(client_id):
+                    continue
+                if session_id and session['session_id'] != str(session_id):
+                    continue
+                yield session
+
+    def trouver(self, session_id, mois=None):
+        """Retrouver une session archivée par son session_id (tous les mois si non précisé)"""
+        mois_a_parcourir = [mois] if mois else [archive['mois'] for archive in self.mois_disponibles()]
+        for courant in mois_a_parcourir:
+            for session in self.lire(courant, session_id=session_id):
+                return session
+        return None
+
+
+# Instance unique du service
+archivage_service = ArchivageSessionsService()
+
+
+def archiver_sessions_anciennes(age_jours=None, taille_lot=500):
+    """Point d'entrée pour les tâches planifiées (cron, maintenance.sh)"""
+    return archivage_service.archiver(archivage_service.date_limite(age_jours), taille_lot=taille_lot)
@@ -0,0 +1,183 @@
+"""
+Journal d'audit des sessions (HistoriqueSession)
+
+Deux modes, choisis par le réglage HISTORIQUE_SESSION_AUDIT['MODE']:
+- 'synchrone': chaque entrée est écrite immédiatement, dans la transaction en cours;
+- 'tampon': les entrées sont mises en file après la validation de la transaction
+  et écrites par lots (bulk_create) par un thread d'arrière-plan, dès que
+  TAILLE_LOT entrées sont en attente ou au plus tard toutes les INTERVALLE_MS ms.
+  La file est vidée à l'arrêt normal du processus (atexit). Une entrée
+  `immediat` (la réponse de la requête relit l'historique) est écrite dès la
+  validation, hors file.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class JournalSynchrone:
+    """Écrit chaque entrée immédiatement"""
+
+    def enregistrer(self, entree, immediat=False):
+        entree.save(force_insert=True)
+
+    def vider(self):
+        pass
+
+
+class JournalTampon:
+    """Accumule les entrées en mémoire et les écrit par lots"""
+
+    def __init__(self, taille_lot=200, intervalle_ms=500, taille_max=50000):
+        self.taille_lot = taille_lot
+        self.intervalle = intervalle_ms / 1000
+        self.taille_max = taille_max
+        self._file = deque()
+        self._condition = threading.Condition()
+        self._verrou_ecriture = threading.Lock()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.vider)
+
+    def enregistrer(self, entree, immediat=False):
+        # N'écrire l'entrée qu'une fois la transaction de la transition validée
+        if immediat:
+            transaction.on_commit(lambda: self._ecrire_immediat(entree))
+        else:
+            transaction.on_commit(lambda: self._ajouter(entree))
+
+    def _ecrire_immediat(self, entree):
+        """Écriture directe; en cas d'échec l'entrée passe par la file plutôt que de faire échouer la requête"""
+        try:
+            self._ecrire([entree])
+        except Exception:
+            logger.exception("Échec de l'écriture immédiate d'une entrée d'audit, mise en file")
+            self._ajouter(entree)
+
+    def _ajouter(self, entree):
+        self._demarrer()
+        with self._condition:
+            saturee = len(self._file) >= self.taille_max
+            if not saturee:
+                self._file.append(entree)
+                if len(self._file) >= self.taille_lot:
+                    self._condition.notify()
+        if saturee:
+            # File saturée (base indisponible trop longtemps): écriture directe plutôt que perte
+            logger.warning("File d'audit saturée, écriture synchrone de l'entrée")
+            try:
+                JournalSynchrone().enregistrer(entree)
+            except Exception:
+                # Appelé après validation: une exception transformerait en erreur
+                # une transition déjà enregistrée
+                logger.exception(
+                    f"Entrée d'historique perdue ({entree.type_action}) pour la session {entree.session_id}"
+                )
+
+    def _demarrer(self):
+        """Démarrer le thread d'écriture (une fois par processus, y compris après un fork)"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._condition:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._boucle, name='journal-audit', daemon=True)
+            self._thread.start()
+
+    def _boucle(self):
+        while True:
+            with self._condition:
+                echeance = time.monotonic() + self.intervalle
+                while len(self._file) < self.taille_lot:
+                    restant = echeance - time.monotonic()
+                    if restant <= 0:
+                        break
+                    self._condition.wait(restant)
+            try:
+                self.vider()
+            except Exception:
+                logger.exception("Échec de l'écriture du journal d'audit, nouvelle tentative au prochain cycle")
+                time.sleep(self.intervalle)
+
+    def vider(self):
+        """Écrire toutes les entrées en attente"""
+        with self._verrou_ecriture:
+            close_old_connections()
+            while True:
+                with self._condition:
+                    if not self._file:
+                        return
+                    lot = [self._file.popleft() for _ in range(min(self.taille_lot, len(self._file)))]
+                try:
+                    self._ecrire(lot)
+                except Exception:
+                    # Remettre le lot en tête de file pour ne rien perdre
+                    with self._condition:
+                        self._file.extendleft(reversed(lot))
+                    raise
+
+    def _ecrire(self, lot):
+        from .models import HistoriqueSession
+        try:
+            with transaction.atomic():
+                HistoriqueSession.objects.bulk_create(lot)
+        except IntegrityError:
+            # Une session a pu être supprimée entre-temps: écrire les entrées une à une
+            for entree in lot:
+                try:
+                    with transaction.atomic():
+                        entree.save(force_insert=True)
+                except IntegrityError:
+                    logger.error(
+                        f"Entrée d'historique ignorée ({entree.type_action}) pour la session {entree.session_id}"
+                    )
+
+
+_journal = None
+_verrou_journal = threading.Lock()
+
+
+def obtenir_journal():
+    """Retourner le journal d'audit configuré (instance unique par processus)"""
+    global _journal
+    if _journal is None:
+        with _verrou_journal:
+            if _journal is None:
+                configuration = getattr(settings, 'HISTORIQUE_SESSION_AUDIT', {})
+                if configuration.get('MODE', 'tampon') == 'synchrone':
+                    _journal = JournalSynchrone()
+                else:
+                    _journal = JournalTampon(
+                        taille_lot=configuration.get('TAILLE_LOT', 200),
+                        intervalle_ms=configuration.get('INTERVALLE_MS', 500),
+                        taille_max=configuration.get('TAILLE_MAX', 50000),
+                    )
+    return _journal
+
+
+def journaliser(session, type_action, description, donnees=None, adresse_ip=None, immediat=False):
+    """
+    Ajouter une entrée à l'historique d'une session via le journal configuré.
+    `immediat`: l'entrée doit être en base dès la validation (réponse qui affiche l'historique).
+    """
+    from .models import HistoriqueSession
+
+    entree = HistoriqueSession(
+        session=session,
+        type_action=type_action,
+        description=description,
+        donnees=donnees or {},
+        adresse_ip=adresse_ip or None,
+        date_action=timezone.now()
+    )
+    obtenir_journal().enregistrer(entree, immediat=immediat)
+    return entree
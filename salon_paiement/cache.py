@@ -0,0 +1,89 @@
+"""
+Clés de cache versionnées
+
+Chaque espace de données mises en cache (ex. 'site_settings') a un numéro de
+version stocké dans le cache partagé. Les clés des entrées incluent ce numéro:
+
+    <espace>:v<version>:<partie>:...
+
+Invalider un espace revient à incrémenter sa version (une seule clé modifiée,
+vue de tous les workers); les anciennes entrées ne sont plus lues et expirent
+d'elles-mêmes. Aucun appel à cache.clear(), qui viderait le cache de toutes
+les applications.
+
+MemoLocal ajoute, pour les valeurs lues à chaque requête, une copie en mémoire
+du processus à durée de vie courte.
+"""
+import time
+from django.core.cache import cache
+
+
+def _cle_version(espace):
+    return f'version:{espace}'
+
+
+def _version_initiale():
+    # Horodatage en millisecondes: une version recréée (cache redémarré, entrée
+    # évincée) ne reprend jamais un numéro déjà servi, par exemple dans un ETag
+    return int(time.time() * 1000)
+
+
+def version(espace):
+    """Version courante d'un espace (créée si absente)"""
+    return cache.get_or_set(_cle_version(espace), _version_initiale, timeout=None)
+
+
+def cle(espace, *parties):
+    """Clé d'une entrée de l'espace, pour sa version courante"""
+    return ':'.join([espace, f'v{version(espace)}', *map(str, parties)])
+
+
+def obtenir(espace, *parties, calculer, timeout=None):
+    """
+    Valeur en cache de l'entrée, calculée et mise en cache si absente.
+    `timeout` None: durée par défaut du cache (CACHES['default']['TIMEOUT']).
+    """
+    cle_entree = cle(espace, *parties)
+    valeur = cache.get(cle_entree)
+    if valeur is None:
+        valeur = calculer()
+        if timeout is None:
+            cache.set(cle_entree, valeur)
+        else:
+            cache.set(cle_entree, valeur, timeout)
+    return valeur
+
+
+def invalider(espace):
+    """Rendre obsolètes toutes les entrées de l'espace, dans tous les workers"""
+    try:
+        cache.incr(_cle_version(espace))
+    except ValueError:
+        # Version absente (cache redémarré ou entrée évincée): repartir d'une valeur neuve
+        cache.add(_cle_version(espace), _version_initiale(), timeout=None)
+        cache.incr(_cle_version(espace))
+
+
+class MemoLocal:
+    """
+    Valeur gardée en mémoire du processus pendant `ttl` secondes, devant le
+    cache partagé: les lectures très fréquentes n'interrogent ni la base ni Redis.
+    Un autre worker voit une modification au plus `ttl` secondes plus tard;
+    le processus qui l'a faite la voit aussitôt (vider()).
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._valeur = None
+        self._expiration = 0
+
+    def obtenir(self, calculer):
+        maintenant = time.monotonic()
+        valeur = self._valeur
+        if valeur is None or maintenant >= self._expiration:
+            valeur = calculer()
+            self._valeur, self._expiration = valeur, maintenant + self.ttl
+        return valeur
+
+    def vider(self):
+        self._valeur = None
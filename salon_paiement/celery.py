@@ -0,0 +1,21 @@
+"""
+Application Celery du projet (optionnelle)
+
+Utilisée par le worker de docker-compose (`celery -A salon_paiement worker`).
+Si Celery n'est pas installé, `app` vaut None et les tâches s'exécutent dans
+le pool de threads local (voir salon_paiement.taches).
+"""
+import os
+
+try:
+    from celery import Celery
+except ImportError:
+    Celery = None
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'salon_paiement.settings')
+
+app = None
+if Celery is not None:
+    app = Celery('salon_paiement')
+    app.config_from_object('django.conf:settings', namespace='CELERY')
+    app.autodiscover_tasks()
@@ -0,0 +1,75 @@
+"""
+Requêtes GET conditionnelles (ETag / If-None-Match) pour les viewsets DRF
+
+L'ETag d'une liste est calculé sans sérialiser: soit à partir de
+max(date_modification) et du nombre de lignes du queryset filtré (une seule
+requête d'agrégat, servie par l'index), soit à partir d'un compteur de version
+de salon_paiement.cache pour les données qui n'ont pas de date de modification.
+Si le navigateur présente le même ETag, la vue répond 304 sans exécuter la
+requête de la page ni le serializer.
+
+Le nombre de lignes couvre les suppressions, la date maximale les créations et
+modifications. L'ETag inclut l'utilisateur: deux comptes ne partagent jamais
+une réponse.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def calculer_etag(*parties):
+    """ETag opaque et court à partir de valeurs quelconques"""
+    contenu = '|'.join(map(str, parties))
+    return quote_etag(hashlib.sha1(contenu.encode()).hexdigest()[:20])
+
+
+class GetConditionnelMixin:
+    """
+    Ajoute ETag et réponses 304 aux actions de lecture d'un viewset.
+
+    - `actions_conditionnelles`: actions standard concernées (la liste; le
+      détail n'est pas couvert car ses serializers lisent des tables liées)
+    - `champ_modification`: colonne de date de dernière modification du modèle
+
+    Une action personnalisée peut passer par `reponse_conditionnelle()` avec
+    son propre ETag (ex. compteur de version, voir paiements.views).
+    """
+    actions_conditionnelles = ('list',)
+    champ_modification = 'date_modification'
+
+    def etag_queryset(self, queryset, *parties):
+        """ETag d'un queryset: date de dernière modification et nombre de lignes"""
+        etat = queryset.order_by().aggregate(
+            derniere_modification=Max(self.champ_modification),
+            nombre=Count('pk')
+        )
+        return calculer_etag(
+            self.action, self.request.user.pk,
+            etat['derniere_modification'], etat['nombre'], *parties
+        )
+
+    def get_etag(self, request):
+        return self.etag_queryset(self.filter_queryset(self.get_queryset()))
+
+    def reponse_conditionnelle(self, request, produire, etag=None):
+        """
+        Réponse 304 si l'ETag présenté par le client est à jour, sinon réponse
+        produite par `produire()`; dans les deux cas avec l'en-tête ETag.
+        """
+        if etag is None:
+            etag = self.get_etag(request)
+        reponse = get_conditional_response(request, etag=etag)
+        if reponse is None:
+            reponse = produire()
+        reponse['ETag'] = etag
+        # Le navigateur garde la réponse mais revalide à chaque appel
+        patch_cache_control(reponse, private=True, no_cache=True)
+        return reponse
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.actions_conditionnelles:
+            return super().list(request, *args, **kwargs)
+        return self.reponse_conditionnelle(
+            request, lambda: super(GetConditionnelMixin, self).list(request, *args, **kwargs)
+        )
@@ -0,0 +1,83 @@
+"""
+Expiration des sessions de paiement
+
+Les sessions encore en cours de workflow dont la date d'expiration est dépassée
+sont passées au statut 'expire' par lots: chaque lot verrouille ses lignes
+(SKIP LOCKED, pour ne pas attendre une transition en cours), les met à jour en
+une seule requête et crée les entrées d'historique 'expiration' correspondantes
+dans la même transaction.
+"""
+import time
+from django.db import transaction
+from django.utils import timezone
+
+
+class ExpirationSessionsService:
+    """Balayage des sessions échues"""
+
+    def a_expirer(self, maintenant=None):
+        from .models import SessionPaiement
+
+        return SessionPaiement.objects.filter(
+            statut__in=SessionPaiement.STATUTS_EXPIRABLES,
+            date_expiration__lt=maintenant or timezone.now()
+        )
+
+    def expirer(self, maintenant=None, taille_lot=1000):
+        """
+        Expirer toutes les sessions échues à `maintenant`.
+        Retourne le bilan: nombre total, détail par statut précédent, lots et durée.
+        """
+        maintenant = maintenant or timezone.now()
+        debut = time.monotonic()
+        bilan = {'nombre': 0, 'par_statut': {}, 'lots': 0}
+
+        while True:
+            lot = self._expirer_lot(maintenant, taille_lot)
+            if not lot:
+                break
+            bilan['lots'] += 1
+            bilan['nombre'] += len(lot)
+            for statut in lot.values():
+                bilan['par_statut'][statut] = bilan['par_statut'].get(statut, 0) + 1
+
+        bilan['duree'] = time.monotonic() - debut
+        return bilan
+
+    def _expirer_lot(self, maintenant, taille_lot):
+        from .models import SessionPaiement, HistoriqueSession
+
+        with transaction.atomic():
+            lignes = dict(
+                self.a_expirer(maintenant)
+                .order_by('date_expiration')
+                .select_for_update(skip_locked=True)
+                .values_list('pk', 'statut')[:taille_lot]
+            )
+            if not lignes:
+                return {}
+
+            SessionPaiement.objects.filter(pk__in=list(lignes)).update(
+                statut='expire',
+                date_modification=maintenant
+            )
+            HistoriqueSession.objects.bulk_create([
+                HistoriqueSession(
+                    session_id=pk,
+                    type_action='expiration',
+                    description='Session expirée automatiquement',
+                    donnees={'statut_precedent': statut},
+                    date_action=maintenant
+                )
+                for pk, statut in lignes.items()
+            ])
+        return lignes
+
+
+# Instance unique du service
+expiration_service = ExpirationSessionsService()
+
+
+def expirer_sessions_echues(taille_lot=1000):
+    """Point d'entrée pour les tâches planifiées (cron, Celery beat)"""
+    return expiration_service.expirer(taille_lot=taille_lot)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from salon_paiement.archivage import archivage_service
+
+
+class Command(BaseCommand):
+    help = "Déplacer les sessions de paiement anciennes et leur historique vers les archives compressées"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--age',
+            type=int,
+            help="Âge minimal en jours des sessions à archiver (défaut: ARCHIVAGE_SESSIONS['AGE_JOURS'])"
+        )
+        parser.add_argument('--lot', type=int, default=500, help="Nombre de sessions traitées par lot")
+        parser.add_argument(
+            '--simulation',
+            action='store_true',
+            help="Afficher le nombre de sessions à archiver sans rien modifier"
+        )
+
+    def handle(self, *args, **options):
+        if options['age'] is not None and options['age'] < 1:
+            raise CommandError("L'âge doit être d'au moins 1 jour")
+
+        avant = archivage_service.date_limite(options['age'])
+        if options['simulation']:
+            bilan = archivage_service.estimer(avant)
+        else:
+            bilan = archivage_service.archiver(avant, taille_lot=options['lot'])
+
+        for mois, nombre in sorted(bilan.items()):
+            self.stdout.write(f"  {mois}: {nombre} session(s)")
+        verbe = "à archiver" if options['simulation'] else "archivées"
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(bilan.values())} session(s) {verbe} (créées avant le {avant:%Y-%m-%d}) "
+            f"dans {archivage_service.repertoire}"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from salon_paiement.expiration import expiration_service
+
+
+class Command(BaseCommand):
+    help = "Passer au statut 'expire' les sessions de paiement dont la date d'expiration est dépassée"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=1000, help="Nombre de sessions expirées par transaction")
+        parser.add_argument(
+            '--simulation',
+            action='store_true',
+            help="Afficher le nombre de sessions échues sans rien modifier"
+        )
+
+    def handle(self, *args, **options):
+        if options['simulation']:
+            nombre = expiration_service.a_expirer().count()
+            self.stdout.write(self.style.SUCCESS(f"{nombre} session(s) à expirer"))
+            return
+
+        bilan = expiration_service.expirer(taille_lot=options['lot'])
+        for statut, nombre in sorted(bilan['par_statut'].items()):
+            self.stdout.write(f"  {statut}: {nombre}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{bilan['nombre']} session(s) expirée(s) en {bilan['lots']} lot(s), "
+            f"{bilan['duree'] * 1000:.0f} ms"
+        ))
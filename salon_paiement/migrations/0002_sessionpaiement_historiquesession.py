@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-17 13:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salon_paiement', '0001_initial'),
+        ('clients', '0004_client_telephone_e164'),
+        ('prestations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionPaiement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('session_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('montant_final', models.PositiveIntegerField(blank=True, help_text='Montant final choisi par le client (dans la fourchette si applicable)', null=True)),
+                ('statut', models.CharField(choices=[('scanne', 'QR Code Scanné'), ('identification', 'En Identification'), ('prestation_selectionnee', 'Prestation Sélectionnée'), ('paiement_initie', 'Paiement Initlié'), ('paiement_reussi', 'Paiement Réussi'), ('paiement_echoue', 'Paiement Échoué'), ('abandonne', 'Abandonné'), ('expire', 'Expiré')], default='scanne', max_length=30)),
+                ('qr_code_scanne', models.DateTimeField(default=django.utils.timezone.now)),
+                ('identification_terminee', models.DateTimeField(blank=True, null=True)),
+                ('prestation_selectionnee_le', models.DateTimeField(blank=True, null=True)),
+                ('paiement_initie_le', models.DateTimeField(blank=True, null=True)),
+                ('paiement_termine_le', models.DateTimeField(blank=True, null=True)),
+                ('user_agent', models.TextField(blank=True, null=True)),
+                ('adresse_ip', models.GenericIPAddressField(blank=True, null=True)),
+                ('appareil', models.CharField(blank=True, max_length=100, null=True)),
+                ('donnees_session', models.JSONField(default=dict, help_text='Données temporaires stockées pendant la session')),
+                ('email_envoye', models.BooleanField(default=False)),
+                ('sms_envoye', models.BooleanField(default=False)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+                ('date_expiration', models.DateTimeField(blank=True, help_text="Date d'expiration de la session (24h par défaut)", null=True)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions_paiement', to='clients.client')),
+                ('prestation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions_paiement', to='prestations.prestation')),
+            ],
+            options={
+                'verbose_name': 'Session de Paiement',
+                'verbose_name_plural': 'Sessions de Paiement',
+                'db_table': 'sessions_paiement',
+                'ordering': ['-date_creation'],
+                'indexes': [
+                    models.Index(fields=['session_id'], name='sessions_pa_session_62cf73_idx'),
+                    models.Index(fields=['statut'], name='sessions_pa_statut_0d9780_idx'),
+                    models.Index(fields=['date_creation'], name='sessions_pa_date_cr_fdc70f_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistoriqueSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('type_action', models.CharField(choices=[('scan_qr', 'Scan QR Code'), ('authentification_directe', 'Authentification Directe'), ('recherche_client', 'Recherche Client'), ('creation_client', 'Création Client'), ('selection_prestation', 'Sélection Prestation'), ('initiation_paiement', 'Initiation Paiement'), ('confirmation_paiement', 'Confirmation Paiement'), ('echec_paiement', 'Échec Paiement'), ('envoi_email', 'Envoi Email'), ('envoi_sms', 'Envoi SMS'), ('abandon', 'Abandon Session'), ('expiration', 'Expiration Session')], max_length=30)),
+                ('description', models.TextField()),
+                ('donnees', models.JSONField(default=dict, help_text="Données liées à l'action")),
+                ('adresse_ip', models.GenericIPAddressField(blank=True, null=True)),
+                ('date_action', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historique', to='salon_paiement.sessionpaiement')),
+            ],
+            options={
+                'verbose_name': 'Historique de Session',
+                'verbose_name_plural': 'Historiques des Sessions',
+                'db_table': 'historique_sessions',
+                'ordering': ['-date_action'],
+                'indexes': [
+                    models.Index(fields=['session', '-date_action'], name='historique_session_date_idx'),
+                ],
+            },
+        ),
+    ]
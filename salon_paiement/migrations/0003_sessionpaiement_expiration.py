@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 13:40
+
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def renseigner_date_expiration(apps, schema_editor):
+    SessionPaiement = apps.get_model('salon_paiement', 'SessionPaiement')
+    SessionPaiement.objects.filter(date_expiration__isnull=True).update(
+        date_expiration=models.F('date_creation') + timedelta(hours=24)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salon_paiement', '0002_sessionpaiement_historiquesession'),
+    ]
+
+    operations = [
+        migrations.RunPython(renseigner_date_expiration, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sessionpaiement',
+            index=models.Index(fields=['statut', 'date_expiration'], name='sessions_statut_expiration_idx'),
+        ),
+    ]
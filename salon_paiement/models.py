@@ -22,6 +22,12 @@ class SessionPaiement(models.Model):
         ('expire', 'Expiré'),
     ]
     
+    # Statuts en cours de workflow passés à 'expire' une fois date_expiration dépassée
+    # (paiement_initie est laissé à la réconciliation avec l'opérateur)
+    STATUTS_EXPIRABLES = ['scanne', 'identification', 'prestation_selectionnee', 'paiement_echoue']
+    STATUTS_TERMINES = ['paiement_reussi', 'abandonne', 'expire']
+    DUREE_VALIDITE = timezone.timedelta(hours=24)
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     session_id = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
     client = models.ForeignKey(
@@ -88,22 +94,39 @@ class SessionPaiement(models.Model):
             models.Index(fields=['session_id']),
             models.Index(fields=['statut']),
             models.Index(fields=['date_creation']),
+            models.Index(fields=['statut', 'date_expiration'], name='sessions_statut_expiration_idx'),
         ]
     
     def __str__(self):
         client_nom = self.client.nom_complet if self.client else "Client inconnu"
         return f"Session {self.session_id} - {client_nom} - {self.get_statut_display()}"
     
+    def save(self, *args, **kwargs):
+        # Toujours renseigner l'expiration pour que le balayage reste une requête indexée
+        if self.date_expiration is None:
+            self.date_expiration = (self.date_creation or timezone.now()) + self.DUREE_VALIDITE
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def filtre_actives(cls, maintenant=None):
+        """Condition (indexée sur statut, date_expiration) des sessions encore actives"""
+        return models.Q(
+            statut__in=cls.STATUTS_EXPIRABLES + ['paiement_initie'],
+            date_expiration__gt=maintenant or timezone.now()
+        )
+    
     def est_expire(self):
         """Vérifie si la session est expirée"""
+        if self.statut == 'expire':
+            return True
         if self.date_expiration:
             return timezone.now() > self.date_expiration
         # Par défaut, expiration après 24 heures
-        return timezone.now() > self.date_creation + timezone.timedelta(hours=24)
+        return timezone.now() > self.date_creation + self.DUREE_VALIDITE
     
     def est_active(self):
         """Vérifie si la session est toujours active"""
-        return not self.est_expire() and self.statut not in ['paiement_reussi', 'abandonne', 'expire']
+        return not self.est_expire() and self.statut not in self.STATUTS_TERMINES
     
     def get_etape_actuelle(self):
         """Retourne l'étape actuelle du workflow"""
@@ -160,13 +183,17 @@ class HistoriqueSession(models.Model):
     description = models.TextField()
     donnees = models.JSONField(default=dict, help_text="Données liées à l'action")
     adresse_ip = models.GenericIPAddressField(null=True, blank=True)
-    date_action = models.DateTimeField(auto_now_add=True)
+    # Horodatage de l'action elle-même (l'écriture peut être différée par le journal d'audit)
+    date_action = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'historique_sessions'
         verbose_name = 'Historique de Session'
         verbose_name_plural = 'Historiques des Sessions'
         ordering = ['-date_action']
+        indexes = [
+            models.Index(fields=['session', '-date_action'], name='historique_session_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.session.session_id} - {self.get_type_action_display()} - {self.date_action}"
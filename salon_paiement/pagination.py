@@ -0,0 +1,121 @@
+"""
+Pagination par curseur (keyset) sur (date, id) pour les grandes tables
+"""
+import base64
+import json
+from collections import OrderedDict
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PaginationCurseur(PageNumberPagination):
+    """
+    Pagination par numéro de page par défaut, avec un mode curseur optionnel.
+
+    Le mode curseur est activé avec `?pagination=curseur` (ou dès qu'un paramètre
+    `curseur` est fourni). Il trie par (date, id) décroissants et filtre sur la
+    position du dernier élément de la page précédente: ni OFFSET ni COUNT(*),
+    le coût d'une page reste constant quelle que soit sa profondeur.
+    `?total=approximatif` ajoute une estimation du nombre de lignes de la table
+    tirée des statistiques de la base (sans tenir compte des filtres).
+
+    La vue indique la colonne de date via `get_champ_curseur()`.
+    """
+    parametre_mode = 'pagination'
+    parametre_curseur = 'curseur'
+    parametre_total = 'total'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        champ = view.get_champ_curseur() if view is not None and hasattr(view, 'get_champ_curseur') else None
+        self.mode_curseur = champ is not None and (
+            request.query_params.get(self.parametre_mode) == 'curseur'
+            or self.parametre_curseur in request.query_params
+        )
+        if not self.mode_curseur:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        taille = self.get_page_size(request)
+        queryset = queryset.order_by(f'-{champ}', '-pk')
+
+        position = self.decoder_curseur(request.query_params.get(self.parametre_curseur))
+        if position is not None:
+            date, pk = position
+            # Équivalent à (date, id) < (date_curseur, id_curseur), écrit pour
+            # permettre un parcours d'intervalle sur l'index de la colonne de date
+            queryset = queryset.filter(**{f'{champ}__lte': date}).exclude(
+                **{champ: date, 'pk__gte': pk}
+            )
+
+        lignes = list(queryset[:taille + 1])
+        self.curseur_suivant = None
+        if len(lignes) > taille:
+            lignes = lignes[:taille]
+            dernier = lignes[-1]
+            self.curseur_suivant = self.encoder_curseur(getattr(dernier, champ), dernier.pk)
+
+        self.total_approximatif = None
+        if request.query_params.get(self.parametre_total) == 'approximatif':
+            self.total_approximatif = self.estimer_total(queryset.model)
+
+        return lignes
+
+    def get_paginated_response(self, data):
+        if not self.mode_curseur:
+            return super().get_paginated_response(data)
+
+        reponse = OrderedDict([('next', self.get_next_link())])
+        if self.total_approximatif is not None:
+            reponse['count_approximatif'] = self.total_approximatif
+        reponse['results'] = data
+        return Response(reponse)
+
+    def get_next_link(self):
+        if not self.mode_curseur:
+            return super().get_next_link()
+        if self.curseur_suivant is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.parametre_curseur, self.curseur_suivant)
+
+    def get_previous_link(self):
+        if not self.mode_curseur:
+            return super().get_previous_link()
+        return None
+
+    def encoder_curseur(self, date, pk):
+        """Encoder la position (date, id) dans un jeton opaque pour l'URL"""
+        donnees = json.dumps({'d': date.isoformat(), 'id': str(pk)})
+        return base64.urlsafe_b64encode(donnees.encode('utf-8')).decode('ascii')
+
+    def decoder_curseur(self, curseur):
+        """Décoder un jeton de curseur en (date, id)"""
+        if not curseur:
+            return None
+        try:
+            donnees = json.loads(base64.urlsafe_b64decode(curseur.encode('ascii')).decode('utf-8'))
+            date = parse_datetime(donnees['d'])
+            pk = donnees['id']
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound('Curseur invalide')
+        if date is None:
+            raise NotFound('Curseur invalide')
+        return date, pk
+
+    def estimer_total(self, model):
+        """Nombre de lignes estimé par MySQL pour la table (sans COUNT(*))"""
+        if connection.vendor != 'mysql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [model._meta.db_table]
+            )
+            ligne = cursor.fetchone()
+        return int(ligne[0]) if ligne and ligne[0] is not None else None
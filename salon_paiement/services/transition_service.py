@@ -0,0 +1,63 @@
+"""
+Service de transition des sessions de paiement
+"""
+import logging
+from django.db import transaction
+from ..audit import journaliser
+from ..models import SessionPaiement
+
+logger = logging.getLogger(__name__)
+
+
+class TransitionSessionService:
+    """
+    Applique un changement d'état d'une session en n'écrivant que les champs
+    modifiés, et journalise l'entrée d'historique correspondante (voir
+    salon_paiement.audit: écrite dans la même transaction en mode synchrone,
+    après sa validation en mode tampon). `historique_immediat`: la réponse
+    relit l'historique, l'entrée est écrite dès la validation, sans tampon.
+    """
+
+    def creer_session(self, historique, adresse_ip=None, historique_immediat=False, **champs):
+        """
+        Créer une session (éventuellement directement dans un état avancé)
+        avec sa première entrée d'historique
+        """
+        with transaction.atomic():
+            session = SessionPaiement.objects.create(adresse_ip=adresse_ip, **champs)
+            self._historiser(session, historique, adresse_ip, historique_immediat)
+        return session
+
+    def appliquer(self, session, changements, historique=None, adresse_ip=None, historique_immediat=False):
+        """
+        Appliquer `changements` (champ -> valeur) à la session et enregistrer
+        l'entrée d'historique `historique` (type_action, description, donnees)
+        dans la même transaction
+        """
+        for champ, valeur in changements.items():
+            setattr(session, champ, valeur)
+
+        # Les clés étrangères sont passées par leur nom de champ (client, prestation)
+        champs = set(changements) | {'date_modification'}
+        with transaction.atomic():
+            session.save(update_fields=champs)
+            self._historiser(session, historique, adresse_ip, historique_immediat)
+        return session
+
+    def _historiser(self, session, historique, adresse_ip, immediat=False):
+        # Selon le mode du journal d'audit, l'entrée est écrite dans la transaction
+        # ou mise en file pour écriture par lots après validation
+        if not historique:
+            return
+        journaliser(
+            session,
+            historique['type_action'],
+            historique['description'],
+            donnees=historique.get('donnees', {}),
+            adresse_ip=adresse_ip,
+            immediat=immediat
+        )
+
+
+# Instance unique du service
+transition_service = TransitionSessionService()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables first
@@ -107,6 +108,41 @@ DATABASES = {
 }
 
 
+# Cache partagé par tous les workers (Redis); cache local au processus pour les
+# tests et le développement sans Redis
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL and 'test' not in sys.argv:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'salon_paiement',
+            'TIMEOUT': 300,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'salon_paiement',
+            'TIMEOUT': 300,
+        }
+    }
+
+
+# Durée (secondes) de la copie des paramètres du site en mémoire de chaque worker
+SITE_SETTINGS_MEMO_TTL = int(os.getenv('SITE_SETTINGS_MEMO_TTL', '30'))
+
+# Variantes du logo et du favicon (config_site/images.py): largeurs du srcset et formats
+# produits, dans l'ordre de préférence (AVIF seulement si Pillow sait l'écrire)
+SITE_IMAGES = {
+    'LARGEURS_LOGO': (64, 128, 256, 512),
+    'FORMATS': ('avif', 'webp', 'png'),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -137,6 +173,12 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Indicatif pays utilisé pour normaliser les numéros de téléphone locaux
+TELEPHONE_INDICATIF_PAYS = os.getenv('TELEPHONE_INDICATIF_PAYS', '225')
+
+# Cache partagé de résolution client par numéro de téléphone
+CLIENTS_CACHE_TELEPHONE_DUREE = int(os.getenv('CLIENTS_CACHE_TELEPHONE_DUREE', '300'))  # secondes
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
@@ -177,6 +219,92 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Journal d'audit des sessions (HistoriqueSession)
+# 'tampon': écriture par lots en arrière-plan; 'synchrone': écriture immédiate (tests)
+HISTORIQUE_SESSION_AUDIT = {
+    'MODE': os.getenv('HISTORIQUE_AUDIT_MODE', 'synchrone' if 'test' in sys.argv else 'tampon'),
+    'TAILLE_LOT': int(os.getenv('HISTORIQUE_AUDIT_TAILLE_LOT', '200')),
+    'INTERVALLE_MS': int(os.getenv('HISTORIQUE_AUDIT_INTERVALLE_MS', '500')),
+}
+
+# Fournisseurs de paiement (paiements/services/fournisseurs): adaptateur et identifiants.
+# URL_API permet de remplacer l'URL de l'API du fournisseur (passerelle de test)
+PASSERELLES_PAIEMENT = {
+    'cinetpay': {
+        'ADAPTATEUR': 'paiements.services.fournisseurs.cinetpay.CinetPayAdaptateur',
+        'API_KEY': os.getenv('CINETPAY_API_KEY', ''),
+        'SITE_ID': os.getenv('CINETPAY_SITE_ID', ''),
+        'SECRET_KEY': os.getenv('CINETPAY_SECRET_KEY', ''),
+        'MODE': os.getenv('CINETPAY_MODE', 'test'),
+        'URL_API': os.getenv('CINETPAY_URL_API', ''),
+    },
+    'paydunya': {
+        'ADAPTATEUR': 'paiements.services.fournisseurs.paydunya.PayDunyaAdaptateur',
+        'MASTER_KEY': os.getenv('PAYDUNYA_MASTER_KEY', ''),
+        'PRIVATE_KEY': os.getenv('PAYDUNYA_PRIVATE_KEY', ''),
+        'TOKEN': os.getenv('PAYDUNYA_TOKEN', ''),
+        'MODE': os.getenv('PAYDUNYA_MODE', 'test'),
+        'URL_API': os.getenv('PAYDUNYA_URL_API', ''),
+    },
+}
+# URL publique de l'API (notifications des fournisseurs) et du frontend (retour du client)
+PAIEMENTS_URL_API = os.getenv('PAIEMENTS_URL_API', 'http://localhost:8000')
+PAIEMENTS_URL_RETOUR = os.getenv('PAIEMENTS_URL_RETOUR', 'http://localhost:3000')
+
+# Couche HTTP des passerelles de paiement (paiements/services/passerelle_http.py)
+# 'DEFAUT' s'applique à tous les fournisseurs, surchargé par 'CINETPAY' / 'PAYDUNYA'
+PASSERELLES_PAIEMENT_HTTP = {
+    'DEFAUT': {
+        'TAILLE_POOL': int(os.getenv('PASSERELLES_TAILLE_POOL', '10')),
+        'TIMEOUT_CONNEXION': float(os.getenv('PASSERELLES_TIMEOUT_CONNEXION', '3.05')),
+        'TIMEOUT_LECTURE': float(os.getenv('PASSERELLES_TIMEOUT_LECTURE', '20')),
+        'TENTATIVES': 3,
+        'SEUIL_ECHECS': 5,
+        'DELAI_REOUVERTURE': 30,
+    },
+}
+
+# File de tâches (salon_paiement/taches.py): Celery si un broker est configuré,
+# sinon pool de threads local au processus
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', '')
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TIMEZONE = TIME_ZONE
+TACHES_LOCALES_THREADS = int(os.getenv('TACHES_LOCALES_THREADS', '4'))
+
+# Archivage des sessions de paiement (commande archiver_sessions)
+ARCHIVAGE_SESSIONS = {
+    'REPERTOIRE': os.getenv('ARCHIVAGE_SESSIONS_REPERTOIRE', str(BASE_DIR / 'archives' / 'sessions')),
+    'AGE_JOURS': int(os.getenv('ARCHIVAGE_SESSIONS_AGE_JOURS', '90')),
+}
+
+# Rendu des QR codes: images partagées par contenu, derniers rendus gardés en mémoire.
+# Sans STOCKER_IMAGES, aucune image n'est écrite: l'API les rend à la volée (action image).
+QR_CODES_RENDU = {
+    'CACHE_TAILLE': int(os.getenv('QR_CODES_CACHE_TAILLE', '256')),
+    'STOCKER_IMAGES': os.getenv('QR_CODES_STOCKER_IMAGES', 'False').lower() == 'true',
+}
+
+# Scans de QR codes: avec TAMPON, comptés dans le cache (partagé, Redis) et reportés
+# en base par la commande vider_compteurs_scans
+QR_CODES_SCANS = {
+    'TAMPON': os.getenv('QR_CODES_SCANS_TAMPON', 'False').lower() == 'true',
+}
+
+# Purge des QR codes expirés (commande purger_qr_codes)
+QR_CODES_PURGE = {
+    'AGE_JOURS': int(os.getenv('QR_CODES_PURGE_AGE_JOURS', '30')),
+    'TAILLE_LOT': int(os.getenv('QR_CODES_PURGE_TAILLE_LOT', '1000')),
+    'PAUSE': float(os.getenv('QR_CODES_PURGE_PAUSE', '0.1')),
+}
+
+# Génération de QR codes par lots (API generer_lot, commande generer_qr_codes)
+QR_CODES_LOT = {
+    'TAILLE_MAX': int(os.getenv('QR_CODES_LOT_TAILLE_MAX', '1000')),
+    'PROCESSUS': int(os.getenv('QR_CODES_LOT_PROCESSUS', '0')) or None,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,68 @@
+"""
+File de tâches d'arrière-plan
+
+Une fonction décorée par `@tache('nom')` reçoit une méthode `soumettre(*args)`
+qui la met en file après la validation de la transaction en cours:
+- vers Celery si l'application Celery est disponible et CELERY_BROKER_URL configuré;
+- sinon vers un pool de threads local au processus (TACHES_LOCALES_THREADS).
+Les arguments doivent être sérialisables en JSON (identifiants, chaînes).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executeur = None
+_verrou_executeur = threading.Lock()
+
+
+def _executeur_local():
+    global _executeur
+    if _executeur is None:
+        with _verrou_executeur:
+            if _executeur is None:
+                _executeur = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'TACHES_LOCALES_THREADS', 4),
+                    thread_name_prefix='tache'
+                )
+    return _executeur
+
+
+def _executer_localement(nom, fonction, args):
+    close_old_connections()
+    try:
+        fonction(*args)
+    except Exception:
+        logger.exception(f"Échec de la tâche {nom}")
+    finally:
+        # Chaque thread du pool a sa propre connexion à la base
+        connection.close()
+
+
+def utilise_celery():
+    from .celery import app
+    return app is not None and bool(getattr(settings, 'CELERY_BROKER_URL', ''))
+
+
+def tache(nom):
+    """Déclarer une tâche d'arrière-plan"""
+    def decorateur(fonction):
+        from .celery import app
+
+        tache_celery = app.task(name=nom, ignore_result=True)(fonction) if app is not None else None
+
+        def envoyer(*args):
+            if tache_celery is not None and utilise_celery():
+                tache_celery.delay(*args)
+            else:
+                _executeur_local().submit(_executer_localement, nom, fonction, args)
+
+        def soumettre(*args):
+            transaction.on_commit(lambda: envoyer(*args))
+
+        fonction.soumettre = soumettre
+        return fonction
+    return decorateur
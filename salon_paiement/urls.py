@@ -26,7 +26,7 @@ from prestations.urls import router as prestations_router
 from paiements.urls import router as paiements_router
 from qr_codes.urls import router as qr_codes_router
 from config_site.urls import router as config_site_router
-from salon_paiement.views import SessionPaiementViewSet, UtilisateurViewSet
+from salon_paiement.views import SessionPaiementViewSet, ArchiveSessionViewSet, UtilisateurViewSet
 
 # Combiner tous les routeurs
 router = routers.DefaultRouter()
@@ -36,6 +36,7 @@ router.registry.extend(paiements_router.registry)
 router.registry.extend(qr_codes_router.registry)
 router.registry.extend(config_site_router.registry)
 router.register(r'sessions-paiement', SessionPaiementViewSet, basename='sessions-paiement')
+router.register(r'archives-sessions', ArchiveSessionViewSet, basename='archives-sessions')
 router.register(r'utilisateurs', UtilisateurViewSet, basename='utilisateurs')
 
 urlpatterns = [
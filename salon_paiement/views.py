@@ -10,15 +10,22 @@ from .permissions import (
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, login, logout
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Q
+from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from .models import SessionPaiement, HistoriqueSession, Utilisateur
+from .pagination import PaginationCurseur
+from .archivage import archivage_service
+from .services.transition_service import transition_service
 from clients.models import Client
+from clients.telephones import resoudre_client
 from prestations.models import Prestation
 from paiements.models import Paiement
+from paiements.services.initiation_service import initiation_service
 from .serializers import (
     SessionPaiementSerializer, SessionPaiementCreateSerializer,
     SessionPaiementDetailSerializer, HistoriqueSessionSerializer,
@@ -39,6 +46,13 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
     serializer_class = SessionPaiementSerializer
     permission_classes = [AllowAny]  # Les sessions de paiement sont accessibles sans authentification
     lookup_field = 'session_id'
+    pagination_class = PaginationCurseur
+    
+    def get_champ_curseur(self):
+        """Colonne de date utilisée par la pagination par curseur"""
+        if self.action == 'historique':
+            return 'date_action'
+        return 'date_creation'
     
     def get_serializer_class(self):
         """Retourne le serializer approprié selon l'action"""
@@ -65,14 +79,7 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
         # Ne montrer que les sessions actives (non expirées)
         actives_seulement = self.request.query_params.get('actives', 'false')
         if actives_seulement.lower() == 'true':
-            now = timezone.now()
-            twenty_four_hours_ago = now - timedelta(hours=24)
-            queryset = queryset.exclude(
-                statut__in=['paiement_reussi', 'abandonne', 'expire']
-            ).filter(
-                (Q(date_expiration__isnull=True) & Q(date_creation__gt=twenty_four_hours_ago)) |
-                (Q(date_expiration__isnull=False) & Q(date_expiration__gt=now))
-            )
+            queryset = queryset.filter(SessionPaiement.filtre_actives())
         
         return queryset.order_by('-date_creation')
     
@@ -83,23 +90,20 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         adresse_ip = request.META.get('REMOTE_ADDR', '')
         
-        # Créer la session
-        session = SessionPaiement.objects.create(
+        # Créer la session et son entrée d'historique
+        session = transition_service.creer_session(
+            historique={
+                'type_action': 'scan_qr',
+                'description': 'QR Code scanné, session démarrée',
+                'donnees': {'session_id': session_id}
+            },
+            historique_immediat=True,
+            adresse_ip=adresse_ip,
             session_id=session_id,
             user_agent=user_agent,
-            adresse_ip=adresse_ip,
             date_expiration=timezone.now() + timedelta(hours=24)
         )
         
-        # Enregistrer l'action dans l'historique
-        HistoriqueSession.objects.create(
-            session=session,
-            type_action='scan_qr',
-            description='QR Code scanné, session démarrée',
-            donnees={'session_id': session_id},
-            adresse_ip=adresse_ip
-        )
-        
         serializer = SessionPaiementDetailSerializer(session)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -124,11 +128,11 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
             )
         
         # Rechercher le client existant
-        try:
-            client = Client.objects.get(telephone=telephone)
+        client = resoudre_client(telephone)
+        if client is not None:
             action_type = 'recherche_client'
             description = f'Client existant trouvé: {client.nom_complet}'
-        except Client.DoesNotExist:
+        else:
             # Créer un nouveau client
             client_data['telephone'] = telephone
             serializer = ClientSerializer(data=client_data)
@@ -142,19 +146,21 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        # Mettre à jour la session
-        session.client = client
-        session.statut = 'identification'
-        session.marquer_etape_terminee('identification')
-        session.save()
-        
-        # Enregistrer dans l'historique
-        HistoriqueSession.objects.create(
-            session=session,
-            type_action=action_type,
-            description=description,
-            donnees={'client_id': str(client.id), 'telephone': telephone},
-            adresse_ip=request.META.get('REMOTE_ADDR', '')
+        # Mettre à jour la session et l'historique
+        transition_service.appliquer(
+            session,
+            {
+                'client': client,
+                'statut': 'identification',
+                'identification_terminee': timezone.now()
+            },
+            historique={
+                'type_action': action_type,
+                'description': description,
+                'donnees': {'client_id': str(client.id), 'telephone': telephone}
+            },
+            adresse_ip=request.META.get('REMOTE_ADDR', ''),
+            historique_immediat=True
         )
         
         serializer = SessionPaiementDetailSerializer(session)
@@ -211,23 +217,25 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
         else:
             montant_final = prestation.prix_min
         
-        # Mettre à jour la session
-        session.prestation = prestation
-        session.montant_final = montant_final
-        session.statut = 'prestation_selectionnee'
-        session.marquer_etape_terminee('prestation')
-        session.save()
-        
-        # Enregistrer dans l'historique
-        HistoriqueSession.objects.create(
-            session=session,
-            type_action='selection_prestation',
-            description=f'Prestation sélectionnée: {prestation.nom} - {montant_final} FCFA',
-            donnees={
-                'prestation_id': str(prestation.id),
-                'montant_final': montant_final
+        # Mettre à jour la session et l'historique
+        transition_service.appliquer(
+            session,
+            {
+                'prestation': prestation,
+                'montant_final': montant_final,
+                'statut': 'prestation_selectionnee',
+                'prestation_selectionnee_le': timezone.now()
             },
-            adresse_ip=request.META.get('REMOTE_ADDR', '')
+            historique={
+                'type_action': 'selection_prestation',
+                'description': f'Prestation sélectionnée: {prestation.nom} - {montant_final} FCFA',
+                'donnees': {
+                    'prestation_id': str(prestation.id),
+                    'montant_final': montant_final
+                }
+            },
+            adresse_ip=request.META.get('REMOTE_ADDR', ''),
+            historique_immediat=True
         )
         
         serializer = SessionPaiementDetailSerializer(session)
@@ -253,64 +261,61 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Créer l'objet paiement
-        paiement = Paiement.objects.create(
-            client=session.client,
-            prestation=session.prestation,
-            montant=session.montant_final,
-            moyen_paiement=moyen_paiement,
-            operateur_mobile=operateur_mobile,
-            statut='en_attente'
-        )
-        
-        # Mettre à jour la session
-        session.statut = 'paiement_initie'
-        session.paiement_initie_le = timezone.now()
-        session.donnees_session['paiement_id'] = str(paiement.id)
-        session.save()
-        
-        # Enregistrer dans l'historique
-        HistoriqueSession.objects.create(
-            session=session,
-            type_action='initiation_paiement',
-            description=f'Paiement initié: {session.montant_final} FCFA via {moyen_paiement}',
-            donnees={
-                'paiement_id': str(paiement.id),
-                'moyen_paiement': moyen_paiement,
-                'operateur_mobile': operateur_mobile
-            },
-            adresse_ip=request.META.get('REMOTE_ADDR', '')
-        )
-        
-        # Retourner les détails pour rediriger vers le paiement
-        from paiements.services import payment_service
+        # Créer le paiement et mettre à jour la session dans une même transaction
+        with transaction.atomic():
+            paiement = Paiement.objects.create(
+                client=session.client,
+                prestation=session.prestation,
+                montant=session.montant_final,
+                moyen_paiement=moyen_paiement,
+                operateur_mobile=operateur_mobile,
+                statut='en_attente'
+            )
+            
+            donnees_session = dict(session.donnees_session, paiement_id=str(paiement.id))
+            transition_service.appliquer(
+                session,
+                {
+                    'statut': 'paiement_initie',
+                    'paiement_initie_le': timezone.now(),
+                    'donnees_session': donnees_session
+                },
+                historique={
+                    'type_action': 'initiation_paiement',
+                    'description': f'Paiement initié: {session.montant_final} FCFA via {moyen_paiement}',
+                    'donnees': {
+                        'paiement_id': str(paiement.id),
+                        'moyen_paiement': moyen_paiement,
+                        'operateur_mobile': operateur_mobile
+                    }
+                },
+                adresse_ip=request.META.get('REMOTE_ADDR', '')
+            )
         
         try:
             if moyen_paiement == 'mobile_money':
-                result = payment_service.initier_paiement_cinetpay(paiement)
-                if result.get('success'):
-                    paiement.statut = 'en_cours'
-                    paiement.save()
-                    return Response({
-                        'paiement_id': str(paiement.id),
-                        'paiement_url': result.get('payment_url'),
-                        'montant': session.montant_final,
-                        'moyen_paiement': moyen_paiement
-                    })
-                else:
-                    paiement.statut = 'echoue'
-                    paiement.save()
-                    return Response(
-                        {'error': result.get('error', "Échec d'initialisation du paiement")},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
+                # L'appel à la passerelle est fait en arrière-plan: le client suit
+                # l'initiation avec etat_paiement jusqu'à obtenir l'URL de paiement
+                initiation_service.demander(paiement, 'cinetpay')
+                return Response({
+                    'paiement_id': str(paiement.id),
+                    'paiement_url': None,
+                    'etat': 'en_file',
+                    'suivi_url': request.build_absolute_uri(
+                        reverse('sessions-paiement-etat-paiement', kwargs={'session_id': session.session_id})
+                    ),
+                    'montant': session.montant_final,
+                    'moyen_paiement': moyen_paiement
+                }, status=status.HTTP_202_ACCEPTED)
             else:
                 # Pour les autres moyens, marquer comme réussi immédiatement
-                paiement.statut = 'reussi'
-                paiement.save()
-                session.statut = 'paiement_reussi'
-                session.paiement_termine_le = timezone.now()
-                session.save()
+                with transaction.atomic():
+                    paiement.statut = 'reussi'
+                    paiement.save(update_fields=['statut', 'date_mise_a_jour'])
+                    transition_service.appliquer(session, {
+                        'statut': 'paiement_reussi',
+                        'paiement_termine_le': timezone.now()
+                    })
                 return Response({
                     'paiement_id': str(paiement.id),
                     'paiement_url': None,
@@ -324,6 +329,33 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['get'])
+    def historique(self, request, session_id=None):
+        """Historique paginé des actions de la session"""
+        session = self.get_object()
+        queryset = session.historique.order_by('-date_action')
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = HistoriqueSessionSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = HistoriqueSessionSerializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def etat_paiement(self, request, session_id=None):
+        """Suivre l'initiation du paiement de la session (URL de paiement une fois prête)"""
+        session = self.get_object()
+        paiement_id = session.donnees_session.get('paiement_id')
+        paiement = Paiement.objects.filter(pk=paiement_id).first() if paiement_id else None
+        if paiement is None:
+            return Response(
+                {'error': 'Aucun paiement initié pour cette session'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(initiation_service.etat(paiement))
+    
     @action(detail=True, methods=['get'])
     def recapitulatif(self, request, session_id=None):
         """Obtenir le récapitulatif final de la session"""
@@ -373,24 +405,16 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Créer une nouvelle session
         session_id = str(uuid.uuid4())
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         adresse_ip = request.META.get('REMOTE_ADDR', '')
         
-        session = SessionPaiement.objects.create(
-            session_id=session_id,
-            user_agent=user_agent,
-            adresse_ip=adresse_ip,
-            date_expiration=timezone.now() + timedelta(hours=24)
-        )
-        
         # Rechercher ou créer le client
-        try:
-            client = Client.objects.get(telephone=telephone)
+        client = resoudre_client(telephone)
+        if client is not None:
             action_type = 'recherche_client'
             description = f'Client existant trouvé: {client.nom_complet}'
-        except Client.DoesNotExist:
+        else:
             # Créer un nouveau client
             client_data['telephone'] = telephone
             serializer = ClientSerializer(data=client_data)
@@ -404,19 +428,21 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        # Mettre à jour la session avec le client
-        session.client = client
-        session.statut = 'identification'
-        session.marquer_etape_terminee('identification')
-        session.save()
-        
-        # Enregistrer dans l'historique
-        HistoriqueSession.objects.create(
-            session=session,
-            type_action='authentification_directe',
-            description=f'Authentification directe: {description}',
-            donnees={'client_id': str(client.id), 'telephone': telephone},
-            adresse_ip=adresse_ip
+        # Créer la session directement identifiée, avec son historique
+        session = transition_service.creer_session(
+            historique={
+                'type_action': 'authentification_directe',
+                'description': f'Authentification directe: {description}',
+                'donnees': {'client_id': str(client.id), 'telephone': telephone}
+            },
+            historique_immediat=True,
+            adresse_ip=adresse_ip,
+            session_id=session_id,
+            user_agent=user_agent,
+            client=client,
+            statut='identification',
+            identification_terminee=timezone.now(),
+            date_expiration=timezone.now() + timedelta(hours=24)
         )
         
         serializer = SessionPaiementDetailSerializer(session)
@@ -426,6 +452,45 @@ class SessionPaiementViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_201_CREATED)
 
 
+class ArchiveSessionViewSet(viewsets.ViewSet):
+    """
+    API en lecture seule sur les sessions archivées (voir salon_paiement.archivage)
+
+    - sans `mois`: liste des mois archivés
+    - `?mois=AAAA-MM`: sessions archivées du mois (filtres `statut`, `client`), paginées
+    - `/<session_id>/` (et `?mois=` pour éviter de parcourir toutes les archives)
+    """
+    permission_classes = [IsAuthenticated, IsActiveUser, IsAdmin]
+    lookup_field = 'session_id'
+    
+    def list(self, request):
+        mois = request.query_params.get('mois')
+        if not mois:
+            return Response({'archives': archivage_service.mois_disponibles()})
+        
+        try:
+            sessions = list(archivage_service.lire(
+                mois,
+                statut=request.query_params.get('statut'),
+                client_id=request.query_params.get('client')
+            ))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        paginator = PaginationCurseur()
+        page = paginator.paginate_queryset(sessions, request, view=self)
+        return paginator.get_paginated_response(page)
+    
+    def retrieve(self, request, session_id=None):
+        try:
+            session = archivage_service.trouver(session_id, mois=request.query_params.get('mois'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if session is None:
+            return Response({'error': 'Session archivée introuvable'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(session)
+
+
 class UtilisateurViewSet(viewsets.ModelViewSet):
     """
     API endpoint pour gérer les utilisateurs du système